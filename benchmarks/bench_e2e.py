@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark against a synthetic displayplacer.
+
+Installs the fake displayplacer (see benchmarks.synthetic) on PATH for a few
+display/mode-count scenarios, including rotated, mirrored and "Hertz: N/A"
+screens, and times detect_displays, save_layout, apply_layout and the CLI
+commands a user runs, each in a throwaway HOME. Results can be written as
+JSON and compared with an earlier run:
+
+  python -m benchmarks.bench_e2e --output before.json
+  python -m benchmarks.bench_e2e --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_displayplacer import (
+    ENV_DISPLAYS, ENV_MIRRORED, ENV_MODES, ENV_NA_HZ, ENV_ROTATED, ENV_STATE,
+    write_fake_displayplacer,
+)
+from core.advanced_display_manager import AdvancedDisplayManager
+from utils.displayplacer import invalidate_cache
+from version import __version__
+
+# (label, displays, modes per display, rotated, mirrored, N/A hz)
+SCENARIOS = [
+    ("small", 3, 200, 0, 0, 0),
+    ("desk", 8, 2000, 1, 1, 1),
+    ("wall", 16, 5000, 2, 2, 2),
+]
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def _time(function, runs):
+    """Run ``function`` ``runs`` times with its output silenced; return its durations"""
+    samples = []
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            for _ in range(runs):
+                start = time.perf_counter()
+                if function() is False:
+                    raise RuntimeError(f"{function.__name__} failed")
+                samples.append(time.perf_counter() - start)
+        finally:
+            sys.stdout = stdout
+    return samples
+
+
+def _bench_manager(runs):
+    manager = AdvancedDisplayManager(use_detection_cache=False)
+    manager.layouts.clear()
+    results = {}
+
+    def detect():
+        return bool(manager.detect_displays())
+    results['detect_displays'] = _summary(_time(detect, runs))
+
+    def save():
+        return manager.save_layout("Bench")
+    results['save_layout'] = _summary(_time(save, runs))
+
+    # Two layouts that differ only in where the first external display sits
+    display_ids = list(manager.detect_displays())
+    moved = display_ids[1] if len(display_ids) > 1 else display_ids[0]
+    x, y = manager.displays[moved].current_position
+    manager.save_layout("BenchA")
+    manager.save_layout("BenchB", overrides={moved: {'position': (x + 100, y)}})
+    layouts = iter(["BenchB", "BenchA"] * runs)
+
+    def apply_switch():
+        return manager.apply_layout(next(layouts))
+    results['apply_layout'] = _summary(_time(apply_switch, runs))
+
+    def apply_noop():
+        return manager.apply_layout("BenchA")
+    _time(apply_noop, 1)  # settle on BenchA first
+    results['apply_layout.noop'] = _summary(_time(apply_noop, runs))
+    return results
+
+
+def _bench_cli(runs, env):
+    results = {}
+    commands = {
+        'cli detect': ["detect"],
+        'cli list-layouts': ["list-layouts"],
+        'cli load': ["load", "BenchA"],
+    }
+    for label, args in commands.items():
+        argv = [sys.executable, "-m", "cli", "--no-cache"] + args
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(argv, cwd=ROOT, env=env, capture_output=True, text=True)
+            samples.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                raise RuntimeError(f"{label} exited {result.returncode}: {result.stderr.strip()}")
+        results[label] = _summary(samples)
+    return results
+
+
+def run_scenario(scenario, runs, cli_runs):
+    label, displays, modes, rotated, mirrored, na_hz = scenario
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_dir = os.path.join(tmp, "bin")
+        os.makedirs(bin_dir)
+        write_fake_displayplacer(bin_dir, {
+            ENV_DISPLAYS: displays, ENV_MODES: modes, ENV_ROTATED: rotated,
+            ENV_MIRRORED: mirrored, ENV_NA_HZ: na_hz, ENV_STATE: os.path.join(tmp, "state.json"),
+        })
+        saved_env = dict(os.environ)
+        saved_layouts_file = AdvancedDisplayManager.LAYOUTS_FILE
+        try:
+            os.environ["HOME"] = tmp
+            os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+            AdvancedDisplayManager.LAYOUTS_FILE = os.path.join(tmp, ".monitor_layouts.json")
+            invalidate_cache()
+            results = _bench_manager(runs)
+            if cli_runs:
+                results.update(_bench_cli(cli_runs, dict(os.environ)))
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            AdvancedDisplayManager.LAYOUTS_FILE = saved_layouts_file
+            invalidate_cache()
+    return {
+        'displays': displays, 'modes': modes, 'rotated': rotated,
+        'mirrored': mirrored, 'na_hz': na_hz, 'operations': results,
+    }
+
+
+def _print_results(results, baseline=None):
+    for label, scenario in results.items():
+        print(f"{label}: {scenario['displays']} displays x {scenario['modes']} modes "
+              f"({scenario['rotated']} rotated, {scenario['mirrored']} mirrored, {scenario['na_hz']} N/A hz)")
+        before = ((baseline or {}).get(label) or {}).get('operations', {})
+        for name, row in scenario['operations'].items():
+            line = (f"  {name:<20} median {row['median_ms']:9.1f} ms   "
+                    f"p95 {row['p95_ms']:9.1f} ms   min {row['min_ms']:9.1f} ms")
+            if name in before and before[name]['median_ms']:
+                change = (row['median_ms'] - before[name]['median_ms']) / before[name]['median_ms']
+                line += f"   {change:+7.1%} vs baseline"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against a synthetic displayplacer")
+    parser.add_argument("--runs", type=int, default=10, help="in-process runs per operation")
+    parser.add_argument("--cli-runs", type=int, default=3, help="runs per CLI command (0 to skip)")
+    parser.add_argument("--scenario", action="append", choices=[s[0] for s in SCENARIOS],
+                        help="only run this scenario (repeatable)")
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="show median changes against an earlier --output")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f).get('results')
+
+    results = {}
+    for scenario in SCENARIOS:
+        if args.scenario and scenario[0] not in args.scenario:
+            continue
+        results[scenario[0]] = run_scenario(scenario, args.runs, args.cli_runs)
+    _print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'version': __version__,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'runs': args.runs,
+                'cli_runs': args.cli_runs,
+                'results': results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark for `cli export` on a large layout store.
+
+With 10,000 saved layouts, times exporting everything the way the CLI used
+to (one LayoutProfile per layout, then json.dump with indent=2 of the whole
+dict) against the streaming AdvancedDisplayManager.export_layouts, plain and
+with each stdlib compression, and exporting the subsets provisioning
+scripts ask for: a name glob and one display set. Both layout stores are
+measured; file sizes are printed next to the times.
+
+Run: python -m benchmarks.bench_export
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_layout_store import generate_layouts
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.layout_store import LAYOUT_STORE_ENV, LayoutStore
+from core.layout_transfer import COMPRESSIONS
+
+LAYOUTS = 10000
+REPEAT = 3
+
+
+def _best(function) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts_file = os.path.join(tmp, ".monitor_layouts.json")
+        layouts = generate_layouts(LAYOUTS)
+        LayoutStore(layouts_file).replace(layouts)
+        display_ids = list(layouts[f"Desk {LAYOUTS // 2}"]['displays'])
+        saved_env, saved_layouts_file = dict(os.environ), AdvancedDisplayManager.LAYOUTS_FILE
+        AdvancedDisplayManager.LAYOUTS_FILE = layouts_file
+        try:
+            print(f"{LAYOUTS} layouts (best of {REPEAT})")
+            for store in ("json", "sqlite"):
+                os.environ[LAYOUT_STORE_ENV] = store
+                manager = AdvancedDisplayManager(use_detection_cache=False)
+                manager.get_layout_names()  # migrate once
+                output = os.path.join(tmp, "export.json")
+
+                def old():
+                    data = {name: asdict(manager.get_layout(name)) for name in manager.get_layout_names()}
+                    with open(output, 'w') as f:
+                        json.dump(data, f, indent=2)
+
+                cases = [("all, json.dump indent=2 (old)", old, output)]
+                for compression, (extension, _, _) in [(None, ("", None, None)), *COMPRESSIONS.items()]:
+                    path = output + extension
+                    cases.append((f"all, streamed{' + ' + compression if compression else ''}",
+                                  lambda path=path: manager.export_layouts(path), path))
+                cases.append(("name glob 'Desk 1*', streamed",
+                              lambda: manager.export_layouts(output, manager.select_layouts(["Desk 1*"])), output))
+                cases.append(("one display set, streamed",
+                              lambda: manager.export_layouts(output, manager.select_layouts(
+                                  display_ids=display_ids)), output))
+
+                print(f"  {store}")
+                for label, function, path in cases:
+                    ms = _best(function)
+                    print(f"    {label:<34} {ms:9.1f} ms {os.path.getsize(path) / 1024:9.0f} KB")
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            AdvancedDisplayManager.LAYOUTS_FILE = saved_layouts_file
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark for `cli import-layouts` on a large fleet export.
+
+Writes an export of about ``--mb`` megabytes in the `cli export` format, then
+imports it into an empty layout store, each time in a fresh process so peak
+memory (max RSS) is comparable: with the streaming importer
+(AdvancedDisplayManager.import_layouts) into the JSON and the SQLite store,
+and the way the CLI used to, with json.load of the whole file and one
+LayoutProfile per record.
+
+Run: python -m benchmarks.bench_import [--mb 100]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_layout_store import iter_layouts
+from core.advanced_display_manager import AdvancedDisplayManager, LayoutProfile
+from core.layout_store import LAYOUT_STORE_ENV
+
+
+def write_export(path: str, megabytes: int) -> int:
+    """Write layouts until the file reaches ``megabytes``; return how many"""
+    count = 0
+    with open(path, 'w') as f:
+        f.write("{")
+        for name, layout in iter_layouts(10 ** 9):
+            f.write(("," if count else "") + f"\n  {json.dumps(name)}: {json.dumps(layout, indent=2)}")
+            count += 1
+            if count % 1000 == 0 and f.tell() >= megabytes << 20:
+                break
+        f.write("\n}\n")
+    return count
+
+
+def _child(mode: str, export: str, layouts_file: str):
+    store, mode = mode.split(":")
+    os.environ[LAYOUT_STORE_ENV] = store
+    AdvancedDisplayManager.LAYOUTS_FILE = layouts_file
+    manager = AdvancedDisplayManager(use_detection_cache=False)
+    start = time.perf_counter()
+    if mode == "stream":
+        result = manager.import_layouts(export)
+        count = len(result.imported)
+    else:
+        with open(export) as f:
+            data = json.load(f)
+        for name, layout_data in data.items():
+            manager.layouts[name] = LayoutProfile(**layout_data)
+        manager.save_layouts()
+        count = len(data)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1 << 20) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+    print(json.dumps({'layouts': count, 'seconds': elapsed, 'peak_mb': peak_mb}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a large export, streaming vs loading it whole")
+    parser.add_argument("--mb", type=int, default=100, help="size of the generated export")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = os.path.join(tmp, "export.json")
+        count = write_export(export, args.mb)
+        print(f"export: {count} layouts, {os.path.getsize(export) / (1 << 20):.0f} MB")
+        for mode, label in (("json:stream", "streaming import, json"), ("sqlite:stream", "streaming import, sqlite"),
+                            ("json:load", "json.load + LayoutProfile")):
+            layouts_file = os.path.join(tmp, mode.replace(":", "-") + ".json")
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_import", "--child",
+                                     mode, export, layouts_file],
+                                    cwd=ROOT, check=True, capture_output=True, text=True).stdout
+            row = json.loads(output.strip().splitlines()[-1])
+            print(f"  {label:<26} {row['seconds']:7.2f} s   peak {row['peak_mb']:6.0f} MB"
+                  f"   {row['layouts']} layouts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the layout stores (core.layout_store).
+
+Fills the JSON store and the SQLite store with the same generated layouts and
+times a cold open + lookup of one layout, listing names, finding the
+layouts for one display set (through the fingerprint index, and by scanning
+every layout as a baseline), and saving + deleting one layout, for a few
+collection sizes. Also compares the JSON snapshot's size and parse time with
+the flat format it had before display configs were content-addressed.
+
+Run: python -m benchmarks.bench_layout_store
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_display_id
+from core.layout_store import LayoutStore, SQLiteLayoutStore, display_set_fingerprint
+
+SIZES = [1000, 10000]
+REPEAT = 20
+
+
+def iter_layouts(count: int):
+    """``count`` (name, layout) pairs over 2-4 displays drawn from a pool of 40 monitors"""
+    for n in range(count):
+        ids = [synthetic_display_id(0)] + [synthetic_display_id(1 + (n * 7 + k) % 40)
+                                           for k in range(1 + n % 3)]
+        displays = {display_id: {'resolution': [2560, 1440], 'position': [2560 * k, 0], 'rotation': 0,
+                                 'scaling': True, 'hz': 60, 'color_depth': 8, 'enabled': True}
+                    for k, display_id in enumerate(ids)}
+        name = f"Desk {n}"
+        yield name, {'name': name, 'description': "", 'displays': displays,
+                     'created_at': "2026-01-01T00:00:00", 'last_used': ""}
+
+
+def generate_layouts(count: int):
+    """``count`` layouts, as iter_layouts makes them, in one dict"""
+    return dict(iter_layouts(count))
+
+
+def _best(function) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'layouts':>8} {'store':>7} {'open+get':>9} {'names':>9} {'by set':>9} {'scan':>9} "
+          f"{'save+del':>9}   (best of {REPEAT}, ms)")
+    for size in SIZES:
+        layouts = generate_layouts(size)
+        probe = f"Desk {size // 2}"
+        fingerprint = display_set_fingerprint(layouts[probe]['displays'])
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "layouts.json")
+            LayoutStore(json_path).replace(layouts)
+            sqlite_path = os.path.join(tmp, "layouts.sqlite3")
+            SQLiteLayoutStore(sqlite_path).replace(layouts)
+
+            def json_open_get():
+                store = LayoutStore(json_path)
+                store.load()
+                return store.get(probe)
+
+            def sqlite_open_get():
+                store = SQLiteLayoutStore(sqlite_path)
+                layout = store.get(probe)
+                store.close()
+                return layout
+
+            for label, open_get, store in (
+                    ("json", json_open_get, LayoutStore(json_path)),
+                    ("sqlite", sqlite_open_get, SQLiteLayoutStore(sqlite_path))):
+                store.load()
+
+                def save_delete():
+                    store.put("Bench", layouts[probe])
+                    store.delete("Bench")
+
+                def scan():
+                    return [name for name, layout in store.get_all().items()
+                            if display_set_fingerprint(layout['displays']) == fingerprint]
+
+                row = [_best(open_get), _best(store.names),
+                       _best(lambda: store.names_for_fingerprint(fingerprint)), _best(scan), _best(save_delete)]
+                print(f"{size:>8} {label:>7} " + " ".join(f"{ms:>9.2f}" for ms in row))
+
+            with open(json_path, 'rb') as f:
+                snapshot = f.read()
+            flat = json.dumps(layouts, indent=2).encode()
+            parse = _best(lambda: LayoutStore._decode_snapshot(json.loads(snapshot)))
+            print(f"{'':>16} snapshot {len(snapshot) // 1024} KB, parsed in {parse:.2f} ms "
+                  f"(flat format: {len(flat) // 1024} KB, {_best(lambda: json.loads(flat)):.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AdvancedDisplayManager._parse_display_output.
+
+Compares the single-pass parser against the previous split/regex
+implementation on synthetic outputs with many displays and modes, and
+reports the one-off cost of decoding and indexing the full mode tables.
+"warm" re-parses identical output, where every section hits the
+section-hash cache.
+
+Run: python -m benchmarks.bench_parser
+"""
+
+import os
+import re
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.advanced_display_manager import AdvancedDisplayManager, Display
+from benchmarks.synthetic import generate_list_output
+
+CASES = [(16, 1000), (16, 4000), (32, 2000), (64, 1000), (64, 4000)]
+REPEAT = 5
+
+
+def _legacy_parse_section(section: str) -> Optional[Display]:
+    """Previous section parser, kept here as the comparison baseline."""
+    display_id, name, display_type = "", "", "external"
+    resolution, position, rotation = (1920, 1080), (0, 0), 0
+    scaling, hz, color_depth, enabled, is_main = False, 60, 8, True, False
+    available_resolutions = []
+    for line in section.strip().split('\n'):
+        line = line.strip()
+        if line.startswith("Persistent screen id:"):
+            display_id = line.split(": ")[1]
+        elif line.startswith("Type:"):
+            if "MacBook" in line:
+                display_type, name = "macbook", "MacBook Display"
+            elif "inch external" in line:
+                name = f"External Display ({line.split()[1]} inch)"
+            else:
+                name = "External Display"
+        elif line.startswith("Resolution:"):
+            w, h = line.split(": ")[1].split("x")
+            resolution = (int(w), int(h))
+        elif line.startswith("Origin:"):
+            x, y = line.split(": ")[1].split(" - ")[0].strip("()").split(",")
+            position = (int(x), int(y))
+            is_main = "main display" in line
+        elif line.startswith("Rotation:"):
+            rotation = int(line.split(": ")[1].split()[0])
+        elif line.startswith("Scaling:"):
+            scaling = "on" in line.split(": ")[1]
+        elif line.startswith("Hertz:"):
+            hz_str = line.split(": ")[1]
+            if hz_str != "N/A":
+                hz = int(hz_str)
+        elif line.startswith("Color Depth:"):
+            color_depth = int(line.split(": ")[1])
+        elif line.startswith("Enabled:"):
+            enabled = "true" in line.split(": ")[1]
+        elif "mode" in line and "res:" in line:
+            match = re.search(r'res:(\d+)x(\d+)', line)
+            if match:
+                w, h = int(match.group(1)), int(match.group(2))
+                if (w, h) not in available_resolutions:
+                    available_resolutions.append((w, h))
+    if not display_id:
+        return None
+    return Display(display_id, name, display_type, resolution,
+                   available_resolutions or [resolution], position, rotation,
+                   scaling, hz, color_depth, enabled, is_main)
+
+
+def _legacy_parse(output: str) -> Dict[str, Display]:
+    displays = {}
+    for section in re.split(r'\n(?=Persistent screen id:)', output.strip()):
+        if section.strip():
+            display = _legacy_parse_section(section)
+            if display:
+                displays[display.id] = display
+    return displays
+
+
+def _best_of(fn, output: str, repeat: int = REPEAT) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(output)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    manager = AdvancedDisplayManager()
+
+    def cold_parse(output: str):
+        manager.invalidate_detection_cache()
+        return manager._parse_display_output(output)
+
+    print(f"{'displays':>8} {'modes':>6} {'lines':>8} {'legacy ms':>10} {'new ms':>8} "
+          f"{'speedup':>8} {'warm ms':>8} {'modes ms':>9}")
+    for displays, modes in CASES:
+        output = generate_list_output(displays, modes)
+        expected = _legacy_parse(output)
+        actual = cold_parse(output)
+        if actual != expected:
+            sys.exit(f"Parser mismatch for {displays} displays x {modes} modes")
+        legacy = _best_of(_legacy_parse, output, repeat=1)
+        new = _best_of(cold_parse, output)
+        warm = _best_of(manager._parse_display_output, output)
+        start = time.perf_counter()
+        for display in actual.values():
+            display.modes.is_valid(display.resolution, display.hz)
+        index = time.perf_counter() - start
+        print(f"{displays:>8} {modes:>6} {output.count(chr(10)):>8} "
+              f"{legacy * 1000:>10.1f} {new * 1000:>8.1f} {legacy / new:>7.1f}x "
+              f"{warm * 1000:>8.1f} {index * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
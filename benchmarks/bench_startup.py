@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for lazy layout loading.
+
+With 5,000 saved layouts, times creating an AdvancedDisplayManager (what
+`cli detect`, `cli doctor` and GUI startup pay), then listing layout names
+and loading one layout, against loading every layout up front the way the
+manager used to. Both layout stores are measured, plus `cli detect` as a
+subprocess on the simulated backend.
+
+Run: python -m benchmarks.bench_startup
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_layout_store import generate_layouts
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.backends import SimulatedBackend
+from core.layout_store import LAYOUT_STORE_ENV, LayoutStore
+
+LAYOUTS = 5000
+REPEAT = 10
+CLI_REPEAT = 3
+
+
+def _best(function, repeat=REPEAT) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts_file = os.path.join(tmp, ".monitor_layouts.json")
+        layouts = generate_layouts(LAYOUTS)
+        LayoutStore(layouts_file).replace(layouts)
+        probe = f"Desk {LAYOUTS // 2}"
+        backend = SimulatedBackend.generate(count=3, modes=200)
+        saved_env, saved_layouts_file = dict(os.environ), AdvancedDisplayManager.LAYOUTS_FILE
+        AdvancedDisplayManager.LAYOUTS_FILE = layouts_file
+        try:
+            os.environ["HOME"] = tmp
+            print(f"{LAYOUTS} layouts (best of {REPEAT}, ms)")
+            print(f"  {'store':<7} {'init':>9} {'+ names':>9} {'+ one':>9} {'eager':>9} {'cli detect':>11}")
+            for store in ("json", "sqlite"):
+                os.environ[LAYOUT_STORE_ENV] = store
+                AdvancedDisplayManager(use_detection_cache=False, backend=backend).get_layout(probe)  # migrate once
+
+                def init():
+                    return AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+
+                def names():
+                    return init().get_layout_names()
+
+                def one():
+                    return init().get_layout(probe)
+
+                def eager():
+                    return dict(init().layouts.items())
+
+                def cli_detect():
+                    subprocess.run([sys.executable, "-m", "cli", "--backend", "simulated", "--no-cache", "detect"],
+                                   cwd=ROOT, env=os.environ, check=True, capture_output=True)
+
+                row = [_best(init), _best(names), _best(one), _best(eager), _best(cli_detect, CLI_REPEAT)]
+                print(f"  {store:<7} " + " ".join(f"{ms:>9.2f}" for ms in row[:4]) + f" {row[4]:>11.1f}")
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            AdvancedDisplayManager.LAYOUTS_FILE = saved_layouts_file
+
+
+if __name__ == "__main__":
+    main()
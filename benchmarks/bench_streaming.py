@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming detection (AdvancedDisplayManager.iter_displays).
+
+Runs against the fake displayplacer with a per-section delay and compares
+time-to-first-display for iter_displays with detect_displays, which has to
+wait for the whole output.
+
+Run: python -m benchmarks.bench_streaming
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_displayplacer import (
+    ENV_DISPLAYS, ENV_MODES, ENV_SECTION_DELAY, write_fake_displayplacer,
+)
+from core.advanced_display_manager import AdvancedDisplayManager
+
+DISPLAYS = 6
+MODES = 500
+SECTION_DELAY = 0.2
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = AdvancedDisplayManager(use_detection_cache=False)
+        manager.DISPLAYPLACER = write_fake_displayplacer(tmp)
+        os.environ.update({
+            ENV_DISPLAYS: str(DISPLAYS),
+            ENV_MODES: str(MODES),
+            ENV_SECTION_DELAY: str(SECTION_DELAY),
+        })
+
+        manager.invalidate_detection_cache()
+        start = time.perf_counter()
+        displays = manager.detect_displays()
+        batch_total = time.perf_counter() - start
+
+        manager.invalidate_detection_cache()
+        start = time.perf_counter()
+        first = None
+        count = 0
+        for _ in manager.iter_displays():
+            count += 1
+            if first is None:
+                first = time.perf_counter() - start
+        stream_total = time.perf_counter() - start
+
+    if count != len(displays):
+        sys.exit(f"Streaming found {count} displays, batch found {len(displays)}")
+    print(f"{DISPLAYS} displays x {MODES} modes, {SECTION_DELAY * 1000:.0f} ms per section")
+    print(f"  detect_displays  first display: {batch_total * 1000:8.1f} ms   all: {batch_total * 1000:8.1f} ms")
+    print(f"  iter_displays    first display: {first * 1000:8.1f} ms   all: {stream_total * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark for `cli watch` (core.watcher.DisplayWatcher).
+
+Replays the same scenario against the fake displayplacer twice: once with a
+fixed short poll interval and once with the adaptive schedule. The scenario
+is a quiet period, a dock that flaps 3 -> 4 -> 3 -> 4 displays within a
+second, then another quiet period. Reports wakeups, displayplacer runs, CPU
+time (this process plus its children) and the events emitted; both runs
+should report exactly one event.
+
+Run: python -m benchmarks.bench_watch
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_displayplacer import ENV_DISPLAYS, ENV_MODES, write_fake_displayplacer
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.watcher import DisplayWatcher
+
+DURATION = 20.0
+MODES = 300
+# (seconds since start, display count)
+SCENARIO = [(0.0, 3), (8.0, 4), (8.3, 3), (8.6, 4)]
+MIN_INTERVAL = 0.25
+MAX_INTERVAL = 4.0
+SETTLE = 1.0
+
+
+class _Done(Exception):
+    pass
+
+
+def _cpu_seconds() -> float:
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def run(displayplacer: str, label: str, **watcher_options):
+    os.environ[ENV_DISPLAYS] = str(SCENARIO[0][1])
+    start = time.monotonic()
+    steps = list(SCENARIO[1:])
+
+    def scripted_sleep(seconds):
+        """Sleep, switching the fake's display count on schedule"""
+        deadline = time.monotonic() + seconds
+        while True:
+            now = time.monotonic()
+            while steps and now - start >= steps[0][0]:
+                os.environ[ENV_DISPLAYS] = str(steps.pop(0)[1])
+            if now - start >= DURATION:
+                raise _Done
+            if now >= deadline:
+                return
+            wake = min(deadline, start + DURATION)
+            if steps:
+                wake = min(wake, start + steps[0][0])
+            time.sleep(wake - now)
+
+    manager = AdvancedDisplayManager(use_detection_cache=False)
+    manager.DISPLAYPLACER = displayplacer
+    watcher = DisplayWatcher(manager, sleep=scripted_sleep, **watcher_options)
+    events = []
+    cpu_start = _cpu_seconds()
+    try:
+        for event in watcher.events():
+            events.append(event)
+    except _Done:
+        pass
+    cpu = _cpu_seconds() - cpu_start
+
+    added = sum(len(event['added']) for event in events)
+    print(f"  {label:<9} wakeups: {watcher.polls:4d}   displayplacer runs: {watcher.detections:4d}"
+          f"   CPU: {cpu * 1000:7.0f} ms   events: {len(events)} ({added} display added)")
+    return events
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        displayplacer = write_fake_displayplacer(tmp)
+        os.environ[ENV_MODES] = str(MODES)
+        print(f"{DURATION:.0f} s scenario, dock flapping at {SCENARIO[1][0]:.0f} s, {MODES} modes per display")
+        fixed = run(displayplacer, "fixed", min_interval=MIN_INTERVAL, max_interval=MIN_INTERVAL,
+                    settle=SETTLE)
+        adaptive = run(displayplacer, "adaptive", min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                       settle=SETTLE)
+    if len(fixed) != 1 or len(adaptive) != 1:
+        sys.exit(f"Expected one coalesced event per run, got {len(fixed)} and {len(adaptive)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Concurrency harness for the layout stores.
+
+Starts several processes that save, delete and bulk-import layouts into the
+same store at once (the CLI, the GUI and login hooks racing), with a small
+compaction threshold so snapshots are rewritten while others append. When
+they are done, every layout that should exist must be there and every
+deleted one gone. Runs against the JSON and the SQLite store.
+
+Run: python -m benchmarks.concurrency_harness
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.advanced_display_manager import AdvancedDisplayManager, LayoutProfile
+from core.layout_store import LAYOUT_STORE_ENV
+
+WORKERS = 6
+SAVES = 60  # per worker; every third is deleted again
+BULK = 25  # layouts per bulk import, one per worker
+COMPACT_RECORDS = 16
+
+
+def _profile(name: str) -> LayoutProfile:
+    return LayoutProfile(name=name, description="", created_at="2026-01-01T00:00:00",
+                         displays={"00000000-0000-0000-0000-000000000000": {'position': [0, 0]}})
+
+
+def _worker(layouts_file: str, store: str, worker: int, saves: int, bulk: int):
+    os.environ[LAYOUT_STORE_ENV] = store
+    AdvancedDisplayManager.LAYOUTS_FILE = layouts_file
+    manager = AdvancedDisplayManager(use_detection_cache=False)
+    if hasattr(manager.layout_store, 'compact_records'):
+        manager.layout_store.compact_records = COMPACT_RECORDS
+    for n in range(saves):
+        name = f"w{worker}-{n}"
+        manager.layouts[name] = _profile(name)
+        if not manager.save_layouts():
+            sys.exit(1)
+        if n % 3 == 0 and not manager.delete_layout(name):
+            sys.exit(1)
+        if n == saves // 2:
+            for k in range(bulk):
+                manager.layouts[f"w{worker}-bulk-{k}"] = _profile(f"w{worker}-bulk-{k}")
+            if not manager.save_layouts():
+                sys.exit(1)
+    if hasattr(manager.layout_store, 'wait'):
+        manager.layout_store.wait()
+
+
+def _expected(workers: int, saves: int, bulk: int):
+    names = set()
+    for worker in range(workers):
+        names.update(f"w{worker}-{n}" for n in range(saves) if n % 3)
+        names.update(f"w{worker}-bulk-{k}" for k in range(bulk))
+    return names
+
+
+def run(store: str, workers: int = WORKERS, saves: int = SAVES, bulk: int = BULK) -> bool:
+    """Race ``workers`` processes on one store; True if no layout was lost or kept"""
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts_file = os.path.join(tmp, ".monitor_layouts.json")
+        start = time.perf_counter()
+        processes = [multiprocessing.Process(target=_worker, args=(layouts_file, store, worker, saves, bulk))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        os.environ[LAYOUT_STORE_ENV] = store
+        AdvancedDisplayManager.LAYOUTS_FILE = layouts_file
+        found = set(AdvancedDisplayManager(use_detection_cache=False).get_layout_names())
+    expected = _expected(workers, saves, bulk)
+    ok = found == expected and all(process.exitcode == 0 for process in processes)
+    detail = f"{len(found)}/{len(expected)} layouts, {elapsed:.2f} s"
+    if expected - found:
+        detail += f", {len(expected - found)} lost"
+    if found - expected:
+        detail += f", {len(found - expected)} not deleted"
+    print(f"  {'PASS' if ok else 'FAIL'}  {store:<7} {workers} processes  {detail}")
+    return ok
+
+
+def main():
+    failures = sum(not run(store) for store in ("json", "sqlite"))
+    if failures:
+        sys.exit(f"{failures} store(s) failed")
+
+
+if __name__ == "__main__":
+    main()
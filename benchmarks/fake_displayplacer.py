@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Fake displayplacer for benchmarks.
+
+Backed by core.backends.SimulatedBackend: `list` prints the simulated
+displays (see benchmarks/synthetic.py), optionally pausing between display
+sections to mimic a slow displayplacer, and any other arguments are applied
+to the simulation, failing like displayplacer for unknown screens or modes.
+Behaviour is controlled by environment variables:
+
+  FAKE_DISPLAYPLACER_DISPLAYS       number of displays (default 3)
+  FAKE_DISPLAYPLACER_MODES          mode lines per display (default 200)
+  FAKE_DISPLAYPLACER_SEED           random seed for display types and mode tables (default 0)
+  FAKE_DISPLAYPLACER_ROTATED        external displays in portrait (default 0)
+  FAKE_DISPLAYPLACER_MIRRORED       displays mirroring the MacBook panel (default 0)
+  FAKE_DISPLAYPLACER_NA_HZ          displays reporting "Hertz: N/A" (default 0)
+  FAKE_DISPLAYPLACER_SECTION_DELAY  seconds to sleep before each section (default 0)
+  FAKE_DISPLAYPLACER_STATE          JSON file that applies are recorded in and
+                                    `list` reports back (default: applies are checked
+                                    but not remembered)
+  FAKE_DISPLAYPLACER_IGNORE         comma-separated settings an apply silently
+                                    ignores, like macOS sometimes does (e.g. "origin")
+  FAKE_DISPLAYPLACER_HANG           "list", "apply" or "all": hang like a wedged
+                                    displayplacer (ignores SIGTERM, and a child
+                                    process keeps the output pipes open)
+  FAKE_DISPLAYPLACER_HANG_ONCE      marker file; when set, only hang if it does not
+                                    exist yet (and create it), so a retry succeeds
+"""
+
+import os
+import shlex
+import signal
+import stat
+import sys
+import time
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backends import SimulatedBackend
+
+ENV_DISPLAYS = "FAKE_DISPLAYPLACER_DISPLAYS"
+ENV_MODES = "FAKE_DISPLAYPLACER_MODES"
+ENV_SEED = "FAKE_DISPLAYPLACER_SEED"
+ENV_ROTATED = "FAKE_DISPLAYPLACER_ROTATED"
+ENV_MIRRORED = "FAKE_DISPLAYPLACER_MIRRORED"
+ENV_NA_HZ = "FAKE_DISPLAYPLACER_NA_HZ"
+ENV_SECTION_DELAY = "FAKE_DISPLAYPLACER_SECTION_DELAY"
+ENV_STATE = "FAKE_DISPLAYPLACER_STATE"
+ENV_IGNORE = "FAKE_DISPLAYPLACER_IGNORE"
+ENV_HANG = "FAKE_DISPLAYPLACER_HANG"
+ENV_HANG_ONCE = "FAKE_DISPLAYPLACER_HANG_ONCE"
+
+HANG_SECONDS = 3600
+
+
+def write_fake_displayplacer(directory: str, env: Optional[Dict[str, str]] = None) -> str:
+    """Write an executable `displayplacer` wrapper into ``directory``.
+
+    ``env`` (FAKE_DISPLAYPLACER_* settings) is baked into the wrapper, so it
+    behaves the same from any shell. Returns its path. Put ``directory``
+    first on PATH (and call utils.displayplacer.invalidate_cache) so
+    find_displayplacer picks it up.
+    """
+    path = os.path.join(directory, "displayplacer")
+    exports = "".join(f"export {key}={shlex.quote(str(value))}\n" for key, value in (env or {}).items())
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\n{exports}exec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _backend() -> SimulatedBackend:
+    env = os.environ
+    return SimulatedBackend.generate(
+        count=int(env.get(ENV_DISPLAYS, "3")),
+        modes=int(env.get(ENV_MODES, "200")),
+        seed=int(env.get(ENV_SEED, "0")),
+        rotated=int(env.get(ENV_ROTATED, "0")),
+        mirrored=int(env.get(ENV_MIRRORED, "0")),
+        na_hz=int(env.get(ENV_NA_HZ, "0")),
+        state_file=env.get(ENV_STATE) or None,
+    )
+
+
+def _apply(argv) -> int:
+    """Apply `id:<id> key:value ...` arguments, dropping ignored settings"""
+    ignored = set(filter(None, os.environ.get(ENV_IGNORE, "").split(",")))
+    commands = [" ".join(part for part in arg.split() if part.split(":", 1)[0] not in ignored)
+                for arg in argv]
+    result = _backend().apply(commands, timeout=float("inf"))
+    if not result.ok:
+        sys.stderr.write(result.stderr + "\n")
+    return result.returncode
+
+
+def _list():
+    sections = _backend().render_sections()
+    delay = float(os.environ.get(ENV_SECTION_DELAY, "0"))
+    for i, section in enumerate(sections):
+        if delay and i < len(sections) - 1:
+            time.sleep(delay)
+        sys.stdout.write(("\n\n" if i else "") + section)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+
+
+def _maybe_hang(operation: str):
+    """Hang forever if FAKE_DISPLAYPLACER_HANG covers ``operation``"""
+    if os.environ.get(ENV_HANG) not in (operation, "all"):
+        return
+    marker = os.environ.get(ENV_HANG_ONCE)
+    if marker:
+        if os.path.exists(marker):
+            return
+        open(marker, "w").close()
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    sys.stdout.write("Persistent screen id: ")  # partial output, like a stuck list
+    sys.stdout.flush()
+    os.fork()  # parent and child both hold stdout/stderr open
+    time.sleep(HANG_SECONDS)
+
+
+def main(argv):
+    if argv[:1] in (["list"], ["--version"], ["--help"]):
+        _maybe_hang("list")
+    else:
+        _maybe_hang("apply")
+    if argv[:1] == ["list"]:
+        _list()
+    elif argv[:1] == ["--version"]:
+        print("displayplacer v1.4.0 (fake)")
+    elif argv[:1] == ["--help"]:
+        print("usage: displayplacer list | displayplacer \"id:<screenId> res:<w>x<h> ...\"")
+    else:
+        return _apply(argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
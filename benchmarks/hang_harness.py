@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Fault-injection harness for displayplacer timeouts.
+
+Runs each displayplacer call site against the fake displayplacer while it
+hangs (ignoring SIGTERM, with a child process holding the output pipes open)
+and checks that the call returns within its timeout, reports failure the
+usual way, and leaves no displayplacer processes behind. Timeouts are
+shortened so the whole run takes a few seconds.
+
+Run: python -m benchmarks.hang_harness
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_displayplacer import (
+    ENV_DISPLAYS, ENV_HANG, ENV_HANG_ONCE, ENV_MODES, ENV_STATE, write_fake_displayplacer,
+)
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.async_display_manager import AsyncDisplayManager
+import core.display_manager as legacy
+import utils.helpers as helpers
+from utils.displayplacer import invalidate_cache
+
+TIMEOUT = 1.0
+# Allowed overrun past the expected duration (process startup, reaping)
+SLACK = 1.5
+
+
+def _stray_fakes() -> list:
+    """Live fake displayplacer processes"""
+    output = subprocess.run(["ps", "-axo", "pid=,stat=,command="],
+                            capture_output=True, text=True).stdout
+    return [line.strip() for line in output.splitlines()
+            if "fake_displayplacer.py" in line and not line.split()[1].startswith("Z")]
+
+
+def _manager(displayplacer: str) -> AdvancedDisplayManager:
+    manager = AdvancedDisplayManager(use_detection_cache=False)
+    manager.DISPLAYPLACER = displayplacer
+    manager.DETECT_TIMEOUT = TIMEOUT
+    manager.DETECT_RETRIES = 0
+    manager.APPLY_TIMEOUT = TIMEOUT
+    return manager
+
+
+def _moved_configs(manager: AdvancedDisplayManager) -> dict:
+    """Configs that move every detected display 100 px right"""
+    configs = {}
+    for display_id, display in manager.displays.items():
+        config = manager._display_config(display)
+        x, y = display.current_position
+        config['position'] = (x + 100, y)
+        configs[display_id] = config
+    return configs
+
+
+def scenario_detect(displayplacer, tmp):
+    os.environ[ENV_HANG] = "list"
+    manager = _manager(displayplacer)
+    return not manager.detect_displays(), TIMEOUT
+
+
+def scenario_detect_retry(displayplacer, tmp):
+    os.environ[ENV_HANG] = "list"
+    os.environ[ENV_HANG_ONCE] = os.path.join(tmp, "detect-hung")
+    manager = _manager(displayplacer)
+    manager.DETECT_RETRIES = 1
+    return len(manager.detect_displays()) == 3, TIMEOUT + 0.5
+
+
+def scenario_iter_displays(displayplacer, tmp):
+    os.environ[ENV_HANG] = "list"
+    manager = _manager(displayplacer)
+    return not list(manager.iter_displays()), TIMEOUT
+
+
+def scenario_apply(displayplacer, tmp):
+    manager = _manager(displayplacer)
+    manager.detect_displays()
+    configs = _moved_configs(manager)
+    os.environ[ENV_HANG] = "apply"
+    ok = manager.apply_display_configs(configs)
+    return not ok and bool(manager.last_apply_report.sent), TIMEOUT
+
+
+def scenario_async_detect(displayplacer, tmp):
+    os.environ[ENV_HANG] = "list"
+    manager = AsyncDisplayManager(_manager(displayplacer))
+    return not asyncio.run(manager.detect()), TIMEOUT
+
+
+def scenario_async_apply(displayplacer, tmp):
+    manager = _manager(displayplacer)
+    manager.detect_displays()
+    configs = _moved_configs(manager)
+    os.environ[ENV_HANG] = "apply"
+    ok = asyncio.run(AsyncDisplayManager(manager).apply(configs))
+    return not ok, TIMEOUT
+
+
+def scenario_backup(displayplacer, tmp):
+    os.environ[ENV_HANG] = "list"
+    os.environ[ENV_HANG_ONCE] = os.path.join(tmp, "backup-hung")
+    helpers.LIST_TIMEOUT = TIMEOUT
+    return bool(helpers.backup_current_layout(os.path.join(tmp, "backups"))), TIMEOUT + 0.5
+
+
+def scenario_legacy_apply(displayplacer, tmp):
+    os.environ[ENV_HANG] = "apply"
+    legacy.DISPLAYPLACER = displayplacer
+    legacy.APPLY_TIMEOUT = TIMEOUT
+    ok = legacy.run_layout([f"id:{legacy.dell_id} origin:(0,0) degree:0"], retries=0)
+    return not ok, TIMEOUT
+
+
+SCENARIOS = [
+    ("detect_displays, hung list", scenario_detect),
+    ("detect_displays, hangs once then retries", scenario_detect_retry),
+    ("iter_displays watchdog", scenario_iter_displays),
+    ("apply_display_configs, hung apply", scenario_apply),
+    ("AsyncDisplayManager.detect, hung list", scenario_async_detect),
+    ("AsyncDisplayManager.apply, hung apply", scenario_async_apply),
+    ("backup_current_layout, hangs once then retries", scenario_backup),
+    ("legacy run_layout, hung apply", scenario_legacy_apply),
+]
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        displayplacer = write_fake_displayplacer(tmp)
+        os.environ["PATH"] = tmp + os.pathsep + os.environ.get("PATH", "")
+        invalidate_cache()
+        os.environ[ENV_DISPLAYS] = "3"
+        os.environ[ENV_MODES] = "50"
+        os.environ.pop(ENV_STATE, None)
+        for label, scenario in SCENARIOS:
+            os.environ.pop(ENV_HANG, None)
+            os.environ.pop(ENV_HANG_ONCE, None)
+            start = time.perf_counter()
+            # Call output (error messages) is expected; keep the report readable
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    ok, expected = scenario(displayplacer, tmp)
+                finally:
+                    sys.stdout = stdout
+            elapsed = time.perf_counter() - start
+            time.sleep(0.2)  # let orphaned children be reaped by init
+            strays = _stray_fakes()
+            passed = ok and elapsed <= expected + SLACK and not strays
+            failures += not passed
+            detail = f"{elapsed:5.2f} s (limit {expected + SLACK:.1f} s)"
+            if not ok:
+                detail += ", wrong result"
+            if strays:
+                detail += f", {len(strays)} stray process(es)"
+            print(f"  {'PASS' if passed else 'FAIL'}  {label:<48} {detail}")
+    if failures:
+        sys.exit(f"{failures} scenario(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Synthetic `displayplacer list` output for benchmarks.
+Produces text in the same shape displayplacer prints on a real Mac, from the
+in-memory simulation in core.backends, so headers always agree with the
+mode tables.
+
+  python -m benchmarks.synthetic --displays 8 --modes 3000 --rotated 1 --mirrored 1 --na-hz 1
+  python -m benchmarks.synthetic --displays 8 --modes 3000 --install ~/.local/bin
+
+The first prints the output; the second installs it as a fake `displayplacer`
+executable that find_displayplacer picks up once the directory is on PATH.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backends import SimulatedBackend, simulated_display_id
+
+synthetic_display_id = simulated_display_id
+
+
+def generate_list_output(displays: int, modes: int, seed: int = 0, rotated: int = 0,
+                         mirrored: int = 0, na_hz: int = 0) -> str:
+    """Generate a full `displayplacer list` dump for ``displays`` screens.
+
+    ``rotated`` external screens are in portrait, ``mirrored`` screens mirror
+    the MacBook panel and ``na_hz`` report "Hertz: N/A"; the output ends with
+    the "Execute the command below" trailer and command line.
+    """
+    return SimulatedBackend.generate(count=displays, modes=modes, seed=seed, rotated=rotated,
+                                     mirrored=mirrored, na_hz=na_hz).render()
+
+
+def main(argv=None):
+    from benchmarks.fake_displayplacer import (
+        ENV_DISPLAYS, ENV_MIRRORED, ENV_MODES, ENV_NA_HZ, ENV_ROTATED, ENV_SEED, ENV_STATE,
+        write_fake_displayplacer,
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--displays", type=int, default=3)
+    parser.add_argument("--modes", type=int, default=200, help="mode lines per display")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rotated", type=int, default=0, help="external displays in portrait")
+    parser.add_argument("--mirrored", type=int, default=0, help="displays mirroring the MacBook panel")
+    parser.add_argument("--na-hz", type=int, default=0, help='displays reporting "Hertz: N/A"')
+    parser.add_argument("--install", metavar="DIR",
+                        help="write a fake `displayplacer` serving this output into DIR")
+    parser.add_argument("--state", metavar="FILE",
+                        help="with --install: remember applies in FILE so `list` reports them")
+    args = parser.parse_args(argv)
+
+    if not args.install:
+        sys.stdout.write(generate_list_output(args.displays, args.modes, args.seed, args.rotated,
+                                              args.mirrored, args.na_hz))
+        return
+
+    os.makedirs(args.install, exist_ok=True)
+    env = {ENV_DISPLAYS: args.displays, ENV_MODES: args.modes, ENV_SEED: args.seed,
+           ENV_ROTATED: args.rotated, ENV_MIRRORED: args.mirrored, ENV_NA_HZ: args.na_hz}
+    if args.state:
+        env[ENV_STATE] = os.path.abspath(args.state)
+    path = write_fake_displayplacer(os.path.abspath(args.install), env)
+    print(f"Installed fake displayplacer at {path}")
+    if shutil.which("displayplacer") != path:
+        print(f'Put it first on PATH:  export PATH="{os.path.dirname(path)}:$PATH"')
+
+
+if __name__ == "__main__":
+    main()
@@ -7,49 +7,109 @@ import json
 import os
 import sys
 from typing import List, Dict
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from version import __version__
-from core.advanced_display_manager import AdvancedDisplayManager
+from core.advanced_display_manager import AdvancedDisplayManager, display_set_fingerprint
+from core.backends import BACKEND_ENV, BACKENDS, create_backend
+from core.daemon import DisplayDaemon, RemoteDisplayManager, SOCKET_PATH
+from core.layout_store import create_layout_store
+from core.layout_transfer import COMPRESSIONS, CONFLICT_POLICIES
+from core.rules import HotplugAutoApplier, RuleEngine
+from core.watcher import DisplayWatcher
 from utils.helpers import (
     validate_displayplacer_installation,
     format_resolution,
     backup_current_layout
 )
+from utils.timings import REGISTRY
 
 
 @click.group()
 @click.version_option(version=__version__)
 @click.option("--debug", is_flag=True, help="Enable debug mode.")
+@click.option("--no-cache", is_flag=True, help="Always run displayplacer instead of using the detection snapshot.")
+@click.option("--backend", type=click.Choice(list(BACKENDS)), default="displayplacer", envvar=BACKEND_ENV,
+              show_default=True, help="Display backend; 'simulated' runs without a Mac (see MONITOR_SIM_*).")
+@click.option("--timings", is_flag=True, help="Print per-phase latency histograms to stderr on exit.")
+@click.option("--timings-json", type=click.File('w'), metavar="FILE",
+              help="Write per-phase latency histograms as JSON to FILE ('-' for stdout) on exit.")
 @click.pass_context
-def cli(ctx, debug):
+def cli(ctx, debug, no_cache, backend, timings, timings_json):
     """Advanced Monitor Layout Manager - Command Line Interface"""
     ctx.ensure_object(dict)
     ctx.obj['debug'] = debug
+    ctx.obj['no_cache'] = no_cache
+    ctx.obj['backend_name'] = backend
+    ctx.obj['timings'] = timings or timings_json is not None
     if debug:
         click.echo(click.style("🐛 Debug mode enabled", fg='yellow'))
+    if ctx.obj['timings']:
+        ctx.call_on_close(lambda: _report_timings(ctx.invoked_subcommand, timings, timings_json))
+
+def _report_timings(command, table, json_file):
+    """Print and/or dump the timing registry collected during this command"""
+    if table:
+        click.echo(REGISTRY.format_table(), err=True)
+    if json_file is not None:
+        json.dump({
+            'version': __version__,
+            'command': command,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'timings': REGISTRY.to_dict(),
+        }, json_file, indent=2)
+        json_file.write("\n")
+
+def _backend():
+    """The display backend chosen with --backend, shared by every manager in this command"""
+    ctx = click.get_current_context()
+    ctx.ensure_object(dict)
+    if 'backend' not in ctx.obj:
+        ctx.obj['backend'] = create_backend(ctx.obj.get('backend_name'))
+    return ctx.obj['backend']
+
+def _new_manager(remote_ok: bool = False, use_detection_cache: bool = True):
+    """Create a display manager honouring the global --no-cache and --backend options.
+
+    With ``remote_ok``, a running display daemon on the same backend is used
+    instead when there is one (detect, list and apply only), unless timings
+    were requested: those are only collected for work done in this process.
+    """
+    ctx = click.get_current_context(silent=True)
+    no_cache = bool(ctx and ctx.obj and ctx.obj.get('no_cache'))
+    timings = bool(ctx and ctx.obj and ctx.obj.get('timings'))
+    backend = _backend()
+    
+    def local():
+        return AdvancedDisplayManager(use_detection_cache=use_detection_cache and not no_cache, backend=backend)
+    
+    if remote_ok and not timings:
+        # Should the daemon stop answering midway, the rest runs in-process
+        remote = RemoteDisplayManager.connect(use_detection_cache=not no_cache, backend=backend.name,
+                                              fallback=local)
+        if remote is not None:
+            return remote
+    return local()
 
 @cli.command()
 @click.option('--detailed', '-d', is_flag=True, help='Show detailed display information')
 @click.option('--json-output', '-j', is_flag=True, help='Output in JSON format')
 def detect(detailed, json_output):
     """Detect and display information about connected monitors"""
-    if not validate_displayplacer_installation():
+    manager = _new_manager(remote_ok=True)
+    if not manager.DISPLAYPLACER:
         click.echo(click.style("Error: displayplacer not found. Please install it first.", fg='red'))
         return
     
-    manager = AdvancedDisplayManager()
-    displays = manager.detect_displays()
-    
-    if not displays:
-        click.echo(click.style("No displays detected.", fg='yellow'))
-        return
-    
     if json_output:
+        displays = manager.detect_displays()
+        if not displays:
+            click.echo(click.style("No displays detected.", fg='yellow'))
+            return
         display_data = {}
         for display_id, display in displays.items():
             display_data[display_id] = {
@@ -64,36 +124,50 @@ def detect(detailed, json_output):
         click.echo(json.dumps(display_data, indent=2))
         return
     
-    click.echo(click.style(f"Found {len(displays)} display(s):", fg='green', bold=True))
+    # Stream: print each display as soon as displayplacer finishes its section
+    count = 0
+    for count, display in enumerate(manager.iter_displays(), 1):
+        if count > 1:
+            click.echo()
+        _echo_display(count, display, detailed)
+    
+    if not count:
+        click.echo(click.style("No displays detected.", fg='yellow'))
+        return
+    
     click.echo()
+    click.echo(click.style(f"Found {count} display(s).", fg='green', bold=True))
+
+def _echo_display(i, display, detailed):
+    """Print one display in the human-readable detect format"""
+    click.echo(f"{i}. {click.style(display.name, fg='cyan', bold=True)}")
+    click.echo(f"   ID: {display.id[:8]}...")
+    click.echo(f"   Type: {display.type.title()}")
+    click.echo(f"   Resolution: {format_resolution(display.resolution)}")
+    click.echo(f"   Position: ({display.current_position[0]}, {display.current_position[1]})")
+    click.echo(f"   Refresh Rate: {display.hz}Hz")
+    click.echo(f"   Scaling: {'On' if display.scaling else 'Off'}")
+    click.echo(f"   Main Display: {'Yes' if display.is_main else 'No'}")
+    click.echo(f"   Enabled: {'Yes' if display.enabled else 'No'}")
     
-    for i, (display_id, display) in enumerate(displays.items(), 1):
-        click.echo(f"{i}. {click.style(display.name, fg='cyan', bold=True)}")
-        click.echo(f"   ID: {display_id[:8]}...")
-        click.echo(f"   Type: {display.type.title()}")
-        click.echo(f"   Resolution: {format_resolution(display.resolution)}")
-        click.echo(f"   Position: ({display.current_position[0]}, {display.current_position[1]})")
-        click.echo(f"   Refresh Rate: {display.hz}Hz")
-        click.echo(f"   Scaling: {'On' if display.scaling else 'Off'}")
-        click.echo(f"   Main Display: {'Yes' if display.is_main else 'No'}")
-        click.echo(f"   Enabled: {'Yes' if display.enabled else 'No'}")
-        
-        if detailed:
-            click.echo(f"   Available Resolutions: {len(display.available_resolutions)} modes")
-            for res in display.available_resolutions[:5]:  # Show first 5
-                click.echo(f"     - {format_resolution(res)}")
-            if len(display.available_resolutions) > 5:
-                click.echo(f"     ... and {len(display.available_resolutions) - 5} more")
-        
-        if i < len(displays):
-            click.echo()
+    if detailed:
+        click.echo(f"   Available Resolutions: {len(display.available_resolutions)} modes")
+        for res in display.available_resolutions[:5]:  # Show first 5
+            click.echo(f"     - {format_resolution(res)}")
+        if len(display.available_resolutions) > 5:
+            click.echo(f"     ... and {len(display.available_resolutions) - 5} more")
+        if display.modes:
+            rates = display.modes.hz_values(display.resolution, display.scaling)
+            click.echo(f"   Modes: {len(display.modes)} "
+                       f"(refresh rates at current resolution: "
+                       f"{', '.join(f'{hz}Hz' for hz in rates) or 'n/a'})")
 
 @cli.command()
 @click.option('--name', '-n', required=True, help='Name for the new layout')
 @click.option('--description', '-d', help='Description for the layout')
 def save(name, description):
     """Save current display configuration as a layout"""
-    manager = AdvancedDisplayManager()
+    manager = _new_manager()
     
     if manager.save_layout(name, description or ""):
         click.echo(click.style(f"✓ Layout '{name}' saved successfully!", fg='green'))
@@ -103,15 +177,41 @@ def save(name, description):
 @cli.command()
 @click.argument('layout_name', required=False)
 @click.option('--interactive', '-i', is_flag=True, help='Interactive layout selection')
-def load(layout_name, interactive):
+@click.option('--force', '-f', is_flag=True, help='Send every setting, even those already in place')
+@click.option('--no-verify', is_flag=True, help='Skip re-detecting afterwards (and rolling back on a mismatch)')
+@click.option('--auto', '-a', is_flag=True,
+              help='Pick the layout saved for the connected displays (a hot-plug rule wins)')
+@click.pass_context
+def load(ctx, layout_name, interactive, force, no_verify, auto):
     """Load and apply a saved layout"""
-    manager = AdvancedDisplayManager()
+    if auto and layout_name:
+        click.echo(click.style("Give a layout name or --auto, not both.", fg='red'))
+        return
+    manager = _new_manager(remote_ok=True)
     layouts = manager.get_layout_names()
     
     if not layouts:
         click.echo(click.style("No saved layouts found.", fg='yellow'))
         return
     
+    if auto:
+        display_ids = list(manager.detect_displays())
+        matches = manager.layouts_for_displays(display_ids)
+        fingerprint = display_set_fingerprint(display_ids)
+        rule = next((rule for rule in RuleEngine.read_rules() if rule.fingerprint == fingerprint), None)
+        if rule and rule.layout in layouts:
+            matches = [rule.layout] + [name for name in matches if name != rule.layout]
+        if not matches:
+            click.echo(click.style(f"No saved layout fits the connected displays ({len(display_ids)}).",
+                                   fg='yellow'))
+            return
+        layouts = matches
+        if not interactive:
+            layout_name = matches[0]
+            if len(matches) > 1:
+                reason = "hot-plug rule" if rule and rule.layout == layout_name else "most recently used"
+                click.echo(f"{len(matches)} layouts fit the connected displays; using '{layout_name}' ({reason}).")
+    
     if interactive or not layout_name:
         click.echo("Available layouts:")
         for i, name in enumerate(layouts, 1):
@@ -139,15 +239,24 @@ def load(layout_name, interactive):
     
     click.echo(f"Applying layout '{layout_name}'...")
     
-    if manager.apply_layout(layout_name):
+    success = manager.apply_layout(layout_name, force=force, verify=not no_verify)
+    if ctx.obj.get('debug'):
+        timings = manager.last_apply_report.timings
+        click.echo("Timings: " + ", ".join(f"{phase} {seconds * 1000:.0f} ms"
+                                           for phase, seconds in timings.items()))
+    
+    if success:
         click.echo(click.style(f"✓ Layout '{layout_name}' applied successfully!", fg='green'))
+    elif manager.last_apply_report.rolled_back:
+        click.echo(click.style(f"✗ Layout '{layout_name}' did not take effect; previous arrangement restored",
+                               fg='red'))
     else:
         click.echo(click.style(f"✗ Failed to apply layout '{layout_name}'", fg='red'))
 
 @cli.command()
 def list_layouts():
     """List all saved layouts"""
-    manager = AdvancedDisplayManager()
+    manager = _new_manager(remote_ok=True)
     layouts = manager.get_layout_names()
     
     if not layouts:
@@ -176,7 +285,7 @@ def list_layouts():
 @click.confirmation_option(prompt='Are you sure you want to delete this layout?')
 def delete(layout_name):
     """Delete a saved layout"""
-    manager = AdvancedDisplayManager()
+    manager = _new_manager()
     
     if manager.delete_layout(layout_name):
         click.echo(click.style(f"✓ Layout '{layout_name}' deleted.", fg='green'))
@@ -184,11 +293,71 @@ def delete(layout_name):
         click.echo(click.style(f"✗ Layout '{layout_name}' not found.", fg='red'))
 
 @cli.command()
-@click.option('--output', '-o', help='Output file path')
-def export(output):
-    """Export all layouts to a file"""
-    manager = AdvancedDisplayManager()
-    layouts = manager.get_layout_names()
+@click.option('--days', type=int, default=None,
+              help='Archive layouts not used for this many days (default: $MONITOR_ARCHIVE_AFTER_DAYS, else 90)')
+@click.option('--dry-run', is_flag=True, help='Only list the layouts that would be archived')
+def archive(days, dry_run):
+    """Move layouts that have not been used for a while to the compressed archive"""
+    manager = _new_manager()
+    names = manager.archive_stale_layouts(days, dry_run=dry_run)
+    if not names:
+        click.echo(click.style("No layouts to archive.", fg='yellow'))
+        return
+    verb = "Would archive" if dry_run else "✓ Archived"
+    click.echo(click.style(f"{verb} {len(names)} layout(s):", fg='blue' if dry_run else 'green'))
+    for name in names:
+        click.echo(f"  - {name}")
+
+@cli.command()
+@click.argument('layout_name', required=False)
+def unarchive(layout_name):
+    """Restore an archived layout (without a name, list the archive)"""
+    manager = _new_manager()
+    if layout_name is None:
+        names = manager.get_archived_layout_names()
+        if not names:
+            click.echo(click.style("No archived layouts.", fg='yellow'))
+        for name in names:
+            click.echo(f"• {name}")
+        return
+    if manager.restore_archived_layout(layout_name):
+        click.echo(click.style(f"✓ Layout '{layout_name}' restored.", fg='green'))
+    else:
+        click.echo(click.style(f"✗ Could not restore '{layout_name}'.", fg='red'))
+
+def _timestamp_option(value: str) -> str:
+    """An ISO date/time, or "30d" for 30 days ago, as an ISO timestamp ("" if not valid)"""
+    try:
+        if value.endswith('d') and value[:-1].isdigit():
+            return (datetime.now() - timedelta(days=int(value[:-1]))).isoformat()
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        return ""
+
+@cli.command()
+@click.option('--output', '-o', help='Output file path (.gz, .bz2 or .xz compresses)')
+@click.option('--name', 'patterns', multiple=True, help='Only layouts whose name matches this glob (repeatable)')
+@click.option('--displays', help='Only layouts for exactly these displays: comma-separated ids, or "connected"')
+@click.option('--used-since', help='Only layouts last used since DATE, or in the last N days ("30d")')
+@click.option('--used-until', help='Only layouts last used before DATE, or more than N days ago ("30d")')
+@click.option('--compress', type=click.Choice(list(COMPRESSIONS)),
+              help='Compress the output (default: from the output file extension)')
+def export(output, patterns, displays, used_since, used_until, compress):
+    """Export layouts (all, or those matching every filter) to a file"""
+    manager = _new_manager()
+    window = {}
+    for option, value in (('used_since', used_since), ('used_until', used_until)):
+        if value:
+            window[option] = _timestamp_option(value)
+            if not window[option]:
+                click.echo(click.style(f"Not a date or a number of days: {value}", fg='red'))
+                return
+    display_ids = None
+    if displays == 'connected':
+        display_ids = list(manager.detect_displays())
+    elif displays:
+        display_ids = [display_id.strip() for display_id in displays.split(',') if display_id.strip()]
+    layouts = manager.select_layouts(patterns, display_ids, **window)
     
     if not layouts:
         click.echo(click.style("No layouts to export.", fg='yellow'))
@@ -196,59 +365,46 @@ def export(output):
     
     if not output:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output = f"monitor_layouts_export_{timestamp}.json"
+        output = f"monitor_layouts_export_{timestamp}.json" + (COMPRESSIONS[compress][0] if compress else "")
     
-    try:
-        from dataclasses import asdict
-        
-        export_data = {}
-        for name in layouts:
-            layout = manager.get_layout(name)
-            export_data[name] = asdict(layout)
-        
-        with open(output, 'w') as f:
-            json.dump(export_data, f, indent=2)
-        
+    if manager.export_layouts(output, layouts, compression=compress):
         click.echo(click.style(f"✓ {len(layouts)} layout(s) exported to {output}", fg='green'))
-    except Exception as e:
-        click.echo(click.style(f"✗ Export failed: {e}", fg='red'))
+    else:
+        click.echo(click.style("✗ Export failed", fg='red'))
 
 @cli.command()
 @click.argument('input_file')
-@click.option('--merge', '-m', is_flag=True, help='Merge with existing layouts instead of replacing')
-def import_layouts(input_file, merge):
-    """Import layouts from a file"""
+@click.option('--on-conflict', type=click.Choice(CONFLICT_POLICIES), default='overwrite', show_default=True,
+              help='For names already saved: keep the saved layout, replace it, import under a new name, '
+                   'or keep whichever was used (or saved) last')
+@click.option('--merge', '-m', is_flag=True, hidden=True, help='Same as --on-conflict=skip')
+@click.option('--dry-run', is_flag=True, help='Validate and report without saving anything')
+def import_layouts(input_file, on_conflict, merge, dry_run):
+    """Import layouts from a file (gzip, bz2 or xz compressed files too)"""
     if not os.path.exists(input_file):
         click.echo(click.style(f"File not found: {input_file}", fg='red'))
         return
     
-    try:
-        with open(input_file, 'r') as f:
-            import_data = json.load(f)
-        
-        manager = AdvancedDisplayManager()
-        
-        if not merge:
-            # Backup existing layouts first
-            backup_file = backup_current_layout()
-            if backup_file:
-                click.echo(f"Existing layouts backed up to: {backup_file}")
-        
-        imported_count = 0
-        for name, layout_data in import_data.items():
-            if merge and name in manager.layouts:
-                if not click.confirm(f"Layout '{name}' already exists. Overwrite?"):
-                    continue
-            
-            layout = manager.LayoutProfile(**layout_data)
-            manager.layouts[name] = layout
-            imported_count += 1
-        
-        manager.save_layouts()
-        click.echo(click.style(f"✓ {imported_count} layout(s) imported from {input_file}", fg='green'))
-        
-    except Exception as e:
-        click.echo(click.style(f"✗ Import failed: {e}", fg='red'))
+    manager = _new_manager()
+    result = manager.import_layouts(input_file, on_conflict='skip' if merge else on_conflict, dry_run=dry_run)
+    
+    for error in result.errors:
+        click.echo(click.style(f"  ✗ {error}", fg='red'))
+    if result.error_count > len(result.errors):
+        click.echo(click.style(f"  ... and {result.error_count - len(result.errors)} more problem(s)", fg='red'))
+    if result.fatal:
+        click.echo(click.style(f"✗ Import failed: {result.fatal}", fg='red'))
+        return
+    
+    for original, saved_as in result.renamed:
+        click.echo(f"  '{original}' imported as '{saved_as}'")
+    if result.skipped:
+        click.echo(click.style(f"  {len(result.skipped)} layout(s) kept as saved: {', '.join(result.skipped[:10])}"
+                               + (", ..." if len(result.skipped) > 10 else ""), fg='yellow'))
+    if result.rejected:
+        click.echo(click.style(f"  {len(result.rejected)} invalid layout(s) left out", fg='yellow'))
+    verb = "would be imported" if dry_run else "imported"
+    click.echo(click.style(f"✓ {len(result.imported)} layout(s) {verb} from {input_file}", fg='green'))
 
 @cli.command()
 def backup():
@@ -269,7 +425,7 @@ def gui():
         print_banner()
         click.echo("Launching GUI...")
         
-        app = AdvancedMonitorLayoutManager()
+        app = AdvancedMonitorLayoutManager(backend=_backend())
         app.run()
         
     except ImportError:
@@ -277,6 +433,122 @@ def gui():
     except Exception as e:
         click.echo(click.style(f"Error launching GUI: {e}", fg='red'))
 
+@cli.command()
+@click.option('--socket', 'socket_path', default=SOCKET_PATH, show_default=True,
+              help='Unix socket to listen on')
+def daemon(socket_path):
+    """Run the display daemon that keeps detection and layouts warm"""
+    if RemoteDisplayManager.connect(socket_path=socket_path):
+        click.echo(click.style(f"A daemon is already listening on {socket_path}", fg='yellow'))
+        return
+    
+    import signal
+    server = DisplayDaemon(socket_path, backend=_backend())
+    # Turn SIGTERM (launchd, kill) into a clean shutdown that removes the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    click.echo(click.style(f"Display daemon listening on {socket_path}", fg='green'))
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        click.echo("Display daemon stopped.")
+
+@cli.command()
+@click.option('--min-interval', default=1.0, show_default=True, type=float,
+              help='Seconds between polls right after a change')
+@click.option('--max-interval', default=30.0, show_default=True, type=float,
+              help='Longest wait between polls while nothing changes')
+@click.option('--settle', default=3.0, show_default=True, type=float,
+              help='Seconds the topology must stay stable before a change is reported')
+@click.option('--auto-apply', is_flag=True,
+              help='Apply the layout matching the connected displays after each hot-plug')
+@click.option('--stats', is_flag=True, help='Print poll and detection counts to stderr on exit')
+def watch(min_interval, max_interval, settle, auto_apply, stats):
+    """Watch for display changes and print one JSON line per change"""
+    manager = _new_manager(use_detection_cache=False)
+    if not manager.DISPLAYPLACER:
+        click.echo(click.style("Error: displayplacer not found. Please install it first.", fg='red'), err=True)
+        sys.exit(1)
+    
+    watcher = DisplayWatcher(manager, min_interval=min_interval,
+                             max_interval=max_interval, settle=settle)
+    applier = HotplugAutoApplier(RuleEngine(manager)) if auto_apply else None
+    try:
+        for event in watcher.events():
+            click.echo(json.dumps(event))
+            if applier:
+                result = applier.handle_event(event)
+                if result:
+                    click.echo(json.dumps(result))
+                if result and result['event'] == 'layout_applied':
+                    watcher.resync()
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stats:
+            click.echo(f"polls={watcher.polls} detections={watcher.detections} "
+                       f"events={watcher.events_emitted}", err=True)
+
+@cli.command()
+@click.argument('layout_name')
+@click.option('--display', 'display_ids', multiple=True,
+              help='Persistent screen id to match (repeatable; default: connected displays)')
+def add_rule(layout_name, display_ids):
+    """Apply a layout automatically whenever this set of displays is connected"""
+    manager = _new_manager()
+    if layout_name not in manager.layouts:
+        click.echo(click.style(f"Layout '{layout_name}' not found.", fg='red'))
+        return
+    if not display_ids:
+        display_ids = list(manager.detect_displays())
+        if not display_ids:
+            click.echo(click.style("No displays detected.", fg='yellow'))
+            return
+    
+    rule = RuleEngine(manager).add_rule(layout_name, display_ids)
+    click.echo(click.style(f"✓ '{layout_name}' will be applied when these "
+                           f"{len(rule.displays)} display(s) are connected:", fg='green'))
+    for display_id in rule.displays:
+        click.echo(f"  - {display_id}")
+
+@cli.command()
+@click.argument('layout_name')
+def remove_rule(layout_name):
+    """Remove the hot-plug rules that apply a layout"""
+    removed = RuleEngine(_new_manager()).remove_rules(layout_name)
+    if removed:
+        click.echo(click.style(f"✓ Removed {removed} rule(s) for '{layout_name}'.", fg='green'))
+    else:
+        click.echo(click.style(f"No rules apply '{layout_name}'.", fg='yellow'))
+
+@cli.command()
+def list_rules():
+    """List which layout is applied for each set of displays"""
+    manager = _new_manager()
+    engine = RuleEngine(manager)
+    table = engine.table()
+    explicit = {rule.fingerprint for rule in engine.rules}
+    
+    if not table and not engine.ambiguous:
+        click.echo(click.style("No hot-plug rules. Save a layout or use add-rule.", fg='yellow'))
+        return
+    
+    click.echo(click.style(f"Hot-plug rules ({len(table)}):", fg='blue', bold=True))
+    click.echo()
+    for fingerprint, layout_name in table.items():
+        source = "rule" if fingerprint in explicit else "saved layout"
+        click.echo(f"• {click.style(layout_name, fg='cyan', bold=True)} ({source})")
+        for display_id in fingerprint.split(","):
+            click.echo(f"  - {display_id}")
+    for fingerprint, names in engine.ambiguous.items():
+        click.echo(click.style(f"• Several layouts share one display set, add a rule to pick one: "
+                               f"{', '.join(names)}", fg='yellow'))
+        for display_id in fingerprint.split(","):
+            click.echo(f"  - {display_id}")
+
 @cli.command()
 def doctor():
     """Diagnose potential issues with the setup"""
@@ -296,20 +568,32 @@ def doctor():
     
     # Check permissions
     click.echo("2. Checking file permissions...")
-    layouts_file = os.path.expanduser("~/.monitor_layouts.json")
-    if os.path.exists(layouts_file):
-        if os.access(layouts_file, os.R_OK | os.W_OK):
-            click.echo(click.style("   ✓ Layouts file accessible", fg='green'))
-        else:
-            click.echo(click.style("   ✗ Layouts file permission issues", fg='red'))
-            issues_found += 1
+    try:
+        store = create_layout_store(AdvancedDisplayManager.LAYOUTS_FILE)
+    except ValueError as e:
+        click.echo(click.style(f"   ✗ {e}", fg='red'))
+        issues_found += 1
     else:
-        click.echo(click.style("   ℹ No layouts file found (will be created)", fg='yellow'))
+        # The JSON store may have only a journal until its first compaction
+        files = [path for path in store.files() if os.path.exists(path)]
+        for path in files:
+            if os.access(path, os.R_OK | os.W_OK):
+                click.echo(click.style(f"   ✓ {path} accessible", fg='green'))
+            else:
+                click.echo(click.style(f"   ✗ {path} is not readable and writable", fg='red'))
+                issues_found += 1
+        if not files:
+            click.echo(click.style("   ℹ No layouts saved yet (files will be created)", fg='yellow'))
+        directory = os.path.dirname(store.path) or "."
+        if not os.access(directory, os.W_OK):
+            # Snapshots are written next to the store and renamed into place
+            click.echo(click.style(f"   ✗ {directory} is not writable", fg='red'))
+            issues_found += 1
     
     # Check display detection
     click.echo("3. Testing display detection...")
     try:
-        manager = AdvancedDisplayManager()
+        manager = _new_manager(use_detection_cache=False)
         displays = manager.detect_displays()
         if displays:
             click.echo(click.style(f"   ✓ {len(displays)} display(s) detected", fg='green'))
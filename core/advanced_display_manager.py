@@ -3,14 +3,27 @@ Advanced Display Manager
 Enhanced display management with dynamic detection and layout persistence.
 """
 
-import subprocess
-import json
 import os
-from typing import Dict, List, Optional, Tuple
-import re
-from dataclasses import dataclass, asdict
+import hashlib
+import threading
+import time
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from fnmatch import fnmatchcase
+from dataclasses import dataclass, asdict, field
 
-from utils.displayplacer import find_displayplacer
+from core.backends import DisplayBackend, DisplayplacerBackend
+from core.detection_cache import DetectionCache
+from core.layout_store import (
+    LayoutArchive, create_layout_store, display_config_hash, display_set_fingerprint, last_activity,
+)
+from core.layout_transfer import (
+    ImportResult, iter_layout_records, open_layout_file, unique_name, write_layout_file,
+)
+from core.mode_table import DisplayModeTable
+from utils.subprocess_runner import APPLY_TIMEOUT, LIST_TIMEOUT
+from utils.timings import observe, timed
 
 @dataclass
 class Display:
@@ -27,6 +40,22 @@ class Display:
     color_depth: int
     enabled: bool
     is_main: bool
+    modes: DisplayModeTable = field(default_factory=DisplayModeTable, repr=False, compare=False)
+
+def display_to_dict(display: Display) -> Dict:
+    """JSON-safe dict for a Display, including its mode table"""
+    data = {k: v for k, v in display.__dict__.items() if k != 'modes'}
+    data['modes'] = display.modes.to_mode_lines()
+    return data
+
+def display_from_dict(data: Dict) -> Display:
+    """Inverse of display_to_dict"""
+    data = dict(data)
+    modes = DisplayModeTable.from_mode_lines([data.pop('modes', "")])
+    data['resolution'] = tuple(data['resolution'])
+    data['current_position'] = tuple(data['current_position'])
+    data['available_resolutions'] = [tuple(r) for r in data['available_resolutions']]
+    return Display(modes=modes, **data)
 
 @dataclass
 class LayoutProfile:
@@ -37,167 +66,833 @@ class LayoutProfile:
     created_at: str
     last_used: str = ""
 
+class LazyLayouts(MutableMapping):
+    """Saved layouts by name, read from a layout store only when needed.
+
+    The first access lists the names; a layout is turned into a LayoutProfile
+    when it is looked up. Every access first checks that the store has not
+    been changed by another process (a couple of stat() calls) and starts
+    over if it has. Assignments and deletions are kept as pending changes
+    until ``AdvancedDisplayManager.save_layouts`` writes them, and survive
+    such a reload.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._generation: Optional[int] = None
+        self._names: Optional[Dict[str, None]] = None  # insertion-ordered name index
+        self._profiles: Dict[str, LayoutProfile] = {}
+        self._pending: Dict[str, Optional[LayoutProfile]] = {}  # name -> profile, or None to delete
+
+    def _index(self) -> Dict[str, None]:
+        try:
+            self._store.refresh()
+        except Exception as e:
+            print(f"Error loading layouts: {e}")
+        if self._store.generation != self._generation:
+            self._names = None
+        if self._names is None:
+            self._generation = self._store.generation
+            self._profiles = {}
+            try:
+                self._names = dict.fromkeys(self._store.names())
+            except Exception as e:
+                print(f"Error loading layouts: {e}")
+                self._names = {}
+            for name, profile in self._pending.items():
+                if profile is None:
+                    self._names.pop(name, None)
+                else:
+                    self._names[name] = None
+                    self._profiles[name] = profile
+        return self._names
+
+    def __getitem__(self, name: str) -> LayoutProfile:
+        if name not in self._index():
+            raise KeyError(name)
+        profile = self._profiles.get(name)
+        if profile is None:
+            try:
+                profile = LayoutProfile(**self._store.get(name))
+            except Exception as e:
+                print(f"Error loading layout '{name}': {e}")
+                raise KeyError(name) from e
+            self._profiles[name] = profile
+        return profile
+
+    def __setitem__(self, name: str, profile: LayoutProfile):
+        self._index()[name] = None
+        self._profiles[name] = profile
+        self._pending[name] = profile
+
+    def __delitem__(self, name: str):
+        del self._index()[name]
+        self._profiles.pop(name, None)
+        self._pending[name] = None
+
+    def __contains__(self, name) -> bool:
+        return name in self._index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._index()))
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def items(self):
+        self._load_all()
+        return super().items()
+
+    def values(self):
+        self._load_all()
+        return super().values()
+
+    def _load_all(self):
+        """Read every remaining layout in one pass instead of one lookup each"""
+        index = self._index()
+        if len(index) - len(self._profiles) < 2:
+            return
+        try:
+            layouts = self._store.get_all()
+        except Exception as e:
+            print(f"Error loading layouts: {e}")
+            return
+        for name, data in layouts.items():
+            if name in index and name not in self._profiles:
+                try:
+                    self._profiles[name] = LayoutProfile(**data)
+                except TypeError as e:
+                    print(f"Error loading layout '{name}': {e}")
+
+    def pending(self) -> Dict[str, Optional[LayoutProfile]]:
+        """Unsaved changes: name -> new profile, or None for a deletion"""
+        return dict(self._pending)
+
+    def mark_saved(self, changes: Dict[str, Optional[LayoutProfile]]):
+        for name, profile in changes.items():
+            if self._pending.get(name, profile) is profile:
+                self._pending.pop(name, None)
+
+    def reload(self):
+        """Forget everything read so far; the next access goes back to the store"""
+        self._names = None
+        self._profiles.clear()
+
+@dataclass
+class DisplayDiff:
+    """Display IDs that changed between two detections"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+@dataclass
+class ApplyReport:
+    """What an apply sent to displayplacer and what it left alone"""
+    sent: Dict[str, str] = field(default_factory=dict)  # display ID -> displayplacer argument
+    skipped: Dict[str, List[str]] = field(default_factory=dict)  # display ID -> settings already in place
+    missing: List[str] = field(default_factory=list)  # in the config but not connected/enabled
+    mismatches: Dict[str, List[str]] = field(default_factory=dict)  # display ID -> settings not taken
+    rolled_back: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)  # phase -> seconds
+
+    @property
+    def noop(self) -> bool:
+        return not self.sent
+
+
+_SECTION_START = "Persistent screen id:"
+_TRAILER_LINE = "Execute the command below"
+
+
+def split_display_sections(output: str) -> Iterator[str]:
+    """Yield the text of each display section in `displayplacer list` output.
+
+    Sections run from one "Persistent screen id:" line to the next. The
+    trailing "Execute the command below..." block is cut off the last one, since
+    it repeats every display's settings and would make that section look changed
+    whenever any display changes.
+    """
+    marker = "\n" + _SECTION_START
+    if output.startswith(_SECTION_START):
+        start = 0
+    else:
+        start = output.find(marker)
+        if start == -1:
+            return
+        start += 1
+    while True:
+        next_start = output.find(marker, start)
+        if next_start == -1:
+            trailer = output.find("\n" + _TRAILER_LINE, start)
+            yield output[start:trailer if trailer != -1 else len(output)]
+            return
+        yield output[start:next_start]
+        start = next_start + 1
+
+
+class DisplayListParser:
+    """Single-pass, line-at-a-time state machine for `displayplacer list` output.
+
+    Feed lines in order; ``feed`` returns the previous Display whenever a new
+    "Persistent screen id:" line starts the next section, and ``close`` returns
+    the last one. Mode lines are only collected while streaming and are turned
+    into a DisplayModeTable in one pass when the section closes.
+    """
+
+    def __init__(self):
+        self._start_section("")
+
+    def _start_section(self, display_id: str):
+        self.display_id = display_id
+        self.name = ""
+        self.display_type = "external"
+        self.resolution = (1920, 1080)
+        self.position = (0, 0)
+        self.rotation = 0
+        self.scaling = False
+        self.hz = 60
+        self.color_depth = 8
+        self.enabled = True
+        self.is_main = False
+        self.mode_lines: List[str] = []
+
+    def feed(self, line: str) -> Optional[Display]:
+        """Consume one line; return a completed Display if this line closed one."""
+        line = line.strip()
+        if not line:
+            return None
+
+        # Mode lines make up the bulk of the output, so test for them first
+        if line.startswith("mode "):
+            self.mode_lines.append(line)
+            return None
+
+        key, sep, value = line.partition(": ")
+        if not sep:
+            return None
+
+        if key == "Persistent screen id":
+            display = self.close()
+            self._start_section(value)
+            return display
+
+        handler = self._FIELD_HANDLERS.get(key)
+        if handler:
+            handler(self, line, value)
+        return None
+
+    def close(self) -> Optional[Display]:
+        """Finish the current section and return its Display, if it had an id."""
+        if not self.display_id:
+            return None
+        modes = DisplayModeTable.from_mode_lines(self.mode_lines)
+        display = Display(
+            id=self.display_id,
+            name=self.name,
+            type=self.display_type,
+            resolution=self.resolution,
+            available_resolutions=modes.resolutions() or [self.resolution],
+            current_position=self.position,
+            rotation=self.rotation,
+            scaling=self.scaling,
+            hz=self.hz,
+            color_depth=self.color_depth,
+            enabled=self.enabled,
+            is_main=self.is_main,
+            modes=modes
+        )
+        self._start_section("")
+        return display
+
+    def _parse_type(self, line: str, value: str):
+        if "MacBook" in value:
+            self.display_type = "macbook"
+            self.name = "MacBook Display"
+        elif "inch external" in value:
+            self.name = f"External Display ({line.split()[1]} inch)"
+        else:
+            self.name = "External Display"
+
+    def _parse_resolution(self, line: str, value: str):
+        w, h = value.split("x")
+        self.resolution = (int(w), int(h))
+
+    def _parse_origin(self, line: str, value: str):
+        # Parse (x,y) format, handle main display indicator
+        coords = value.split(" - ")[0].strip("()")
+        x, y = coords.split(",")
+        self.position = (int(x), int(y))
+        self.is_main = "main display" in value
+
+    def _parse_rotation(self, line: str, value: str):
+        self.rotation = int(value.split()[0])
+
+    def _parse_scaling(self, line: str, value: str):
+        self.scaling = "on" in value
+
+    def _parse_hertz(self, line: str, value: str):
+        if value != "N/A":
+            self.hz = int(value)
+
+    def _parse_color_depth(self, line: str, value: str):
+        self.color_depth = int(value)
+
+    def _parse_enabled(self, line: str, value: str):
+        self.enabled = "true" in value
+
+    _FIELD_HANDLERS = {
+        "Type": _parse_type,
+        "Resolution": _parse_resolution,
+        "Origin": _parse_origin,
+        "Rotation": _parse_rotation,
+        "Scaling": _parse_scaling,
+        "Hertz": _parse_hertz,
+        "Color Depth": _parse_color_depth,
+        "Enabled": _parse_enabled,
+    }
+
+
+class DetectionStream:
+    """Turns `displayplacer list` output, fed line by line, into Displays.
+
+    Shared by the blocking and asyncio streaming detections. ``feed`` returns
+    a Display whenever a line completes one, ``finished`` is set once the
+    trailer is reached, and ``close`` flushes the last section. Unchanged
+    sections reuse the manager's cached Display objects.
+    """
+
+    def __init__(self, manager: "AdvancedDisplayManager"):
+        self.manager = manager
+        self.displays: Dict[str, Display] = {}
+        self.cache: Dict[bytes, Display] = {}
+        self.digests: Dict[str, bytes] = {}
+        self.finished = False
+        self._parser = DisplayListParser()
+        self._section: List[str] = []
+
+    def feed(self, line: str) -> Optional[Display]:
+        line = line.rstrip('\n')
+        display = None
+        if line.startswith(_SECTION_START) or line.startswith(_TRAILER_LINE):
+            display = self.close()
+            if not line.startswith(_SECTION_START):
+                self.finished = True  # trailer: nothing after it describes a display
+                return display
+        if self._section or line.startswith(_SECTION_START):
+            self._section.append(line)
+        return display
+
+    def close(self) -> Optional[Display]:
+        if not self._section:
+            return None
+        display = self.manager._parse_section("\n".join(self._section), self._parser,
+                                              self.cache, self.digests)
+        self._section = []
+        if display:
+            self.displays[display.id] = display
+        return display
+
+
+class PhaseTimer:
+    """Call with a phase name to record the seconds since the previous call.
+
+    Phases also go to the utils.timings registry as ``<prefix>.<phase>``.
+    """
+
+    def __init__(self, timings: Dict[str, float], prefix: str = "switch"):
+        self.timings = timings
+        self.prefix = prefix
+        self._start = time.perf_counter()
+
+    def __call__(self, phase: str):
+        now = time.perf_counter()
+        self.timings[phase] = now - self._start
+        observe(f"{self.prefix}.{phase}", now - self._start)
+        self._start = now
+
+
 class AdvancedDisplayManager:
     """Advanced display manager with dynamic detection and layout persistence"""
 
     LAYOUTS_FILE = os.path.expanduser("~/.monitor_layouts.json")
+    # Layouts unused for this many days are moved to the archive by `cli archive`
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("MONITOR_ARCHIVE_AFTER_DAYS", "90"))
+    DETECTION_CACHE_TTL = 10.0  # seconds a detection snapshot is served from disk
+    DETECT_TIMEOUT = LIST_TIMEOUT  # seconds before a hung `displayplacer list` is killed
+    DETECT_RETRIES = 1
+    APPLY_TIMEOUT = APPLY_TIMEOUT
+    VERIFY_TIMEOUT = 5.0  # seconds to wait for an apply to show up in detection
+    VERIFY_INTERVAL = 0.25
 
-    def __init__(self):
-        self.DISPLAYPLACER = find_displayplacer()
+    def __init__(self, use_detection_cache: bool = True, backend: Optional[DisplayBackend] = None):
+        self.backend: DisplayBackend = backend or DisplayplacerBackend()
+        self.use_detection_cache = use_detection_cache
+        self.detection_cache = DetectionCache(ttl=self.DETECTION_CACHE_TTL)
         self.displays: Dict[str, Display] = {}
-        self.layouts: Dict[str, LayoutProfile] = {}
-        self.load_layouts()
+        self.layout_store = create_layout_store(self.LAYOUTS_FILE)
+        self.layout_archive = LayoutArchive(os.path.splitext(self.LAYOUTS_FILE)[0] + ".archive.json.gz")
+        self.layouts = LazyLayouts(self.layout_store)
+        # Section content hash -> parsed Display, and display ID -> hash, from
+        # the last detection; unchanged sections reuse their Display object
+        self._section_cache: Dict[bytes, Display] = {}
+        self._section_digests: Dict[str, bytes] = {}
+        self.last_diff = DisplayDiff()
+        self.last_apply_report = ApplyReport()
+        # Held while a detection replaces displays, the section cache and
+        # last_diff, so a caller on another thread (the GUI) sees them change together
+        self._state_lock = threading.RLock()
     
-    def detect_displays(self) -> Dict[str, Display]:
-        """Detect all connected displays and their properties"""
+    @property
+    def DISPLAYPLACER(self) -> Optional[str]:
+        """The backend's executable (or label), None if it is unavailable"""
+        return self.backend.path
+    
+    @DISPLAYPLACER.setter
+    def DISPLAYPLACER(self, path: Optional[str]):
+        self.backend = DisplayplacerBackend(path)
+    
+    def detect_displays(self, use_cache: Optional[bool] = None) -> Dict[str, Display]:
+        """Detect all connected displays and their properties.
+
+        A fresh on-disk snapshot (same topology fingerprint, within the TTL) is
+        served instead of running displayplacer unless caching is disabled for
+        this manager or ``use_cache`` is False.
+        """
+        use_cache = self.use_detection_cache if use_cache is None else use_cache
+        fingerprint = self.backend.fingerprint()
+        if use_cache and self._load_detection_snapshot(fingerprint):
+            return self.displays
         if not self.DISPLAYPLACER:
             print("Error: displayplacer not found. Install with: brew install jakehilborn/jakehilborn/displayplacer")
             return {}
-        try:
-            output = subprocess.check_output([self.DISPLAYPLACER, "list"], text=True)
-            self.displays = self._parse_display_output(output)
-            return self.displays
-        except subprocess.CalledProcessError as e:
-            print(f"Error detecting displays: {e}")
+        result = self.backend.list(self.DETECT_TIMEOUT, retries=self.DETECT_RETRIES)
+        if not result.ok:
+            print(f"Error detecting displays: {result.describe()}")
             return {}
+        return self._adopt_list_output(result.stdout, fingerprint)
+    
+    def _adopt_list_output(self, output: str, fingerprint: str) -> Dict[str, Display]:
+        """Make parsed `displayplacer list` output the current detection"""
+        with self._state_lock:
+            previous = self._section_digests
+            with timed("parse"):
+                self.displays = self._parse_display_output(output)
+            self.last_diff = self._diff_sections(previous, self._section_digests)
+            self._save_detection_snapshot(fingerprint)
+            return self.displays
+    
+    def _adopt_stream(self, stream: "DetectionStream", fingerprint: str):
+        """Make a completed DetectionStream the current detection"""
+        with self._state_lock:
+            previous = self._section_digests
+            self._section_cache = stream.cache
+            self._section_digests = stream.digests
+            self.displays = stream.displays
+            self.last_diff = self._diff_sections(previous, stream.digests)
+            self._save_detection_snapshot(fingerprint)
+    
+    def _load_detection_snapshot(self, fingerprint: str) -> bool:
+        """Adopt the on-disk snapshot as the current detection, if it is fresh"""
+        snapshot = self.detection_cache.load(fingerprint)
+        if snapshot is None:
+            return False
+        display_data, digest_hex = snapshot
+        try:
+            displays = {display_id: display_from_dict(data) for display_id, data in display_data.items()}
+            digests = {display_id: bytes.fromhex(digest) for display_id, digest in digest_hex.items()}
+        except (KeyError, TypeError, ValueError):
+            return False
+        with self._state_lock:
+            previous = self._section_digests
+            self.displays = displays
+            self._section_digests = digests
+            self._section_cache = {digests[display_id]: display for display_id, display in displays.items()}
+            self.last_diff = self._diff_sections(previous, digests)
+        return True
+    
+    def _save_detection_snapshot(self, fingerprint: str):
+        if not self.use_detection_cache:
+            return
+        self.detection_cache.save(
+            fingerprint,
+            {display_id: display_to_dict(display) for display_id, display in self.displays.items()},
+            {display_id: digest.hex() for display_id, digest in self._section_digests.items()},
+        )
+    
+    def detect_display_changes(self) -> DisplayDiff:
+        """Re-detect displays and return which ones were added, removed or changed"""
+        self.detect_displays()
+        return self.last_diff
+    
+    def invalidate_detection_cache(self):
+        """Forget parsed sections so the next detection rebuilds every Display.
+
+        Call this after mutating Display objects returned by detect_displays,
+        otherwise unchanged sections would hand the edited objects back.
+        """
+        with self._state_lock:
+            self._section_cache = {}
+            self._section_digests = {}
+    
+    def detection_state(self) -> Tuple[Dict[str, Display], DisplayDiff]:
+        """``displays`` and ``last_diff`` from the same detection, safe to call from another thread"""
+        with self._state_lock:
+            return self.displays, self.last_diff
+    
+    @staticmethod
+    def _diff_sections(previous: Dict[str, bytes], current: Dict[str, bytes]) -> DisplayDiff:
+        return DisplayDiff(
+            added=[display_id for display_id in current if display_id not in previous],
+            removed=[display_id for display_id in previous if display_id not in current],
+            changed=[display_id for display_id, digest in current.items()
+                     if display_id in previous and previous[display_id] != digest],
+        )
     
     def _parse_display_output(self, output: str) -> Dict[str, Display]:
-        """Parse displayplacer list output into Display objects"""
+        """Parse displayplacer list output into Display objects.
+
+        Each section is hashed first; sections whose content is unchanged since
+        the last detection reuse their Display and skip parsing altogether.
+        """
         displays = {}
-        
-        # Split output into sections for each display
-        sections = re.split(r'\n(?=Persistent screen id:)', output.strip())
-        
-        for section in sections:
-            if not section.strip():
-                continue
-                
-            display = self._parse_display_section(section)
+        cache: Dict[bytes, Display] = {}
+        digests: Dict[str, bytes] = {}
+        parser = DisplayListParser()
+
+        for section in split_display_sections(output):
+            display = self._parse_section(section, parser, cache, digests)
             if display:
                 displays[display.id] = display
-        
+
+        self._section_cache = cache
+        self._section_digests = digests
         return displays
     
-    def _parse_display_section(self, section: str) -> Optional[Display]:
-        """Parse a single display section"""
-        lines = section.strip().split('\n')
-        
-        display_id = ""
-        name = ""
-        display_type = "external"
-        resolution = (1920, 1080)
-        position = (0, 0)
-        rotation = 0
-        scaling = False
-        hz = 60
-        color_depth = 8
-        enabled = True
-        is_main = False
-        available_resolutions = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith("Persistent screen id:"):
-                display_id = line.split(": ")[1]
-            elif line.startswith("Type:"):
-                if "MacBook" in line:
-                    display_type = "macbook"
-                    name = "MacBook Display"
-                elif "inch external" in line:
-                    name = f"External Display ({line.split()[1]} inch)"
-                else:
-                    name = "External Display"
-            elif line.startswith("Resolution:"):
-                res_str = line.split(": ")[1]
-                w, h = res_str.split("x")
-                resolution = (int(w), int(h))
-            elif line.startswith("Origin:"):
-                origin_str = line.split(": ")[1]
-                # Parse (x,y) format, handle main display indicator
-                origin_str = origin_str.split(" - ")[0]  # Remove main display indicator
-                coords = origin_str.strip("()")
-                x, y = coords.split(",")
-                position = (int(x), int(y))
-                is_main = "main display" in line
-            elif line.startswith("Rotation:"):
-                rotation = int(line.split(": ")[1].split()[0])
-            elif line.startswith("Scaling:"):
-                scaling = "on" in line.split(": ")[1]
-            elif line.startswith("Hertz:"):
-                hz_str = line.split(": ")[1]
-                if hz_str != "N/A":
-                    hz = int(hz_str)
-            elif line.startswith("Color Depth:"):
-                color_depth = int(line.split(": ")[1])
-            elif line.startswith("Enabled:"):
-                enabled = "true" in line.split(": ")[1]
-            elif "mode" in line and "res:" in line:
-                # Parse available resolutions
-                match = re.search(r'res:(\d+)x(\d+)', line)
-                if match:
-                    w, h = int(match.group(1)), int(match.group(2))
-                    if (w, h) not in available_resolutions:
-                        available_resolutions.append((w, h))
-        
-        if not display_id:
-            return None
-            
-        return Display(
-            id=display_id,
-            name=name,
-            type=display_type,
-            resolution=resolution,
-            available_resolutions=available_resolutions or [resolution],
-            current_position=position,
-            rotation=rotation,
-            scaling=scaling,
-            hz=hz,
-            color_depth=color_depth,
-            enabled=enabled,
-            is_main=is_main
-        )
+    def _parse_section(self, section: str, parser: DisplayListParser,
+                       cache: Dict[bytes, Display], digests: Dict[str, bytes]) -> Optional[Display]:
+        """Parse one section, or reuse the cached Display if its content is unchanged"""
+        digest = hashlib.blake2b(section.rstrip().encode(), digest_size=16).digest()
+        display = self._section_cache.get(digest)
+        if display is None:
+            for line in section.split('\n'):
+                parser.feed(line)
+            display = parser.close()
+            if display is None:
+                return None
+        cache[digest] = display
+        digests[display.id] = digest
+        return display
     
-    def apply_layout(self, layout_name: str) -> bool:
+    def iter_displays(self) -> Iterator[Display]:
+        """Stream displays from `displayplacer list`, yielding each one as soon
+        as its section is complete.
+
+        stdout is read line by line, so callers can render the first display
+        while displayplacer is still printing the rest. Once the generator is
+        exhausted, ``displays`` and ``last_diff`` are updated exactly as
+        detect_displays would. A fresh detection snapshot is replayed instead
+        of running displayplacer, as in detect_displays.
+        """
+        fingerprint = self.backend.fingerprint()
+        if self.use_detection_cache and self._load_detection_snapshot(fingerprint):
+            yield from list(self.displays.values())
+            return
+        if not self.DISPLAYPLACER:
+            print("Error: displayplacer not found. Install with: brew install jakehilborn/jakehilborn/displayplacer")
+            return
+
+        stream = DetectionStream(self)
+        with self.backend.stream_list(self.DETECT_TIMEOUT) as listing:
+            for line in listing:
+                display = stream.feed(line)
+                if display:
+                    yield display
+                if stream.finished:
+                    break
+            display = stream.close()
+            if display:
+                yield display
+        if not listing.result.ok:
+            print(f"Error detecting displays: {listing.result.describe()}")
+            return
+
+        self._adopt_stream(stream, fingerprint)
+    
+    def apply_layout(self, layout_name: str, force: bool = False, verify: bool = True) -> bool:
         """Apply a saved layout"""
         if layout_name not in self.layouts:
             print(f"Layout '{layout_name}' not found")
             return False
         
-        layout = self.layouts[layout_name]
+        ok = self.apply_display_configs(self.layouts[layout_name].displays, force, verify)
+        if ok:
+            self.mark_layout_used(layout_name)
+        return ok
+    
+    def apply_display_configs(self, configs: Dict[str, Dict], force: bool = False,
+                              verify: bool = True) -> bool:
+        """Apply per-display configs as a transaction, sending only what differs.
+
+        A display's mode (res/hz/color_depth/scaling) is re-sent as a group if
+        any part of it changes, origin and degree only if they change, and
+        displayplacer is not run at all when nothing would change. ``force``
+        sends every setting.
+
+        With ``verify``, the displays are re-detected after displayplacer
+        returns until every connected display reports its requested config
+        (or, if ``configs`` leaves it out, its state before the apply) or
+        VERIFY_TIMEOUT passes. Skipped displays are checked too, since one
+        displayplacer call can move or re-mode the others. On a mismatch,
+        every display that was sent a change or no longer matches its state
+        before the apply is restored to it and False is returned. The outcome,
+        including per-phase timings, is kept in ``last_apply_report``.
+        """
+        with timed("switch"):
+            return self._apply_display_configs(configs, force, verify)
+    
+    def _apply_display_configs(self, configs: Dict[str, Dict], force: bool, verify: bool) -> bool:
+        report = ApplyReport()
+        self.last_apply_report = report
+        end_phase = PhaseTimer(report.timings)
+        
+        if not self.displays:
+            self.detect_displays()
+        snapshot = dict(self.displays)
+        end_phase('snapshot')
+        
+        plan = self._plan_apply(report, snapshot, configs, force)
+        end_phase('plan')
+        if plan is None:
+            return False
+        commands, targets = plan
+        
+        self._print_apply_report(report)
+        if report.noop:
+            return True
+        
+        ok = self._execute_displayplacer_commands(commands)
+        end_phase('apply')
+        if not ok or not verify:
+            return ok
+        
+        report.mismatches = self._verify_applied(targets)
+        end_phase('verify')
+        if not report.mismatches:
+            return True
+        
+        self._print_mismatches(snapshot, report.mismatches)
+        report.rolled_back = self._execute_displayplacer_commands(
+            self._rollback_commands(snapshot, self.displays, report.sent))
+        self.detect_displays(use_cache=False)
+        end_phase('rollback')
+        if not report.rolled_back:
+            print("Rollback failed; run `python main.py --cli detect` to check the displays")
+        return False
+    
+    def _plan_apply(self, report: ApplyReport, snapshot: Dict[str, Display], configs: Dict[str, Dict],
+                    force: bool) -> Optional[Tuple[List[str], Dict[str, Dict]]]:
+        """Work out the displayplacer arguments for an apply, recording skips in ``report``.
+
+        Returns the commands and the config every connected display should end
+        up with (its current one if ``configs`` leaves it out), or None if a
+        requested resolution is not available.
+        """
         commands = []
+        targets: Dict[str, Dict] = {display_id: self._display_config(display)
+                                    for display_id, display in snapshot.items() if display.enabled}
+        for display_id, config in configs.items():
+            display = snapshot.get(display_id)
+            if display is None or not display.enabled:
+                report.missing.append(display_id)
+                continue
+            if force or self._mode_differs(display, config):
+                config = self._check_mode(display, config)
+                if config is None:
+                    return None
+            targets[display_id] = config
+            
+            args, skipped = self._display_arguments(display, config, force)
+            if skipped:
+                report.skipped[display_id] = skipped
+            if args:
+                command = " ".join([f"id:{display_id}"] + args)
+                report.sent[display_id] = command
+                commands.append(command)
+        return commands, targets
+    
+    def _verify_applied(self, targets: Dict[str, Dict]) -> Dict[str, List[str]]:
+        """Re-detect until every target config is reported; return what still differs"""
+        deadline = time.monotonic() + self.VERIFY_TIMEOUT
+        while True:
+            mismatches = self._find_mismatches(self.detect_displays(use_cache=False), targets)
+            if not mismatches or time.monotonic() >= deadline:
+                return mismatches
+            time.sleep(self.VERIFY_INTERVAL)
+    
+    @classmethod
+    def _find_mismatches(cls, displays: Dict[str, Display], targets: Dict[str, Dict]) -> Dict[str, List[str]]:
+        mismatches = {}
+        for display_id, config in targets.items():
+            problems = cls._mismatched_settings(displays.get(display_id), config)
+            if problems:
+                mismatches[display_id] = problems
+        return mismatches
+    
+    @staticmethod
+    def _print_mismatches(snapshot: Dict[str, Display], mismatches: Dict[str, List[str]]):
+        for display_id, problems in mismatches.items():
+            print(f"{snapshot[display_id].name}: {'; '.join(problems)}")
+        print("Display state did not match the requested layout; rolling back")
+    
+    def _rollback_commands(self, snapshot: Dict[str, Display], displays: Dict[str, Display],
+                           sent: Dict[str, str]) -> List[str]:
+        """Full displayplacer arguments restoring ``snapshot`` on each connected display
+        that was sent a change or, per ``displays``, no longer matches it"""
+        commands = []
+        for display_id, before in snapshot.items():
+            if not before.enabled or display_id not in displays:
+                continue
+            config = self._display_config(before)
+            if display_id in sent or self._mismatched_settings(displays[display_id], config):
+                commands.append(" ".join([f"id:{display_id}"] + self._display_arguments(
+                    before, config, force=True)[0]))
+        return commands
+    
+    @staticmethod
+    def _mismatched_settings(display: Optional[Display], config: Dict) -> List[str]:
+        """Describe each setting in ``config`` that ``display`` does not have"""
+        if display is None:
+            return ["display disappeared"]
+        actual = {
+            'resolution': display.resolution,
+            'hz': display.hz,
+            'color_depth': display.color_depth,
+            'scaling': display.scaling,
+            'position': display.current_position,
+            'rotation': display.rotation,
+        }
+        problems = []
+        for key, value in actual.items():
+            if key not in config:
+                continue
+            expected = config[key]
+            if isinstance(value, tuple):
+                expected = tuple(expected)
+            elif key == 'scaling':
+                expected = bool(expected)
+            if expected != value:
+                problems.append(f"{key} is {value}, expected {expected}")
+        return problems
+    
+    @staticmethod
+    def _display_config(display: Display) -> Dict:
+        """Layout config describing a display's current state"""
+        return {
+            'resolution': display.resolution,
+            'position': display.current_position,
+            'rotation': display.rotation,
+            'scaling': display.scaling,
+            'hz': display.hz,
+            'color_depth': display.color_depth,
+            'is_main': display.is_main
+        }
+    
+    @staticmethod
+    def _mode_differs(display: Display, config: Dict) -> bool:
+        """Whether applying ``config`` would switch the display's mode"""
+        return (tuple(config.get('resolution', display.resolution)) != display.resolution
+                or config.get('hz', display.hz) != display.hz
+                or config.get('color_depth', display.color_depth) != display.color_depth
+                or bool(config.get('scaling', display.scaling)) != display.scaling)
+    
+    @staticmethod
+    def _display_arguments(display: Display, config: Dict, force: bool) -> Tuple[List[str], List[str]]:
+        """displayplacer arguments for one display, and the settings left out as unchanged"""
+        args: List[str] = []
+        skipped: List[str] = []
+        
+        mode_args = []
+        if 'resolution' in config:
+            w, h = config['resolution']
+            mode_args.append(f"res:{w}x{h}")
+        if 'hz' in config:
+            mode_args.append(f"hz:{config['hz']}")
+        if 'color_depth' in config:
+            mode_args.append(f"color_depth:{config['color_depth']}")
+        if 'scaling' in config:
+            mode_args.append(f"scaling:{'on' if config['scaling'] else 'off'}")
+        if mode_args:
+            if force or AdvancedDisplayManager._mode_differs(display, config):
+                args.extend(mode_args)
+            else:
+                skipped.append('mode')
         
-        for display_id, config in layout.displays.items():
-            if display_id in self.displays and self.displays[display_id].enabled:
-                cmd_parts = [f"id:{display_id}"]
-                
-                if 'resolution' in config:
-                    w, h = config['resolution']
-                    cmd_parts.append(f"res:{w}x{h}")
-                
-                if 'hz' in config:
-                    cmd_parts.append(f"hz:{config['hz']}")
-                
-                if 'color_depth' in config:
-                    cmd_parts.append(f"color_depth:{config['color_depth']}")
-                
-                if 'scaling' in config:
-                    cmd_parts.append(f"scaling:{'on' if config['scaling'] else 'off'}")
-                
-                if 'position' in config:
-                    x, y = config['position']
-                    cmd_parts.append(f"origin:({x},{y})")
-                
-                if 'rotation' in config:
-                    cmd_parts.append(f"degree:{config['rotation']}")
-                
-                commands.append(" ".join(cmd_parts))
+        if 'position' in config:
+            x, y = config['position']
+            if force or (x, y) != tuple(display.current_position):
+                args.append(f"origin:({x},{y})")
+            else:
+                skipped.append('origin')
         
-        return self._execute_displayplacer_commands(commands)
+        if 'rotation' in config:
+            if force or config['rotation'] != display.rotation:
+                args.append(f"degree:{config['rotation']}")
+            else:
+                skipped.append('degree')
+        
+        return args, skipped
+    
+    def _print_apply_report(self, report: ApplyReport):
+        for display_id in report.missing:
+            print(f"Display {display_id[:8]}... is not connected, skipped")
+        for display_id, skipped in report.skipped.items():
+            name = self.displays[display_id].name
+            if display_id in report.sent:
+                print(f"{name}: {', '.join(skipped)} unchanged, not re-sent")
+            else:
+                print(f"{name}: already in target state, skipped")
+        if report.noop:
+            print("Displays already match; displayplacer not run")
+    
+    def _check_mode(self, display: Display, config: Dict) -> Optional[Dict]:
+        """Validate a display config against the display's mode table.
+
+        Returns the config to send, with hz/color_depth dropped if only those
+        don't exist at the requested resolution, or None if the resolution
+        itself is not available.
+        """
+        if not display.modes or 'resolution' not in config:
+            return config
+
+        resolution = tuple(config['resolution'])
+        scaling = config.get('scaling')
+        if display.modes.is_valid(resolution, config.get('hz'), config.get('color_depth'), scaling):
+            return config
+
+        w, h = resolution
+        if not display.modes.is_valid(resolution, scaling=scaling):
+            print(f"Mode {w}x{h} is not available on {display.name} ({display.id[:8]}...)")
+            return None
+
+        rates = ", ".join(str(hz) for hz in display.modes.hz_values(resolution, scaling))
+        print(f"Warning: {config.get('hz')}Hz / {config.get('color_depth')}-bit is not available "
+              f"at {w}x{h} on {display.name} (available: {rates}Hz); letting displayplacer choose")
+        return {k: v for k, v in config.items() if k not in ('hz', 'color_depth')}
     
-    def save_layout(self, name: str, description: str = "") -> bool:
-        """Save current display configuration as a layout"""
-        current_displays = self.detect_displays()
+    def save_layout(self, name: str, description: str = "",
+                    overrides: Optional[Dict[str, Dict]] = None,
+                    displays: Optional[Dict[str, Display]] = None) -> bool:
+        """Save current display configuration as a layout.
+
+        ``overrides`` maps display IDs to config keys that replace the
+        detected values (e.g. positions arranged in the GUI). ``displays``
+        is a detection the caller already ran (the GUI detects off its Tk
+        thread); without it the displays are detected here.
+        """
+        current_displays = self.detect_displays() if displays is None else displays
         
         if not current_displays:
             print("No displays detected to save")
@@ -206,17 +901,9 @@ class AdvancedDisplayManager:
         layout_config = {}
         for display_id, display in current_displays.items():
             if display.enabled:
-                layout_config[display_id] = {
-                    'resolution': display.resolution,
-                    'position': display.current_position,
-                    'rotation': display.rotation,
-                    'scaling': display.scaling,
-                    'hz': display.hz,
-                    'color_depth': display.color_depth,
-                    'is_main': display.is_main
-                }
+                layout_config[display_id] = self._display_config(display)
+                layout_config[display_id].update((overrides or {}).get(display_id, {}))
         
-        from datetime import datetime
         layout = LayoutProfile(
             name=name,
             description=description,
@@ -225,47 +912,245 @@ class AdvancedDisplayManager:
         )
         
         self.layouts[name] = layout
-        self.save_layouts()
-        return True
+        return self.save_layouts()
     
     def delete_layout(self, name: str) -> bool:
         """Delete a saved layout"""
-        if name in self.layouts:
-            del self.layouts[name]
-            self.save_layouts()
-            return True
-        return False
+        if name not in self.layouts:
+            return False
+        del self.layouts[name]
+        return self.save_layouts()
     
     def get_layout_names(self) -> List[str]:
-        """Get list of saved layout names"""
-        return list(self.layouts.keys())
+        """Get list of saved layout names, most recently used first"""
+        recency = {name: rank for rank, name in enumerate(self.layout_store.names_by_recency())}
+        return sorted(self.layouts, key=lambda name: recency.get(name, -1))
+
+    def layouts_by_fingerprint(self) -> Dict[str, List[str]]:
+        """Display-set fingerprint -> names of the layouts saved for that set, unsaved changes included"""
+        index = self.layout_store.fingerprint_index()
+        pending = self.layouts.pending()
+        if pending:
+            for names in index.values():
+                names[:] = [name for name in names if name not in pending]
+            for name, layout in pending.items():
+                if layout is not None:
+                    index.setdefault(display_set_fingerprint(layout.displays), []).append(name)
+        return {fingerprint: names for fingerprint, names in index.items() if names}
+
+    def layouts_for_displays(self, display_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """Layouts saved for exactly these displays (default: the connected ones), most recently used first.
+
+        A lookup in the store's fingerprint index, not a scan of every layout.
+        """
+        if display_ids is None:
+            display_ids = self.detect_displays()
+        fingerprint = display_set_fingerprint(display_ids)
+        pending = self.layouts.pending()
+        names = [name for name in self.layout_store.names_for_fingerprint(fingerprint) if name not in pending]
+        names += [name for name, layout in pending.items()
+                  if layout is not None and display_set_fingerprint(layout.displays) == fingerprint]
+        return self._by_recency(names)
+
+    def layouts_using_display_config(self, config: Dict, display_id: Optional[str] = None) -> List[str]:
+        """Layouts that set a display up exactly as ``config``, most recently used first.
+
+        With ``display_id``, only layouts giving that display this config. A
+        lookup by the config's content hash, not a scan of every layout.
+        """
+        pending = self.layouts.pending()
+        names = [name for name in self.layout_store.names_for_display_config(config, display_id)
+                 if name not in pending]
+        ref = display_config_hash(config)
+        for name, layout in pending.items():
+            if layout is not None and any(
+                    display_config_hash(display_config) == ref
+                    for key, display_config in layout.displays.items() if display_id in (None, key)):
+                names.append(name)
+        return self._by_recency(names)
+
+    def _by_recency(self, names: List[str]) -> List[str]:
+        profiles = {name: self.layouts.get(name) for name in names}
+        return sorted((name for name, profile in profiles.items() if profile is not None),
+                      key=lambda name: profiles[name].last_used, reverse=True)
+
+    def mark_layout_used(self, name: str) -> bool:
+        """Set a layout's ``last_used`` to now (one journal record, not a rewrite)"""
+        if name not in self.layouts:
+            return False
+        now = datetime.now().isoformat()
+        self.layouts[name].last_used = now
+        return self.layout_store.touch(name, now)
     
+    def archive_stale_layouts(self, days: Optional[int] = None, dry_run: bool = False) -> List[str]:
+        """Move layouts unused for ``days`` (default ARCHIVE_AFTER_DAYS) to the archive.
+
+        A layout that was never applied counts from when it was saved.
+        Returns the names archived (or that would be, with ``dry_run``).
+        """
+        days = self.ARCHIVE_AFTER_DAYS if days is None else days
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        pending = self.layouts.pending()
+        names = [name for name in self.layout_store.stale(cutoff) if name not in pending]
+        if dry_run or not names:
+            return names
+        if not self.layout_archive.add({name: self.layout_store.get(name) for name in names}):
+            return []
+        for name in names:
+            del self.layouts[name]
+        return names if self.save_layouts() else []
+    
+    def get_archived_layout_names(self) -> List[str]:
+        try:
+            return list(self.layout_archive.load())
+        except (OSError, ValueError) as e:
+            print(f"Error reading layout archive: {e}")
+            return []
+    
+    def restore_archived_layout(self, name: str) -> bool:
+        """Move a layout back from the archive into the store; it counts as used now"""
+        try:
+            data = self.layout_archive.load().get(name)
+        except (OSError, ValueError) as e:
+            print(f"Error reading layout archive: {e}")
+            return False
+        if data is None:
+            print(f"Layout '{name}' is not archived")
+            return False
+        self.layouts[name] = LayoutProfile(**dict(data, last_used=datetime.now().isoformat()))
+        return self.save_layouts() and self.layout_archive.remove([name])
+
+    def import_layouts(self, path: str, on_conflict: str = 'overwrite', dry_run: bool = False) -> ImportResult:
+        """Import an exported ``{name: layout}`` file (compressed or not), read one record at a time.
+
+        Every record is validated and bad ones are reported in the result and
+        left out. A name already saved (or seen earlier in the file) is
+        handled by ``on_conflict``, one of CONFLICT_POLICIES. The import is
+        saved in one atomic store write that the records are streamed into;
+        a file that is not valid JSON imports nothing.
+        """
+        result = ImportResult()
+        saved = set(self.layouts)
+        seen: Dict[str, str] = {}  # name -> last activity of the record imported under it
+
+        def taken(name: str) -> bool:
+            return name in seen or name in saved
+
+        def resolve(records):
+            for name, layout in records:
+                if taken(name):
+                    if on_conflict == 'skip':
+                        result.skipped.append(name)
+                        continue
+                    if on_conflict == 'rename':
+                        saved_as = unique_name(name, taken)
+                        result.renamed.append((name, saved_as))
+                        name = layout['name'] = saved_as
+                    elif on_conflict == 'newest':
+                        existing = seen.get(name)
+                        if existing is None:
+                            profile = self.layouts.get(name)
+                            existing = last_activity(asdict(profile)) if profile else ""
+                        if last_activity(layout) <= existing:
+                            result.skipped.append(name)
+                            continue
+                seen[name] = last_activity(layout)
+                yield name, layout
+
+        try:
+            with open_layout_file(path) as f:
+                records = resolve(iter_layout_records(f, result))
+                if dry_run:
+                    for _ in records:
+                        pass
+                elif not self.layout_store.put_many(records):
+                    result.fatal = "could not save the imported layouts"
+                    return result
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            result.fatal = f"{path}: {e}"
+            return result
+        self.layouts.reload()
+        result.imported = list(seen)
+        return result
+
+    def select_layouts(self, patterns: Iterable[str] = (), display_ids: Optional[Iterable[str]] = None,
+                       used_since: str = "", used_until: str = "") -> List[str]:
+        """Layouts matching every filter given, most recently used first.
+
+        ``patterns`` are name globs, any of which may match; ``display_ids``
+        keeps the layouts saved for exactly those displays (a fingerprint
+        index lookup); ``used_since`` and ``used_until`` are ISO timestamps
+        bounding ``last_used``, which leaves out layouts never applied.
+        """
+        names = self.get_layout_names() if display_ids is None else self.layouts_for_displays(display_ids)
+        patterns = list(patterns)
+        if patterns:
+            names = [name for name in names if any(fnmatchcase(name, pattern) for pattern in patterns)]
+        if used_since or used_until:
+            pending = self.layouts.pending()
+            used = {name for name in self.layout_store.used_between(used_since, used_until) if name not in pending}
+            used.update(name for name, layout in pending.items() if layout is not None and layout.last_used
+                        and used_since <= layout.last_used and (not used_until or layout.last_used < used_until))
+            names = [name for name in names if name in used]
+        return names
+
+    def export_layouts(self, path: str, names: Optional[Iterable[str]] = None,
+                       compression: Optional[str] = None) -> bool:
+        """Write layouts (default: all) to ``path`` in the format import_layouts reads.
+
+        Each layout is read from the store and written as its own line, so
+        exporting a few layouts of a large store touches only those.
+        ``compression`` is one of COMPRESSIONS; by default the extension
+        (.gz, .bz2, .xz) decides.
+        """
+        names = self.get_layout_names() if names is None else names
+        pending = self.layouts.pending()
+
+        def records():
+            for name in names:
+                if name in pending:
+                    layout = asdict(pending[name]) if pending[name] is not None else None
+                else:
+                    layout = self.layout_store.get(name)
+                if layout is not None:
+                    yield name, layout
+
+        try:
+            write_layout_file(path, records(), compression)
+        except OSError as e:
+            print(f"Error exporting layouts to {path}: {e.strerror or e}")
+            return False
+        return True
+
     def get_layout(self, name: str) -> Optional[LayoutProfile]:
         """Get a specific layout"""
         return self.layouts.get(name)
     
     def load_layouts(self):
-        """Load saved layouts from disk"""
-        if os.path.exists(self.LAYOUTS_FILE):
-            try:
-                with open(self.LAYOUTS_FILE, 'r') as f:
-                    data = json.load(f)
-                    for name, layout_data in data.items():
-                        self.layouts[name] = LayoutProfile(**layout_data)
-            except Exception as e:
-                print(f"Error loading layouts: {e}")
+        """Re-read saved layouts from disk (lazily, on next access)"""
+        self.layout_store.invalidate()
+        self.layouts.reload()
     
-    def save_layouts(self):
-        """Save layouts to disk"""
-        try:
-            data = {}
-            for name, layout in self.layouts.items():
-                data[name] = asdict(layout)
-            
-            with open(self.LAYOUTS_FILE, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving layouts: {e}")
+    def save_layouts(self) -> bool:
+        """Write the layouts added, replaced or deleted in ``self.layouts`` since the last save.
+
+        Changes are merged into the store, never written over it, so layouts
+        other processes saved meanwhile are kept. A single change is one
+        journal append; more are one atomic snapshot write.
+        """
+        changes = self.layouts.pending()
+        if not changes:
+            return True
+        if len(changes) == 1:
+            (name, layout), = changes.items()
+            ok = (self.layout_store.put(name, asdict(layout)) if layout is not None
+                  else self.layout_store.delete(name))
+        else:
+            ok = self.layout_store.update({name: asdict(layout) for name, layout in changes.items() if layout},
+                                          [name for name, layout in changes.items() if layout is None])
+        if ok:
+            self.layouts.mark_saved(changes)
+        return ok
     
     def _execute_displayplacer_commands(self, commands: List[str]) -> bool:
         """Execute displayplacer commands.
@@ -279,18 +1164,13 @@ class AdvancedDisplayManager:
             return False
         if not commands:
             return True
-        try:
-            result = subprocess.run(
-                [self.DISPLAYPLACER] + commands,
-                capture_output=True, text=True
-            )
-            if result.returncode != 0:
-                print(f"displayplacer failed: {result.stderr}")
-                return False
-            return True
-        except Exception as e:
-            print(f"Error executing commands: {e}")
+        # Whatever happens next, the snapshot no longer describes the screens
+        self.detection_cache.clear()
+        result = self.backend.apply(commands, self.APPLY_TIMEOUT)
+        if not result.ok:
+            print(f"displayplacer failed: {result.describe()}")
             return False
+        return True
     
     def create_preview_layout(self, display_configs: Dict[str, Dict]) -> Dict[str, Dict]:
         """Create a preview of how displays would be arranged"""
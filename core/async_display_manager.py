@@ -0,0 +1,285 @@
+"""
+Async Display Manager
+asyncio front end to AdvancedDisplayManager for event-loop callers such as the GUI.
+"""
+
+import asyncio
+import os
+import signal
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from core.advanced_display_manager import (
+    AdvancedDisplayManager, ApplyReport, DetectionStream, Display, DisplayDiff, PhaseTimer,
+)
+from utils.timings import observe, timed
+
+
+class AsyncDisplayManager:
+    """Non-blocking detect / apply / verify built on asyncio subprocesses.
+
+    Parsing, planning and state (``displays``, layouts, the detection snapshot)
+    are shared with the wrapped AdvancedDisplayManager; only the displayplacer
+    runs and the waits between them are asynchronous. Operations are
+    serialized, so a refresh never interleaves with an apply.
+
+    Every displayplacer run is bounded by the wrapped manager's DETECT_TIMEOUT
+    or APPLY_TIMEOUT, and a timeout or cancellation kills and reaps the
+    displayplacer process (and its process group). A cancelled apply
+    may leave the displays half configured; detect() shows where they ended up.
+    """
+
+    def __init__(self, manager: Optional[AdvancedDisplayManager] = None):
+        self.manager = manager or AdvancedDisplayManager()
+        self._lock = asyncio.Lock()
+
+    @property
+    def displays(self) -> Dict[str, Display]:
+        return self.manager.displays
+
+    @property
+    def last_apply_report(self) -> ApplyReport:
+        return self.manager.last_apply_report
+
+    async def _run(self, argv: Sequence[str], timeout: float, timing: str) -> Tuple[int, str, str]:
+        """Run a command to completion; kill it on timeout or cancellation"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        proc = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            start_new_session=True)
+        spawned = loop.time()
+        observe(f"{timing}.spawn", spawned - start)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except BaseException:
+            await _kill(proc)
+            raise
+        observe(f"{timing}.run", loop.time() - spawned)
+        return proc.returncode, stdout.decode(), stderr.decode()
+
+    async def detect(self, use_cache: Optional[bool] = None,
+                     timeout: Optional[float] = None) -> Dict[str, Display]:
+        """Detect displays; same semantics as AdvancedDisplayManager.detect_displays"""
+        async with self._lock:
+            return await self._detect(use_cache, timeout)
+
+    async def detect_changes(self) -> Tuple[Dict[str, Display], DisplayDiff]:
+        """Detect displays; return them with what changed since the previous detection"""
+        async with self._lock:
+            if not await self._detect():
+                return {}, DisplayDiff()
+            return self.manager.detection_state()
+
+    async def _detect(self, use_cache: Optional[bool] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Display]:
+        manager = self.manager
+        use_cache = manager.use_detection_cache if use_cache is None else use_cache
+        fingerprint = manager.backend.fingerprint()
+        if use_cache and manager._load_detection_snapshot(fingerprint):
+            return manager.displays
+        if not manager.DISPLAYPLACER:
+            print("Error: displayplacer not found. Install with: brew install jakehilborn/jakehilborn/displayplacer")
+            return {}
+        timeout = manager.DETECT_TIMEOUT if timeout is None else timeout
+        argv = manager.backend.command(["list"])
+        if argv is None:
+            # In-process backend: run it off the loop; it enforces the timeout itself
+            result = await asyncio.to_thread(manager.backend.list, timeout)
+            if not result.ok:
+                print(f"Error detecting displays: {result.describe()}")
+                return {}
+            return manager._adopt_list_output(result.stdout, fingerprint)
+        try:
+            returncode, output, _ = await self._run(argv, timeout, "list")
+        except asyncio.TimeoutError:
+            print(f"Error detecting displays: displayplacer did not finish within {timeout:g}s")
+            return {}
+        except OSError as e:
+            print(f"Error detecting displays: {e}")
+            return {}
+        if returncode != 0:
+            print(f"Error detecting displays: displayplacer exited with status {returncode}")
+            return {}
+        return manager._adopt_list_output(output, fingerprint)
+
+    async def iter_displays(self, timeout: Optional[float] = None) -> AsyncIterator[Display]:
+        """Yield displays as displayplacer prints them (see AdvancedDisplayManager.iter_displays)"""
+        async with self._lock:
+            manager = self.manager
+            fingerprint = manager.backend.fingerprint()
+            if manager.use_detection_cache and manager._load_detection_snapshot(fingerprint):
+                for display in list(manager.displays.values()):
+                    yield display
+                return
+            if not manager.DISPLAYPLACER:
+                print("Error: displayplacer not found. Install with: brew install jakehilborn/jakehilborn/displayplacer")
+                return
+            timeout = manager.DETECT_TIMEOUT if timeout is None else timeout
+            stream = DetectionStream(manager)
+            argv = manager.backend.command(["list"])
+            if argv is None:
+                # In-process backend: list in a worker thread, then yield per section
+                result = await asyncio.to_thread(manager.backend.list, timeout)
+                if not result.ok:
+                    print(f"Error detecting displays: {result.describe()}")
+                    return
+                for line in result.stdout.splitlines():
+                    display = stream.feed(line)
+                    if display:
+                        yield display
+                display = stream.close()
+                if display:
+                    yield display
+                manager._adopt_stream(stream, fingerprint)
+                return
+
+            start = asyncio.get_running_loop().time()
+            deadline = start + timeout
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, stdout=asyncio.subprocess.PIPE, start_new_session=True)
+            except OSError as e:
+                print(f"Error detecting displays: {e}")
+                return
+            observe("list.spawn", asyncio.get_running_loop().time() - start)
+
+            try:
+                while not stream.finished:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    line = await asyncio.wait_for(proc.stdout.readline(), max(remaining, 0))
+                    if not line:
+                        break
+                    display = stream.feed(line.decode())
+                    if display:
+                        yield display
+                display = stream.close()
+                if display:
+                    yield display
+                await asyncio.wait_for(proc.communicate(), max(deadline - asyncio.get_running_loop().time(), 0))
+                observe("list.stream", asyncio.get_running_loop().time() - start)
+            except asyncio.TimeoutError:
+                print(f"Error detecting displays: displayplacer did not finish within {timeout:g}s")
+                return
+            finally:
+                await _kill(proc)
+            if proc.returncode != 0:
+                print(f"Error detecting displays: displayplacer exited with status {proc.returncode}")
+                return
+            manager._adopt_stream(stream, fingerprint)
+
+    async def apply(self, configs: Dict[str, Dict], force: bool = False, verify: bool = True,
+                    timeout: Optional[float] = None) -> bool:
+        """Apply per-display configs; same transaction as AdvancedDisplayManager.apply_display_configs"""
+        async with self._lock:
+            with timed("switch"):
+                return await self._apply(configs, force, verify, timeout)
+
+    async def _apply(self, configs: Dict[str, Dict], force: bool, verify: bool,
+                     timeout: Optional[float]) -> bool:
+        manager = self.manager
+        report = ApplyReport()
+        manager.last_apply_report = report
+        end_phase = PhaseTimer(report.timings)
+
+        if not manager.displays:
+            await self._detect()
+        snapshot = dict(manager.displays)
+        end_phase('snapshot')
+
+        plan = manager._plan_apply(report, snapshot, configs, force)
+        end_phase('plan')
+        if plan is None:
+            return False
+        commands, targets = plan
+
+        manager._print_apply_report(report)
+        if report.noop:
+            return True
+
+        ok = await self._execute(commands, timeout)
+        end_phase('apply')
+        if not ok or not verify:
+            return ok
+
+        report.mismatches = await self._verify(targets)
+        end_phase('verify')
+        if not report.mismatches:
+            return True
+
+        manager._print_mismatches(snapshot, report.mismatches)
+        report.rolled_back = await self._execute(
+            manager._rollback_commands(snapshot, manager.displays, report.sent), timeout)
+        await self._detect(use_cache=False)
+        end_phase('rollback')
+        if not report.rolled_back:
+            print("Rollback failed; run `python main.py --cli detect` to check the displays")
+        return False
+
+    async def apply_layout(self, layout_name: str, force: bool = False, verify: bool = True) -> bool:
+        """Apply a saved layout, marking it used on success"""
+        layout = self.manager.get_layout(layout_name)
+        if layout is None:
+            print(f"Layout '{layout_name}' not found")
+            return False
+        ok = await self.apply(layout.displays, force, verify)
+        if ok:
+            await asyncio.to_thread(self.manager.mark_layout_used, layout_name)
+        return ok
+
+    async def verify(self, targets: Dict[str, Dict], timeout: Optional[float] = None) -> Dict[str, List[str]]:
+        """Re-detect until the displays match ``targets``; return what still differs"""
+        async with self._lock:
+            return await self._verify(targets, timeout)
+
+    async def _verify(self, targets: Dict[str, Dict], timeout: Optional[float] = None) -> Dict[str, List[str]]:
+        manager = self.manager
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (manager.VERIFY_TIMEOUT if timeout is None else timeout)
+        while True:
+            displays = await self._detect(use_cache=False)
+            mismatches = manager._find_mismatches(displays, targets)
+            if not mismatches or loop.time() >= deadline:
+                return mismatches
+            await asyncio.sleep(manager.VERIFY_INTERVAL)
+
+    async def _execute(self, commands: List[str], timeout: Optional[float] = None) -> bool:
+        """Async counterpart of AdvancedDisplayManager._execute_displayplacer_commands"""
+        manager = self.manager
+        if not manager.DISPLAYPLACER:
+            print("Error: displayplacer not found")
+            return False
+        if not commands:
+            return True
+        manager.detection_cache.clear()
+        timeout = manager.APPLY_TIMEOUT if timeout is None else timeout
+        argv = manager.backend.command(commands)
+        if argv is None:
+            result = await asyncio.to_thread(manager.backend.apply, commands, timeout)
+            if not result.ok:
+                print(f"displayplacer failed: {result.describe()}")
+            return result.ok
+        try:
+            returncode, _, stderr = await self._run(argv, timeout, "apply")
+        except asyncio.TimeoutError:
+            print(f"displayplacer did not finish within {timeout:g}s")
+            return False
+        except OSError as e:
+            print(f"Error executing commands: {e}")
+            return False
+        if returncode != 0:
+            print(f"displayplacer failed: {stderr}")
+            return False
+        return True
+
+
+async def _kill(proc: asyncio.subprocess.Process):
+    """Kill and reap ``proc`` (and its process group) if it is still running"""
+    if proc.returncode is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        await proc.wait()
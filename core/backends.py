@@ -0,0 +1,492 @@
+"""
+Display backends
+Where `displayplacer list` output comes from and where applies go: the real
+displayplacer binary, or an in-memory simulation for running the stack off macOS.
+"""
+
+import hashlib
+import json
+import os
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+from core.detection_cache import topology_fingerprint
+from utils.displayplacer import find_displayplacer
+from utils.subprocess_runner import RunResult, Watchdog, kill, run_command, spawn
+from utils.timings import observe
+
+BACKEND_ENV = "MONITOR_BACKEND"
+
+_TRAILER = ("Execute the command below to set your screens to the current arrangement. "
+            "If screen ids are switching, please run `displayplacer --help` for info on "
+            "using contextual or serial ids instead of persistent ids.")
+
+
+class ListStream:
+    """Lines of a `list` run as they arrive.
+
+    Iterate for the lines; ``result`` describes how the run ended once the
+    ``stream_list`` context has exited.
+    """
+
+    def __init__(self, lines: Iterable[str], result: RunResult):
+        self.lines = lines
+        self.result = result
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lines)
+
+
+class DisplayBackend(Protocol):
+    """What AdvancedDisplayManager needs from a display backend.
+
+    ``list`` and ``apply`` speak displayplacer's text formats, so every
+    backend goes through the same parser and command builder. Failures are
+    reported in the returned RunResult, never raised.
+    """
+
+    name: str
+    path: Optional[str]  # executable (or a label); None if the backend is unavailable
+
+    def fingerprint(self) -> str:
+        """Cheap token that changes whenever the display topology may have changed"""
+
+    def list(self, timeout: float, retries: int = 0) -> RunResult:
+        """Full `displayplacer list` output in ``stdout``"""
+
+    def stream_list(self, timeout: float) -> ContextManager[ListStream]:
+        """`displayplacer list` output line by line, bounded by ``timeout``"""
+
+    def apply(self, commands: List[str], timeout: float) -> RunResult:
+        """Apply `id:<id> key:value ...` display configs in one call"""
+
+    def command(self, args: Sequence[str]) -> Optional[List[str]]:
+        """argv that runs ``args`` as a subprocess, or None for in-process backends"""
+
+
+class DisplayplacerBackend:
+    """The displayplacer binary, with the timeouts of utils.subprocess_runner"""
+
+    name = "displayplacer"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or find_displayplacer()
+
+    def fingerprint(self) -> str:
+        return topology_fingerprint()
+
+    def command(self, args: Sequence[str]) -> Optional[List[str]]:
+        return [self.path] + list(args)
+
+    def list(self, timeout: float, retries: int = 0) -> RunResult:
+        return run_command(self.command(["list"]), timeout, retries=retries, timing="list")
+
+    def apply(self, commands: List[str], timeout: float) -> RunResult:
+        return run_command(self.command(commands), timeout, timing="apply")
+
+    @contextmanager
+    def stream_list(self, timeout: float) -> Iterator[ListStream]:
+        argv = self.command(["list"])
+        result = RunResult(argv=argv, attempts=1)
+        start = time.perf_counter()
+        try:
+            proc = spawn(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except OSError as e:
+            result.error = str(e)
+            yield ListStream([], result)
+            return
+        observe("list.spawn", time.perf_counter() - start)
+
+        # The watchdog bounds the whole stream, including time the caller
+        # spends between lines
+        with Watchdog(proc, timeout) as watchdog:
+            try:
+                yield ListStream(proc.stdout, result)
+                proc.stdout.read()  # drain the trailer so displayplacer can exit
+                proc.wait()
+                # Read and parse interleaved, including time spent by the caller
+                observe("list.stream", time.perf_counter() - start)
+            finally:
+                kill(proc)
+                proc.wait()
+                proc.stdout.close()
+                result.duration = time.perf_counter() - start
+                result.durations.append(result.duration)
+                result.timed_out = watchdog.fired
+                result.returncode = None if watchdog.fired else proc.returncode
+
+
+@dataclass
+class SimulatedDisplay:
+    """One simulated screen: its mode table and current settings"""
+    id: str
+    type: str  # "MacBook built in screen" / "27 inch external screen"
+    modes: List[Tuple[int, int, int, int, bool]]  # (width, height, hz, color_depth, scaling), unrotated
+    mode: int = 0  # index into modes
+    origin: Tuple[int, int] = (0, 0)
+    degree: int = 0
+    enabled: bool = True
+    main: bool = False
+    mirror_of: Optional[str] = None  # id of the display this one mirrors
+
+    @property
+    def resolution(self) -> Tuple[int, int]:
+        w, h = self.modes[self.mode][:2]
+        return (h, w) if self.degree in (90, 270) else (w, h)
+
+    def state(self) -> Dict:
+        """Settings that applies change (what the state file records)"""
+        return {'mode': self.mode, 'origin': list(self.origin), 'degree': self.degree,
+                'enabled': self.enabled}
+
+
+# (width, height) pairs a typical panel advertises
+_SIM_RESOLUTIONS = [
+    (1280, 720), (1280, 800), (1440, 900), (1600, 900), (1680, 1050),
+    (1920, 1080), (1920, 1200), (2048, 1152), (2304, 1296), (2560, 1080),
+    (2560, 1440), (2560, 1600), (3008, 1692), (3440, 1440), (3840, 1600),
+    (3840, 2160), (5120, 2160), (5120, 2880), (6016, 3384),
+]
+_SIM_HZ = [60, 50, 75, 100, 120, 144, 30, 24]
+
+
+class SimulatedBackend:
+    """Pure-Python stand-in for displayplacer.
+
+    Models N displays with their mode tables, renders them in displayplacer's
+    `list` format and applies `id:...` configs to the model, failing like
+    displayplacer does for unknown screens or modes. ``list_latency`` and
+    ``apply_latency`` (seconds) emulate a slow WindowServer; a run that would
+    exceed its timeout reports a timeout instead. With ``state_file``,
+    applied settings persist across processes.
+    """
+
+    name = "simulated"
+    path = "simulated"
+
+    def __init__(self, displays: List[SimulatedDisplay], list_latency: float = 0.0,
+                 apply_latency: float = 0.0, state_file: Optional[str] = None):
+        self.displays: Dict[str, SimulatedDisplay] = {display.id: display for display in displays}
+        self.list_latency = list_latency
+        self.apply_latency = apply_latency
+        self.state_file = state_file
+        self.lists = 0
+        self.applies = 0
+        self._load_state()
+
+    @classmethod
+    def generate(cls, count: int = 3, modes: int = 200, seed: int = 0, rotated: int = 0,
+                 mirrored: int = 0, na_hz: int = 0, **kwargs) -> "SimulatedBackend":
+        """``count`` displays (the first a MacBook panel) with ``modes`` modes each.
+
+        Of the external displays, the first ``rotated`` are in portrait
+        (90°), the last ``mirrored`` mirror the MacBook panel, and the last
+        ``na_hz`` of the others report no refresh rate ("N/A").
+        """
+        rng = random.Random(seed)
+        displays = []
+        x = 0
+        mirror_start = count - min(mirrored, max(count - 1, 0))
+        for index in range(count):
+            na = mirror_start - na_hz <= index < mirror_start and index > 0
+            hz_values = [0] if na else _SIM_HZ
+            table = _generate_modes(max(modes, 1), rng, hz_values)
+            # Start in the largest mode of the first refresh-rate sweep (60 Hz)
+            current = max((i for i, mode in enumerate(table[:len(_SIM_RESOLUTIONS)]) if mode[2] == hz_values[0]),
+                          key=lambda i: table[i][0] * table[i][1])
+            display = SimulatedDisplay(
+                id=simulated_display_id(index),
+                type="MacBook built in screen" if index == 0
+                else f"{rng.choice([24, 27, 32, 34])} inch external screen",
+                modes=table, mode=current, origin=(x, 0), main=index == 0,
+                degree=90 if 0 < index <= rotated and index < mirror_start else 0)
+            if index >= mirror_start:
+                display.mirror_of = displays[0].id
+                display.origin = displays[0].origin
+            else:
+                x += display.resolution[0]
+            displays.append(display)
+        return cls(displays, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "SimulatedBackend":
+        """Build from MONITOR_SIM_* environment variables (see DEVELOPMENT.md)"""
+        env = os.environ
+        return cls.generate(
+            count=int(env.get("MONITOR_SIM_DISPLAYS", "3")),
+            modes=int(env.get("MONITOR_SIM_MODES", "200")),
+            seed=int(env.get("MONITOR_SIM_SEED", "0")),
+            list_latency=float(env.get("MONITOR_SIM_LIST_LATENCY", "0")),
+            apply_latency=float(env.get("MONITOR_SIM_APPLY_LATENCY", "0")),
+            state_file=env.get("MONITOR_SIM_STATE") or None,
+        )
+
+    # Hot-plug
+
+    def connect(self, display: SimulatedDisplay):
+        self.displays[display.id] = display
+
+    def disconnect(self, display_id: str):
+        self.displays.pop(display_id, None)
+
+    # DisplayBackend
+
+    def fingerprint(self) -> str:
+        state = [(display_id, display.state()) for display_id, display in self.displays.items()]
+        return "simulated:" + hashlib.blake2b(json.dumps(state).encode(), digest_size=8).hexdigest()
+
+    def command(self, args: Sequence[str]) -> Optional[List[str]]:
+        return None
+
+    def list(self, timeout: float, retries: int = 0) -> RunResult:
+        result = RunResult(argv=["simulated", "list"], attempts=1)
+        start = time.perf_counter()
+        self.lists += 1
+        if not self._wait(self.list_latency, timeout, result):
+            result.stdout = self.render()
+            result.returncode = 0
+        result.duration = time.perf_counter() - start
+        result.durations.append(result.duration)
+        observe("list.run", result.duration)
+        return result
+
+    @contextmanager
+    def stream_list(self, timeout: float) -> Iterator[ListStream]:
+        result = RunResult(argv=["simulated", "list"], attempts=1)
+        start = time.perf_counter()
+        self.lists += 1
+        sections = self.render_sections()
+        delay = self.list_latency / max(len(sections), 1)
+
+        def lines():
+            for section in sections:
+                remaining = timeout - (time.perf_counter() - start)
+                if self._wait(delay, remaining, result):
+                    return
+                for line in section.split("\n"):
+                    yield line + "\n"
+            result.returncode = 0
+
+        stream = ListStream(lines(), result)
+        try:
+            yield stream
+            for _ in stream:  # the caller may stop at the trailer
+                pass
+            observe("list.stream", time.perf_counter() - start)
+        finally:
+            result.duration = time.perf_counter() - start
+            result.durations.append(result.duration)
+
+    def apply(self, commands: List[str], timeout: float) -> RunResult:
+        result = RunResult(argv=["simulated"] + list(commands), attempts=1)
+        start = time.perf_counter()
+        self.applies += 1
+        if not self._wait(self.apply_latency, timeout, result):
+            try:
+                changes = [change for command in commands for change in self._resolve(command)]
+            except ValueError as e:
+                result.returncode, result.stderr = 1, str(e)
+            else:
+                for display, settings in changes:
+                    for key, value in settings.items():
+                        setattr(display, key, value)
+                self._save_state()
+                result.returncode = 0
+        result.duration = time.perf_counter() - start
+        result.durations.append(result.duration)
+        observe("apply.run", result.duration)
+        return result
+
+    # Rendering
+
+    def render(self) -> str:
+        """The whole `displayplacer list` output"""
+        return "\n\n".join(self.render_sections()) + "\n"
+
+    def render_sections(self) -> List[str]:
+        sections = [self._render_display(index, display)
+                    for index, display in enumerate(self.displays.values())]
+        # Mirror sets share one command: "id:<source>+<mirror> ..."
+        sections.append(_TRAILER + "\n\ndisplayplacer " + " ".join(
+            f'"{self._render_command(display)}"' for display in self.displays.values()
+            if display.mirror_of not in self.displays))
+        return sections
+
+    def _origin(self, display: SimulatedDisplay) -> Tuple[int, int]:
+        """Mirrors always sit on their source, whatever was applied to them"""
+        source = self.displays.get(display.mirror_of) if display.mirror_of else None
+        return source.origin if source else display.origin
+
+    def _render_display(self, index: int, display: SimulatedDisplay) -> str:
+        _, _, hz, depth, scaling = display.modes[display.mode]
+        w, h = display.resolution
+        x, y = self._origin(display)
+        rotated = display.degree in (90, 270)
+        lines = [
+            f"Persistent screen id: {display.id}",
+            f"Contextual screen id: {index + 1}",
+            f"Serial screen id: s{4251086178 + index}",
+            f"Type: {display.type}",
+            f"Resolution: {w}x{h}",
+            f"Hertz: {hz or 'N/A'}",
+            f"Color Depth: {depth}",
+            f"Scaling: {'on' if scaling else 'off'}",
+            f"Origin: ({x},{y})" + (" - main display" if display.main else ""),
+            f"Rotation: {display.degree}",
+            f"Enabled: {'true' if display.enabled else 'false'}",
+            f"Resolutions for rotation {display.degree}:",
+        ]
+        for n, (mw, mh, mhz, mdepth, mscaling) in enumerate(display.modes):
+            if rotated:
+                mw, mh = mh, mw
+            line = f"  mode {n}: res:{mw}x{mh} hz:{mhz or 'N/A'} color_depth:{mdepth}"
+            if mscaling:
+                line += " scaling:on"
+            if n == display.mode:
+                line += " <-- current mode"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _render_command(self, display: SimulatedDisplay) -> str:
+        _, _, hz, depth, scaling = display.modes[display.mode]
+        w, h = display.resolution
+        x, y = display.origin
+        ids = "+".join([display.id] + [other.id for other in self.displays.values()
+                                       if other.mirror_of == display.id])
+        return (f"id:{ids} res:{w}x{h}" + (f" hz:{hz}" if hz else "") +
+                f" color_depth:{depth} enabled:{'true' if display.enabled else 'false'}"
+                f" scaling:{'on' if scaling else 'off'} origin:({x},{y}) degree:{display.degree}")
+
+    # Applying
+
+    def _resolve(self, command: str) -> List[Tuple[SimulatedDisplay, Dict]]:
+        """(display, attribute changes) for one `id:... key:value` config, or ValueError"""
+        args = dict(part.split(":", 1) for part in command.split() if ":" in part)
+        changes = []
+        for display_id in args.pop("id", "").split("+"):
+            display = self.displays.get(display_id)
+            if display is None:
+                raise ValueError(f"Unable to find screen {display_id}")
+            changes.append((display, self._resolve_display(display, args)))
+        return changes
+
+    def _resolve_display(self, display: SimulatedDisplay, args: Dict[str, str]) -> Dict:
+        changes: Dict = {}
+        degree = display.degree
+        if "degree" in args:
+            degree = int(args["degree"])
+            if degree not in (0, 90, 180, 270):
+                raise ValueError(f"Invalid rotation: {degree}")
+            changes['degree'] = degree
+        if "origin" in args:
+            x, y = args["origin"].strip("()").split(",")
+            changes['origin'] = (int(x), int(y))
+        if "enabled" in args:
+            changes['enabled'] = args["enabled"] == "true"
+        if {"res", "hz", "color_depth", "scaling"} & args.keys():
+            changes['mode'] = self._find_mode(display, args, degree)
+        return changes
+
+    @staticmethod
+    def _find_mode(display: SimulatedDisplay, args: Dict[str, str], degree: int) -> int:
+        """Index of the mode matching ``args``; unspecified fields prefer the current mode"""
+        _, _, hz, depth, scaling = display.modes[display.mode]
+        if "res" in args:
+            w, h = (int(v) for v in args["res"].split("x"))
+            if degree in (90, 270):
+                w, h = h, w
+        else:
+            w, h = display.modes[display.mode][:2]
+        wanted = {'hz': int(args["hz"]) if "hz" in args else None,
+                  'color_depth': int(args["color_depth"]) if "color_depth" in args else None,
+                  'scaling': args["scaling"] == "on" if "scaling" in args else None}
+        best, best_score = None, -1
+        for index, (mw, mh, mhz, mdepth, mscaling) in enumerate(display.modes):
+            if (mw, mh) != (w, h):
+                continue
+            fields = (('hz', mhz, hz), ('color_depth', mdepth, depth), ('scaling', mscaling, scaling))
+            if any(wanted[key] is not None and wanted[key] != value for key, value, _ in fields):
+                continue
+            score = sum(value == current for _, value, current in fields)
+            if score > best_score:
+                best, best_score = index, score
+        if best is None:
+            raise ValueError(f"Could not find res:{args.get('res', f'{w}x{h}')} "
+                             f"for screen {display.id} with the requested settings")
+        return best
+
+    def _wait(self, latency: float, timeout: float, result: RunResult) -> bool:
+        """Sleep for ``latency``; if that would exceed ``timeout``, sleep the timeout and report it"""
+        if latency > timeout:
+            time.sleep(max(timeout, 0))
+            result.timed_out = True
+            result.returncode = None
+            return True
+        if latency:
+            time.sleep(latency)
+        return False
+
+    # State file
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for display_id, settings in state.items():
+            display = self.displays.get(display_id)
+            if display is None:
+                continue
+            display.mode = settings.get('mode', display.mode)
+            display.origin = tuple(settings.get('origin', display.origin))
+            display.degree = settings.get('degree', display.degree)
+            display.enabled = settings.get('enabled', display.enabled)
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        with open(self.state_file, "w") as f:
+            json.dump({display_id: display.state() for display_id, display in self.displays.items()}, f)
+
+
+def simulated_display_id(index: int) -> str:
+    """Stable fake persistent screen id for simulated display number ``index``"""
+    return f"{index:08X}-0000-0000-0000-{index * 7919:012X}"
+
+
+def _generate_modes(count: int, rng: random.Random,
+                    hz_values: List[int] = _SIM_HZ) -> List[Tuple[int, int, int, int, bool]]:
+    """``count`` modes: each resolution at several refresh rates, depths and scalings"""
+    top = rng.randrange(8, len(_SIM_RESOLUTIONS) + 1)  # panels differ in their largest mode
+    resolutions = _SIM_RESOLUTIONS[:top]
+    modes = []
+    for n in range(count):
+        block, index = divmod(n, len(resolutions))
+        w, h = resolutions[index]
+        hz = hz_values[block % len(hz_values)]
+        variant = block // len(hz_values)
+        # Past the first hz sweep, vary depth and scaling, then shift the
+        # width so large tables still hold distinct modes
+        modes.append((w + 8 * (variant // 4), h, hz, 10 if variant % 2 else 8, variant % 4 < 2))
+    return modes
+
+
+BACKENDS = {
+    DisplayplacerBackend.name: DisplayplacerBackend,
+    SimulatedBackend.name: SimulatedBackend.from_env,
+}
+
+
+def create_backend(name: Optional[str] = None) -> DisplayBackend:
+    """Backend called ``name``; defaults to $MONITOR_BACKEND, else displayplacer"""
+    name = name or os.environ.get(BACKEND_ENV) or DisplayplacerBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown display backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -0,0 +1,265 @@
+"""
+Display Daemon
+Long-running owner of one AdvancedDisplayManager, answering requests over a
+local Unix socket so CLI invocations skip startup, discovery and layout parsing.
+
+Protocol: the client sends one JSON object terminated by a newline and reads
+one JSON object back, e.g.
+
+    {"op": "detect", "fresh": false}       -> {"ok": true, "displays": {id: {...}}}
+    {"op": "list_layouts"}                 -> {"ok": true, "layouts": {name: {...}}}
+    {"op": "apply", "layout": "Work", "force": false, "verify": true}
+                                           -> {"ok": true, "output": "...", "report": {...}}
+    {"op": "ping"}                         -> {"ok": true, "pid": 1234, "displayplacer": "..."}
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from core.advanced_display_manager import (
+    AdvancedDisplayManager, ApplyReport, Display, LayoutProfile, display_from_dict, display_to_dict,
+)
+from core.backends import DisplayBackend
+from core.detection_cache import CACHE_DIR
+
+SOCKET_PATH = os.path.join(CACHE_DIR, "daemon.sock")
+REQUEST_TIMEOUT = 5.0  # seconds a client gets to send its request line
+MAX_REQUEST = 1 << 20  # bytes
+
+
+class DisplayDaemon(socketserver.UnixStreamServer):
+    """Unix-socket server holding warm detection and layout state.
+
+    Requests are handled one at a time, so the manager is never used
+    concurrently. A client that sends no complete request line within
+    ``request_timeout`` seconds is dropped, so it cannot hold up the others.
+    """
+
+    def __init__(self, socket_path: str = SOCKET_PATH, detection_ttl: float = 10.0,
+                 backend: Optional[DisplayBackend] = None, request_timeout: float = REQUEST_TIMEOUT):
+        self.socket_path = socket_path
+        self.detection_ttl = detection_ttl
+        self.request_timeout = request_timeout
+        self.manager = AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+        self._detected_at = 0.0
+        self._detected_fingerprint: Optional[str] = None
+
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self):
+        # Owner-only from the moment the socket file exists, not after a chmod
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+    def _detect(self, fresh: bool) -> Dict:
+        fingerprint = self.manager.backend.fingerprint()
+        stale = (fresh or fingerprint != self._detected_fingerprint
+                 or time.monotonic() - self._detected_at > self.detection_ttl)
+        if stale:
+            self.manager.detect_displays()
+            self._detected_at = time.monotonic()
+            self._detected_fingerprint = fingerprint
+        return self.manager.displays
+
+    def handle_request_data(self, request: Dict) -> Dict:
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'displayplacer': self.manager.DISPLAYPLACER,
+                    'backend': self.manager.backend.name}
+        if op == 'detect':
+            displays = self._detect(bool(request.get('fresh')))
+            return {'ok': True, 'displays': {display_id: display_to_dict(display)
+                                             for display_id, display in displays.items()}}
+        if op == 'list_layouts':
+            layouts = self.manager.layouts
+            return {'ok': True, 'layouts': {name: asdict(layouts[name])  # most recently used first
+                                            for name in self.manager.get_layout_names()}}
+        if op == 'layouts_for_displays':
+            display_ids = request.get('displays')
+            if display_ids is None:
+                display_ids = self._detect(fresh=False)
+            return {'ok': True, 'layouts': self.manager.layouts_for_displays(display_ids)}
+        if op == 'apply':
+            # Plan against the screens as they are now: another process may have
+            # changed them since the cached detection
+            self._detect(fresh=True)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                ok = self.manager.apply_layout(request.get('layout', ''), bool(request.get('force')),
+                                               bool(request.get('verify', True)))
+            report = self.manager.last_apply_report
+            if not report.noop:
+                # The screens just changed; make the next detect re-run displayplacer
+                self._detected_fingerprint = None
+            return {'ok': ok, 'output': output.getvalue(), 'report': asdict(report)}
+        return {'ok': False, 'error': f"unknown op: {op!r}"}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.connection.settimeout(self.server.request_timeout)
+
+    def handle(self):
+        try:
+            line = self.rfile.readline(MAX_REQUEST)
+        except OSError:  # including socket.timeout: drop the client
+            return
+        try:
+            request = json.loads(line)
+            response = self.server.handle_request_data(request)
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        with contextlib.suppress(OSError):
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class DaemonClient:
+    """Client for DisplayDaemon; every call returns None if no daemon answers"""
+
+    def __init__(self, socket_path: str = SOCKET_PATH, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, op: str, **params) -> Optional[Dict]:
+        if not os.path.exists(self.socket_path):
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(dict(params, op=op)).encode() + b"\n")
+                with sock.makefile('rb') as f:
+                    line = f.readline()
+        except OSError:
+            return None
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def is_running(self) -> bool:
+        response = self.request('ping')
+        return bool(response and response.get('ok'))
+
+
+class RemoteDisplayManager:
+    """The read/apply subset of AdvancedDisplayManager, served by a daemon.
+
+    Use ``connect`` to get one; it returns None when no daemon is running so
+    callers can fall back to an in-process AdvancedDisplayManager. If the
+    daemon stops answering or reports an error later on, the manager made by
+    ``fallback`` does the work instead; without one, RuntimeError is raised.
+    """
+
+    def __init__(self, client: DaemonClient, displayplacer: Optional[str],
+                 use_detection_cache: bool = True,
+                 fallback: Optional[Callable[[], AdvancedDisplayManager]] = None):
+        self.client = client
+        self.fallback = fallback
+        self.local: Optional[AdvancedDisplayManager] = None
+        self.DISPLAYPLACER = displayplacer
+        self.use_detection_cache = use_detection_cache
+        self.displays: Dict[str, Display] = {}
+        self._layouts: Optional[Dict[str, LayoutProfile]] = None
+        self.last_apply_report = ApplyReport()
+
+    @classmethod
+    def connect(cls, use_detection_cache: bool = True, socket_path: str = SOCKET_PATH,
+                backend: str = "displayplacer",
+                fallback: Optional[Callable[[], AdvancedDisplayManager]] = None
+                ) -> Optional["RemoteDisplayManager"]:
+        """Connect to a running daemon that serves ``backend``"""
+        client = DaemonClient(socket_path)
+        response = client.request('ping')
+        if not response or not response.get('ok'):
+            return None
+        if response.get('backend', "displayplacer") != backend:
+            return None
+        return cls(client, response.get('displayplacer'), use_detection_cache, fallback)
+
+    def _call(self, op: str, **params) -> Optional[Dict]:
+        """The daemon's response, or None once the work has moved to ``self.local``"""
+        if self.local is not None:
+            return None
+        response = self.client.request(op, **params)
+        if response is None:
+            problem = "display daemon stopped responding"
+        elif 'error' in response:
+            problem = f"display daemon error: {response['error']}"
+        else:
+            return response
+        if self.fallback is None:
+            raise RuntimeError(problem)
+        print(f"Warning: {problem}; continuing without it", file=sys.stderr)
+        self.local = self.fallback()
+        return None
+
+    def detect_displays(self) -> Dict[str, Display]:
+        response = self._call('detect', fresh=not self.use_detection_cache)
+        if response is None:
+            self.displays = self.local.detect_displays()
+            return self.displays
+        self.displays = {display_id: display_from_dict(data)
+                         for display_id, data in response['displays'].items()}
+        return self.displays
+
+    def iter_displays(self) -> Iterator[Display]:
+        yield from self.detect_displays().values()
+
+    @property
+    def layouts(self) -> Dict[str, LayoutProfile]:
+        if self.local is not None:
+            return self.local.layouts
+        if self._layouts is None:
+            response = self._call('list_layouts')
+            if response is None:
+                return self.local.layouts
+            self._layouts = {name: LayoutProfile(**data)
+                             for name, data in response['layouts'].items()}
+        return self._layouts
+
+    def get_layout_names(self) -> List[str]:
+        return list(self.layouts.keys())
+
+    def get_layout(self, name: str) -> Optional[LayoutProfile]:
+        return self.layouts.get(name)
+
+    def layouts_for_displays(self, display_ids: Optional[Iterable[str]] = None) -> List[str]:
+        displays = None if display_ids is None else list(display_ids)
+        response = self._call('layouts_for_displays', displays=displays)
+        if response is None:
+            return self.local.layouts_for_displays(displays)
+        return response['layouts']
+
+    def apply_layout(self, layout_name: str, force: bool = False, verify: bool = True) -> bool:
+        response = self._call('apply', layout=layout_name, force=force, verify=verify)
+        if response is None:
+            ok = self.local.apply_layout(layout_name, force, verify)
+            self.last_apply_report = self.local.last_apply_report
+            return ok
+        self.last_apply_report = ApplyReport(**response.get('report', {}))
+        if response.get('output'):
+            print(response['output'], end="")
+        return bool(response.get('ok'))
@@ -0,0 +1,94 @@
+"""
+Detection Snapshot Cache
+Persists the last parsed display set so short-lived CLI runs can skip displayplacer.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+CACHE_DIR = os.path.expanduser("~/.cache/monitor-layout-manager")
+
+# WindowServer rewrites these whenever a display is connected, removed or
+# rearranged, so their mtime/size is a cheap proxy for the current topology
+_TOPOLOGY_FILES = [
+    "/Library/Preferences/com.apple.windowserver.displays.plist",
+    os.path.expanduser("~/Library/Preferences/ByHost/com.apple.windowserver.displays.*.plist"),
+]
+
+_SNAPSHOT_VERSION = 1
+
+
+def topology_fingerprint() -> str:
+    """Hash of the WindowServer display preference files' mtime and size.
+
+    Costs a few stat() calls. Returns "" where the files don't exist (e.g.
+    off macOS), in which case only the TTL guards the snapshot.
+    """
+    parts = []
+    for pattern in _TOPOLOGY_FILES:
+        for path in sorted(glob.glob(pattern)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+    if not parts:
+        return ""
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class DetectionCache:
+    """Snapshot of the last detection, valid while the topology fingerprint
+    matches and the snapshot is younger than ``ttl`` seconds."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 10.0):
+        self.path = path or os.path.join(CACHE_DIR, "detection.json")
+        self.ttl = ttl
+
+    def load(self, fingerprint: str) -> Optional[Tuple[Dict[str, dict], Dict[str, str]]]:
+        """Return (display dicts, section digests) if the snapshot is fresh"""
+        try:
+            with open(self.path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (snapshot.get('version') != _SNAPSHOT_VERSION
+                or snapshot.get('fingerprint') != fingerprint
+                or time.time() - snapshot.get('created', 0) > self.ttl):
+            return None
+        return snapshot['displays'], snapshot['digests']
+
+    def save(self, fingerprint: str, displays: Dict[str, dict], digests: Dict[str, str]):
+        """Write the snapshot atomically (temp file + rename)"""
+        snapshot = {
+            'version': _SNAPSHOT_VERSION,
+            'fingerprint': fingerprint,
+            'created': time.time(),
+            'displays': displays,
+            'digests': digests,
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing detection cache: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drop the snapshot, e.g. after the display configuration was changed"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error clearing detection cache: {e}")
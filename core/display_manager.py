@@ -1,14 +1,27 @@
-import subprocess
 import re
+import time
 
-DISPLAYPLACER = "/opt/homebrew/bin/displayplacer"
+from utils.displayplacer import find_displayplacer
+from utils.subprocess_runner import APPLY_TIMEOUT, LIST_TIMEOUT, run_command
+
+DEFAULT_DISPLAYPLACER = "/opt/homebrew/bin/displayplacer"
+
+RETRIES = 2  # extra attempts when displayplacer exits non-zero
+RETRY_DELAY = 1.0  # seconds between attempts
 
 macbook_id = "37D8832A-2D66-02CA-B9F7-8F30A301B230"
 dell_id = "5225484A-6561-DA4D-0857-D6964E3302DB"
 arzopa_id = "833E557A-1ED7-9DB3-0857-D6964E3302DB"
 
+def displayplacer_path() -> str:
+    """The displayplacer binary, looked up on first use rather than at import"""
+    return find_displayplacer() or DEFAULT_DISPLAYPLACER
+
 def get_connected_screens():
-    output = subprocess.check_output([DISPLAYPLACER, "list"]).decode()
+    result = run_command([displayplacer_path(), "list"], LIST_TIMEOUT, retries=1)
+    if not result.ok:
+        raise RuntimeError(result.describe())
+    output = result.stdout
     return {
         "macbook": macbook_id in output,
         "dell": dell_id in output,
@@ -31,39 +44,66 @@ def get_best_arzopa_mode(output: str, has_dell: bool):
 
     return "res:1280x800 hz:60 color_depth:8 scaling:on", "1280x800 (fallback)"
 
-def apply_layout(mode: str):
+SCREEN_IDS = {"macbook": macbook_id, "dell": dell_id, "arzopa": arzopa_id}
+
+MACBOOK_MODE = "res:1680x1050 hz:60 color_depth:8 scaling:on"
+DELL_MODE = "res:2560x1440 hz:60 color_depth:8 scaling:on"
+
+# mode -> (screens that must be connected, banner, [(screen, mode settings, origin)]);
+# a mode of None means the best available Arzopa mode
+LAYOUT_MODES = {
+    "home": (("macbook", "dell", "arzopa"),
+             "🖥️  Home setup: Arzopa (left), Dell (center), MacBook (below Dell)",
+             [("arzopa", None, "(-1280,200)"),
+              ("dell", DELL_MODE, "(0,0)"),
+              ("macbook", MACBOOK_MODE, "(0,1440)")]),
+    "arzopa_only": (("macbook", "arzopa"),
+                    "💼  MacBook + Arzopa only",
+                    [("macbook", MACBOOK_MODE, "(0,0)"),
+                     ("arzopa", None, "(1680,0)")]),
+    "work": (("macbook", "dell"),
+             "🧑‍💻  MacBook + Dell only",
+             [("macbook", MACBOOK_MODE, "(0,1440)"),
+              ("dell", DELL_MODE, "(0,0)")]),
+}
+
+# Exact set of connected screens -> mode, for picking a mode automatically
+_MODE_BY_SCREENS = {frozenset(screens): mode for mode, (screens, _, _) in LAYOUT_MODES.items()}
+
+def detect_mode(info=None):
+    """Return the mode whose screens are exactly the connected ones, or None"""
+    info = info or get_connected_screens()
+    return _MODE_BY_SCREENS.get(frozenset(name for name in SCREEN_IDS if info[name]))
+
+def apply_layout(mode: str) -> bool:
     info = get_connected_screens()
-    connected = info["raw"]
-    has_macbook, has_dell, has_arzopa = info["macbook"], info["dell"], info["arzopa"]
-    arzopa_res, arzopa_label = get_best_arzopa_mode(connected, has_dell)
-
-    if mode == "home" and has_macbook and has_dell and has_arzopa:
-        print(f"🖥️  Home setup: Arzopa (left), Dell (center), MacBook (below Dell)")
-        run_layout([
-            f'id:{arzopa_id} {arzopa_res} origin:(-1280,200) degree:0',
-            f'id:{dell_id} res:2560x1440 hz:60 color_depth:8 scaling:on origin:(0,0) degree:0',
-            f'id:{macbook_id} res:1680x1050 hz:60 color_depth:8 scaling:on origin:(0,1440) degree:0',
-        ])
-
-    elif mode == "arzopa_only" and has_macbook and has_arzopa:
-        print(f"💼  MacBook + Arzopa only")
-        run_layout([
-            f'id:{macbook_id} res:1680x1050 hz:60 color_depth:8 scaling:on origin:(0,0) degree:0',
-            f'id:{arzopa_id} {arzopa_res} origin:(1680,0) degree:0',
-        ])
-
-    elif mode == "work" and has_macbook and has_dell:
-        print(f"🧑‍💻  MacBook + Dell only")
-        run_layout([
-            f'id:{macbook_id} res:1680x1050 hz:60 color_depth:8 scaling:on origin:(0,1440) degree:0',
-            f'id:{dell_id} res:2560x1440 hz:60 color_depth:8 scaling:on origin:(0,0) degree:0',
-        ])
-
-    else:
+    if mode == "auto":
+        mode = detect_mode(info)
+
+    if mode not in LAYOUT_MODES or not all(info[name] for name in LAYOUT_MODES[mode][0]):
         print("🔌  Only MacBook or unknown config — skipping.")
+        return False
+
+    _, banner, placements = LAYOUT_MODES[mode]
+    if info["arzopa"]:
+        arzopa_res, arzopa_label = get_best_arzopa_mode(info["raw"], info["dell"])
+    print(banner)
+    return run_layout([
+        f'id:{SCREEN_IDS[name]} {settings or arzopa_res} origin:{origin} degree:0'
+        for name, settings, origin in placements
+    ])
 
-def run_layout(commands):
-    for cmd in commands:
-        full = f'{DISPLAYPLACER} "{cmd}"'
-        print(f"🔧  Running: {full}")
-        subprocess.run(full, shell=True)
+def run_layout(commands, retries: int = RETRIES) -> bool:
+    """Apply all display configs in one displayplacer call, so macOS reconfigures once"""
+    argv = [displayplacer_path()] + list(commands)
+    print(f"🔧  Running: {argv[0]} " + " ".join(f'"{cmd}"' for cmd in commands))
+    for attempt in range(1, retries + 2):
+        result = run_command(argv, APPLY_TIMEOUT, timing="apply")
+        elapsed = result.duration * 1000
+        if result.ok:
+            print(f"⏱️  Applied {len(commands)} display(s) in {elapsed:.0f} ms")
+            return True
+        print(f"🔴  Attempt {attempt}/{retries + 1} failed after {elapsed:.0f} ms: {result.describe()}")
+        if attempt <= retries:
+            time.sleep(RETRY_DELAY)
+    return False
@@ -0,0 +1,963 @@
+"""
+Layout Store
+Persistence for saved layouts: a crash-safe JSON snapshot plus an append-only
+journal, or an indexed SQLite database.
+"""
+
+import copy
+import fcntl
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Journal records past which the snapshot is rewritten and the journal emptied
+COMPACT_RECORDS = 200
+
+LAYOUT_STORE_ENV = "MONITOR_LAYOUT_STORE"
+
+# Snapshot format with display configs stored once and referenced by hash
+SNAPSHOT_VERSION = 2
+_VERSIONED_PREFIX = b'{"version": '  # how every snapshot since version 2 starts
+
+
+def display_set_fingerprint(display_ids: Iterable[str]) -> str:
+    """Order-independent key for a set of persistent screen ids"""
+    return ",".join(sorted({display_id.upper() for display_id in display_ids}))
+
+
+# json.dumps builds a new encoder per call when given options; these are reused
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+_ENCODER = json.JSONEncoder()
+_COMPACT = json.JSONEncoder(separators=(',', ':'))
+
+
+def display_config_hash(config: Dict) -> str:
+    """Content address of one display's config in a layout (resolution, origin, hz, ...)"""
+    return hashlib.sha256(_CANONICAL.encode(config).encode()).hexdigest()[:16]
+
+
+def _display_refs(layout: Dict, memo: Optional[Dict[int, Tuple[Dict, str]]] = None) -> Dict[str, str]:
+    """display id -> config hash for a layout.
+
+    ``memo`` caches hashes by config object; it keeps the objects alive, so
+    their ids cannot be reused while it is in use.
+    """
+    displays = layout.get('displays')
+    if not isinstance(displays, dict):
+        return {}
+    if memo is None:
+        return {display_id: display_config_hash(config) for display_id, config in displays.items()}
+    refs = {}
+    for display_id, config in displays.items():
+        cached = memo.get(id(config))
+        if cached is None:
+            cached = memo[id(config)] = (config, display_config_hash(config))
+        refs[display_id] = cached[1]
+    return refs
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _copy_layout(layout: Dict) -> Dict:
+    """A copy of a stored layout its caller may change.
+
+    Decoded snapshots share one config object between every layout that
+    uses it, so display configs are copied too.
+    """
+    displays = layout.get('displays')
+    if not isinstance(displays, dict):
+        return dict(layout)
+    return dict(layout, displays={
+        display_id: {key: value if type(value) in _SCALARS else copy.deepcopy(value)
+                     for key, value in config.items()} if isinstance(config, dict) else copy.deepcopy(config)
+        for display_id, config in displays.items()})
+
+
+class _FileLock:
+    """Advisory flock(2) on a lock file, shared for reads and exclusive for writes.
+
+    Re-entrant for the owning store, whose RLock callers already hold, so a
+    write can re-read the files under the lock it took.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._depth = 0
+
+    @contextmanager
+    def __call__(self, exclusive: bool) -> Iterator[None]:
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        try:
+            if exclusive:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            fd = None  # e.g. a read-only directory: nothing to protect against
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._depth = 1
+        try:
+            yield
+        finally:
+            self._depth = 0
+            if fd is not None:
+                os.close(fd)  # releases the lock
+
+
+class LayoutStore:
+    """Saved layouts as ``name -> layout dict``, kept in two JSON files.
+
+    ``path`` is a snapshot, only ever replaced whole (temp file + fsync +
+    rename). Display configs are content-addressed in it: each distinct
+    config is stored once under ``configs`` by ``display_config_hash`` and
+    layouts map display ids to those hashes, so the panel config most layouts
+    share is written and parsed once. Snapshots in the original flat
+    ``name -> layout`` format still load. ``path + ".journal"``
+    holds one JSON record per save or delete, appended and fsynced, so saving
+    one layout costs the same however many exist. Loading replays the journal
+    over the snapshot; a torn last record from a crash is ignored. Once the
+    journal passes ``COMPACT_RECORDS`` records it is folded into a new
+    snapshot on a background thread.
+
+    Several processes (CLI, GUI, daemon, login hooks) can share the files:
+    every write holds an exclusive flock on ``path + ".lock"`` and reads hold
+    a shared one. Reads are served from memory and the files are re-read only
+    when their stat() changed; ``generation`` counts those re-reads. Bulk
+    writes re-read first and merge, so nobody's layouts get dropped.
+
+    Display-set fingerprint -> names and config hash -> names indexes are
+    kept next to the layouts and updated on every change, so
+    ``names_for_fingerprint`` and ``names_for_display_config`` are dict
+    lookups.
+    """
+
+    def __init__(self, path: str, compact_records: int = COMPACT_RECORDS):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_records = compact_records
+        self.generation = 0
+        self._layouts: Dict[str, Dict] = {}
+        self._by_fingerprint: Dict[str, Dict[str, None]] = {}  # fingerprint -> names, in saved order
+        self._refs: Dict[str, Dict[str, str]] = {}  # name -> display id -> config hash
+        self._by_config: Dict[str, Dict[str, None]] = {}  # config hash -> names
+        self._loaded = False
+        self._stamp: Optional[Tuple] = None  # stamp() when memory last matched the files
+        self._records = 0  # records in the journal
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(path + ".lock")
+        self._compactor: Optional[threading.Thread] = None
+
+    def files(self) -> List[str]:
+        """Paths this store reads and writes: snapshot, journal and lock file"""
+        return [self.path, self.journal_path, self._file_lock.path]
+
+    def load(self) -> Dict[str, Dict]:
+        """Read the snapshot and replay the journal; returns a copy of the layouts"""
+        with self._lock:
+            self._read()
+            return {name: _copy_layout(layout) for name, layout in self._layouts.items()}
+
+    def _read(self):
+        with self._lock, self._file_lock(exclusive=False):
+            layouts, refs = {}, {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    layouts, refs = self._decode_snapshot(json.load(f))
+            records = 0
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as f:
+                    for line in f:
+                        record = self._parse_record(line)
+                        if record is None:
+                            continue
+                        records += 1
+                        self._apply_record(layouts, record)
+                        if record['op'] != 'touch':
+                            refs.pop(record['name'], None)
+            self._set_layouts(layouts, refs)
+            self._loaded = True
+            self._stamp = self.stamp()
+            self._records = records
+            self.generation += 1
+
+    def refresh(self):
+        """Re-read the files if they changed since this process last read or wrote them"""
+        with self._lock:
+            if not self._loaded or self.stamp() != self._stamp:
+                self._read()
+
+    def invalidate(self):
+        """Re-read the files on next access"""
+        with self._lock:
+            self._loaded = False
+
+    @staticmethod
+    def _decode_snapshot(data: Dict) -> Tuple[Dict[str, Dict], Dict[str, Dict[str, str]]]:
+        """Layouts and their config hashes from a parsed snapshot, in either format"""
+        if not isinstance(data.get('version'), int):
+            return data, {}  # flat name -> layout, as written before SNAPSHOT_VERSION 2
+        configs = data.get('configs', {})
+        layouts, refs = {}, {}
+        for name, layout in data.get('layouts', {}).items():
+            layout_refs = layout.get('displays')
+            if not isinstance(layout_refs, dict):
+                layouts[name] = layout
+                continue
+            try:
+                displays = {display_id: configs[ref] for display_id, ref in layout_refs.items()}
+            except KeyError as e:
+                raise ValueError(f"layout '{name}' references unknown display config {e}") from None
+            layouts[name] = dict(layout, displays=displays)
+            refs[name] = layout_refs
+        return layouts, refs
+
+    def _encode_snapshot(self, layouts: Dict[str, Dict]) -> Tuple[bytes, Dict[str, Dict[str, str]]]:
+        """Snapshot bytes for ``layouts``, and their config hashes.
+
+        One config or layout per line, encoded by the C encoder (``indent``
+        would switch json to its pure-Python one).
+        """
+        configs: Dict[str, Dict] = {}
+        lines: List[str] = []
+        refs: Dict[str, Dict[str, str]] = {}
+        memo: Dict[int, Tuple[Dict, str]] = {}  # layouts sharing config objects (imports) hash each once
+        for name, layout in layouts.items():
+            # Hashes are only recomputed for layouts that changed since they were indexed
+            layout_refs = self._refs.get(name) if self._layouts.get(name) is layout else None
+            if layout_refs is None:
+                layout_refs = _display_refs(layout, memo)
+            displays = layout.get('displays')
+            if isinstance(displays, dict):
+                for display_id, ref in layout_refs.items():
+                    configs.setdefault(ref, displays[display_id])
+                layout = dict(layout, displays=layout_refs)
+            lines.append(f"{_ENCODER.encode(name)}: {_ENCODER.encode(layout)}")
+            refs[name] = layout_refs
+        config_lines = [f"{_ENCODER.encode(ref)}: {_ENCODER.encode(config)}" for ref, config in configs.items()]
+        snapshot = (f'{{"version": {SNAPSHOT_VERSION},\n"configs": {{\n' + ",\n".join(config_lines)
+                    + '\n},\n"layouts": {\n' + ",\n".join(lines) + "\n}}\n")
+        return snapshot.encode(), refs
+
+    @staticmethod
+    def _parse_record(line: bytes) -> Optional[Dict]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None  # torn write, or the blank line that seals one
+        if not isinstance(record, dict) or record.get('op') not in ('put', 'delete', 'touch') or 'name' not in record:
+            return None
+        if record['op'] == 'put' and not isinstance(record.get('layout'), dict):
+            return None
+        if record['op'] == 'touch' and not isinstance(record.get('last_used'), str):
+            return None
+        return record
+
+    @staticmethod
+    def _apply_record(layouts: Dict[str, Dict], record: Dict):
+        name = record['name']
+        if record['op'] == 'put':
+            layouts[name] = record['layout']
+        elif record['op'] == 'delete':
+            layouts.pop(name, None)
+        elif name in layouts:
+            layouts[name] = dict(layouts[name], last_used=record['last_used'])
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self.refresh()
+            return list(self._layouts)
+
+    def get(self, name: str) -> Optional[Dict]:
+        """A copy of one layout, or None"""
+        with self._lock:
+            self.refresh()
+            layout = self._layouts.get(name)
+            return _copy_layout(layout) if layout is not None else None
+
+    def get_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            self.refresh()
+            return {name: _copy_layout(layout) for name, layout in self._layouts.items()}
+
+    def names_for_fingerprint(self, fingerprint: str) -> List[str]:
+        """Layouts saved for exactly the display set ``fingerprint``"""
+        with self._lock:
+            self.refresh()
+            return list(self._by_fingerprint.get(fingerprint, ()))
+
+    def names_for_display_config(self, config: Dict, display_id: Optional[str] = None) -> List[str]:
+        """Layouts with a display set up exactly as ``config`` (only ``display_id``, if given)"""
+        ref = display_config_hash(config)
+        with self._lock:
+            self.refresh()
+            names = self._by_config.get(ref, ())
+            if display_id is None:
+                return list(names)
+            return [name for name in names if self._refs[name].get(display_id) == ref]
+
+    def fingerprint_index(self) -> Dict[str, List[str]]:
+        """Every display-set fingerprint with the layouts saved for it"""
+        with self._lock:
+            self.refresh()
+            return {fingerprint: list(names) for fingerprint, names in self._by_fingerprint.items()}
+
+    def names_by_recency(self) -> List[str]:
+        """Names, most recently used first; never-used layouts last, in saved order"""
+        with self._lock:
+            self.refresh()
+            return sorted(self._layouts, key=lambda name: self._layouts[name].get('last_used', ""), reverse=True)
+
+    def stale(self, cutoff: str) -> List[str]:
+        """Layouts last used (or, if never used, created) before the ISO timestamp ``cutoff``"""
+        with self._lock:
+            self.refresh()
+            return [name for name, layout in self._layouts.items() if last_activity(layout) < cutoff]
+
+    def used_between(self, since: str = "", until: str = "") -> List[str]:
+        """Layouts last used at or after ``since`` and before ``until`` (ISO timestamps, "" for open),
+        most recently used first; never-used layouts are left out"""
+        with self._lock:
+            self.refresh()
+            used = {name: layout.get('last_used', "") for name, layout in self._layouts.items()}
+        names = [name for name, last_used in used.items()
+                 if last_used and since <= last_used and (not until or last_used < until)]
+        return sorted(names, key=used.get, reverse=True)
+
+    def put(self, name: str, layout: Dict) -> bool:
+        """Save or replace one layout"""
+        return self._append({'op': 'put', 'name': name, 'layout': layout})
+
+    def delete(self, name: str) -> bool:
+        """Remove one layout"""
+        return self._append({'op': 'delete', 'name': name})
+
+    def touch(self, name: str, last_used: str) -> bool:
+        """Record that a layout was applied, without rewriting the layout itself"""
+        return self._append({'op': 'touch', 'name': name, 'last_used': last_used})
+
+    def update(self, put: Dict[str, Dict], delete: Iterable[str] = ()) -> bool:
+        """Save and delete many layouts in one atomic snapshot write.
+
+        The files are re-read under the lock first, so layouts other
+        processes saved in the meantime are kept.
+        """
+        with self._lock:
+            try:
+                with self._file_lock(exclusive=True):
+                    self.refresh()
+                    layouts = dict(self._layouts)
+                    for name in delete:
+                        layouts.pop(name, None)
+                    layouts.update(put)
+                    refs = self._write_snapshot(layouts)
+                    self._truncate_journal()
+                    self._set_layouts(layouts, refs)
+                    self._stamp = self.stamp()
+            except (OSError, ValueError) as e:
+                print(f"Error saving layouts: {e}")
+                return False
+        return True
+
+    def replace(self, layouts: Dict[str, Dict]) -> bool:
+        """Replace every layout with a fresh snapshot, dropping all others"""
+        with self._lock:
+            try:
+                with self._file_lock(exclusive=True):
+                    refs = self._write_snapshot(layouts)
+                    self._truncate_journal()
+                    self._stamp = self.stamp()
+            except OSError as e:
+                print(f"Error saving layouts: {e}")
+                return False
+            self._set_layouts(dict(layouts), refs)
+            self._loaded = True
+        return True
+
+    def _append(self, record: Dict) -> bool:
+        line = json.dumps(record, separators=(',', ':')).encode() + b"\n"
+        with self._lock:
+            try:
+                with self._file_lock(exclusive=True):
+                    # Memory stays valid only if nobody else wrote since we last looked
+                    current = self._loaded and self.stamp() == self._stamp
+                    with open(self.journal_path, 'ab+') as f:
+                        if f.tell():
+                            f.seek(-1, os.SEEK_END)
+                            if f.read(1) != b"\n":
+                                line = b"\n" + line  # seal a torn record left by a crash
+                        f.write(line)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    if current:
+                        self._stamp = self.stamp()
+                    else:
+                        self._loaded = False
+            except OSError as e:
+                print(f"Error saving layouts: {e}")
+                return False
+            name = record['name']
+            if record['op'] != 'touch':
+                self._unindex(name)
+            self._apply_record(self._layouts, record)
+            if record['op'] == 'put':
+                self._index(name, record['layout'])
+            self._records += 1
+            if self._records >= self.compact_records:
+                self.compact_in_background()
+        return True
+
+    def put_many(self, records: Iterable[Tuple[str, Dict]]) -> bool:
+        """Save layouts from an iterable of (name, layout) in one atomic snapshot write.
+
+        The iterable is consumed before anything is written, so an exception
+        it raises propagates and leaves the store untouched. Records are
+        spooled to a temporary file as they arrive and the snapshot is then
+        written line by line, so besides the layouts already saved only the
+        names and distinct display configs of ``records`` are held in memory.
+        The layouts are re-read from the new snapshot on next access.
+        """
+        configs: Dict[str, Dict] = {}  # config hash -> config, for the snapshot's config table
+        hashed: Dict[int, str] = {}  # id of a config kept in ``configs`` -> its hash
+        offsets: Dict[str, int] = {}  # name -> where its (last) record starts in the spool
+        with tempfile.TemporaryFile() as spool:
+            for name, layout in records:
+                displays = layout.get('displays')
+                if isinstance(displays, dict):
+                    refs = {}
+                    for display_id, config in displays.items():
+                        ref = hashed.get(id(config))
+                        if ref is None:
+                            ref = display_config_hash(config)
+                            if configs.setdefault(ref, config) is config:
+                                hashed[id(config)] = ref  # alive in ``configs``, so the id stays unique
+                        refs[display_id] = ref
+                    layout = dict(layout, displays=refs)
+                offsets[name] = spool.tell()
+                spool.write(_ENCODER.encode(layout).encode() + b"\n")
+
+            with self._lock:
+                try:
+                    with self._file_lock(exclusive=True):
+                        self.refresh()
+                        self._back_up_flat_snapshot()
+                        _write_chunks_atomically(self.path, self._merged_snapshot(spool, offsets, configs))
+                        self._truncate_journal()
+                        self._set_layouts({}, {})
+                        self._loaded = False
+                except (OSError, ValueError) as e:
+                    print(f"Error saving layouts: {e}")
+                    return False
+        return True
+
+    def _merged_snapshot(self, spool, offsets: Dict[str, int], configs: Dict[str, Dict]) -> Iterator[bytes]:
+        """Snapshot lines for the saved layouts with the spooled records put over them.
+
+        Replaced layouts keep their position and new ones follow, as in ``update``.
+        """
+        for name, layout in self._layouts.items():
+            displays = layout.get('displays')
+            if name not in offsets and isinstance(displays, dict):
+                for display_id, ref in self._refs[name].items():
+                    configs.setdefault(ref, displays[display_id])
+        yield f'{{"version": {SNAPSHOT_VERSION},\n"configs": {{\n'.encode()
+        yield ",\n".join(f"{_ENCODER.encode(ref)}: {_ENCODER.encode(config)}"
+                         for ref, config in configs.items()).encode()
+        yield b'\n},\n"layouts": {'
+        names = itertools.chain(self._layouts, (name for name in offsets if name not in self._layouts))
+        for count, name in enumerate(names):
+            offset = offsets.get(name)
+            if offset is None:
+                layout = self._layouts[name]
+                if isinstance(layout.get('displays'), dict):
+                    layout = dict(layout, displays=self._refs[name])
+                line = _ENCODER.encode(layout).encode()
+            else:
+                spool.seek(offset)
+                line = spool.readline().rstrip(b"\n")
+            yield (b",\n" if count else b"\n") + _ENCODER.encode(name).encode() + b": " + line
+        yield b"\n}}\n"
+
+    def compact(self) -> bool:
+        """Fold the journal into a new snapshot.
+
+        The journal is emptied only after the snapshot has been renamed into
+        place; replaying records the snapshot already contains is harmless,
+        so a crash at any point leaves a loadable store.
+        """
+        return self.update({})
+
+    def compact_in_background(self):
+        """Start ``compact`` on a thread unless one is running.
+
+        The thread is not a daemon, so a short-lived process finishes the
+        compaction before it exits.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="layout-compactor")
+        self._compactor.start()
+
+    def wait(self):
+        """Block until a background compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def _set_layouts(self, layouts: Dict[str, Dict], refs: Dict[str, Dict[str, str]]):
+        """Replace the layouts in memory; ``refs`` holds config hashes already known"""
+        self._layouts = layouts
+        self._by_fingerprint = {}
+        self._refs = {}
+        self._by_config = {}
+        for name, layout in layouts.items():
+            self._index(name, layout, refs.get(name))
+
+    def _index(self, name: str, layout: Dict, refs: Optional[Dict[str, str]] = None):
+        fingerprint = display_set_fingerprint(layout.get('displays', {}))
+        self._by_fingerprint.setdefault(fingerprint, {})[name] = None
+        self._refs[name] = _display_refs(layout) if refs is None else refs
+        for ref in self._refs[name].values():
+            self._by_config.setdefault(ref, {})[name] = None
+
+    def _unindex(self, name: str):
+        layout = self._layouts.get(name)
+        if layout is None:
+            return
+        _drop(self._by_fingerprint, display_set_fingerprint(layout.get('displays', {})), name)
+        for ref in self._refs.pop(name, {}).values():
+            _drop(self._by_config, ref, name)
+
+    def _write_snapshot(self, layouts: Dict[str, Dict]) -> Dict[str, Dict[str, str]]:
+        snapshot, refs = self._encode_snapshot(layouts)
+        self._back_up_flat_snapshot()
+        _write_atomically(self.path, snapshot)
+        return refs
+
+    def _back_up_flat_snapshot(self):
+        """Copy a flat snapshot to ``path + ".v1.bak"`` before it is first rewritten.
+
+        Releases before SNAPSHOT_VERSION 2 read a versioned snapshot as a
+        layout called "version" and load nothing; the copy is what they can
+        still read after a downgrade.
+        """
+        backup = self.path + ".v1.bak"
+        if os.path.exists(backup):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.read(len(_VERSIONED_PREFIX))
+        except FileNotFoundError:
+            return
+        if head and head != _VERSIONED_PREFIX:
+            tmp_path = f"{backup}.{os.getpid()}.tmp"
+            shutil.copy2(self.path, tmp_path)
+            os.replace(tmp_path, backup)
+
+    def _truncate_journal(self):
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'wb') as f:
+                os.fsync(f.fileno())
+        self._records = 0
+
+    def stamp(self) -> Tuple:
+        """inode/mtime/size of both files, to notice writes by other processes"""
+        stamp = []
+        for path in (self.path, self.journal_path):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+
+def _drop(index: Dict[str, Dict[str, None]], key: str, name: str):
+    names = index.get(key)
+    if names is not None:
+        names.pop(name, None)
+        if not names:
+            del index[key]
+
+
+def last_activity(layout: Dict) -> str:
+    return layout.get('last_used') or layout.get('created_at', "")
+
+
+class LayoutArchive:
+    """Layouts moved out of the store for lack of use, in one gzip-compressed JSON file.
+
+    Small writes are rare here, so every change rewrites the file (temp file +
+    rename) under an exclusive lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(path + ".lock")
+
+    def load(self) -> Dict[str, Dict]:
+        with self._lock, self._file_lock(exclusive=False):
+            if not os.path.exists(self.path):
+                return {}
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+
+    def add(self, layouts: Dict[str, Dict]) -> bool:
+        """Archive ``layouts``, replacing archived layouts of the same name"""
+        return self._change(lambda archived: archived.update(layouts))
+
+    def remove(self, names: Iterable[str]) -> bool:
+        names = list(names)
+
+        def drop(archived):
+            for name in names:
+                archived.pop(name, None)
+        return self._change(drop)
+
+    def _change(self, change) -> bool:
+        with self._lock:
+            try:
+                with self._file_lock(exclusive=True):
+                    archived = self.load()
+                    change(archived)
+                    _write_atomically(self.path, gzip.compress(
+                        json.dumps(archived, separators=(',', ':')).encode(), mtime=0))
+            except (OSError, ValueError) as e:
+                print(f"Error writing layout archive: {e}")
+                return False
+        return True
+
+
+def _write_atomically(path: str, data: bytes):
+    """Replace ``path`` with ``data`` via a temp file, fsync and rename"""
+    _write_chunks_atomically(path, (data,))
+
+
+def _write_chunks_atomically(path: str, chunks: Iterable[bytes]):
+    """``_write_atomically`` for data produced piece by piece"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:  # also an exception from ``chunks``
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    """Make a rename in ``directory`` durable (no-op where unsupported)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SQLiteLayoutStore:
+    """Saved layouts in a SQLite database, for collections of thousands.
+
+    Same interface as LayoutStore. Each layout is one row holding its JSON,
+    keyed by name and indexed by display-set fingerprint and ``last_used``,
+    so single lookups and listings don't touch the other rows. A
+    ``layout_displays`` table maps every display of every layout to its
+    ``display_config_hash``, indexed by hash. A database
+    that does not exist yet is seeded from ``json_path`` (the JSON store and
+    its journal), which is left in place.
+    """
+
+    SCHEMA_VERSION = 2
+    PUT_BATCH = 500  # records per statement batch in put_many
+    _UPSERT = ("INSERT INTO layouts (name, fingerprint, last_used, data) VALUES (?, ?, ?, ?)"
+               " ON CONFLICT (name) DO UPDATE SET fingerprint = excluded.fingerprint,"
+               " last_used = excluded.last_used, data = excluded.data")
+    _INSERT_DISPLAY = "INSERT INTO layout_displays (name, display_id, config_hash) VALUES (?, ?, ?)"
+
+    def __init__(self, path: str, json_path: Optional[str] = None):
+        self.path = path
+        self.json_path = json_path
+        self.generation = 0
+        self._data_version: Optional[Tuple] = None
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            fresh = not os.path.exists(self.path)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS layouts ("
+                    " name TEXT PRIMARY KEY,"
+                    " fingerprint TEXT NOT NULL,"
+                    " last_used TEXT NOT NULL DEFAULT '',"
+                    " data TEXT NOT NULL)")
+                connection.execute("CREATE INDEX IF NOT EXISTS layouts_fingerprint ON layouts (fingerprint)")
+                connection.execute("CREATE INDEX IF NOT EXISTS layouts_last_used ON layouts (last_used)")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS layout_displays ("
+                    " name TEXT NOT NULL,"
+                    " display_id TEXT NOT NULL,"
+                    " config_hash TEXT NOT NULL,"
+                    " PRIMARY KEY (name, display_id))")
+                connection.execute("CREATE INDEX IF NOT EXISTS layout_displays_config"
+                                   " ON layout_displays (config_hash)")
+                if 0 < version < 2:
+                    rows = connection.execute("SELECT name, data FROM layouts").fetchall()
+                    connection.executemany(self._INSERT_DISPLAY, (
+                        display_row for name, data in rows
+                        for display_row in self._display_rows(name, json.loads(data))))
+                connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self._connection = connection
+            if fresh and self.json_path and os.path.exists(self.json_path):
+                self.migrate_from(LayoutStore(self.json_path))
+        return self._connection
+
+    @staticmethod
+    def _row(name: str, layout: Dict) -> Tuple[str, str, str, str]:
+        return (name, display_set_fingerprint(layout.get('displays', {})),
+                layout.get('last_used', ""), _COMPACT.encode(layout))
+
+    @staticmethod
+    def _display_rows(name: str, layout: Dict,
+                      memo: Optional[Dict[int, Tuple[Dict, str]]] = None) -> List[Tuple[str, str, str]]:
+        return [(name, display_id, ref) for display_id, ref in _display_refs(layout, memo).items()]
+
+    def migrate_from(self, source: LayoutStore) -> bool:
+        """Copy every layout of a JSON store into this database"""
+        try:
+            layouts = source.load()
+        except (OSError, ValueError) as e:
+            print(f"Error migrating layouts from {source.path}: {e}")
+            return False
+        if not self.replace(layouts):
+            return False
+        print(f"Migrated {len(layouts)} layout(s) from {source.path} to {self.path}")
+        return True
+
+    def files(self) -> List[str]:
+        """Paths this store reads and writes: the database and its WAL files"""
+        return [self.path, self.path + "-wal", self.path + "-shm"]
+
+    def load(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._connect().execute("SELECT name, data FROM layouts ORDER BY rowid").fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def names(self) -> List[str]:
+        with self._lock:
+            rows = self._connect().execute("SELECT name FROM layouts ORDER BY rowid").fetchall()
+        return [name for name, in rows]
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connect().execute("SELECT data FROM layouts WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(self) -> Dict[str, Dict]:
+        return self.load()
+
+    def names_for_fingerprint(self, fingerprint: str) -> List[str]:
+        """Layouts saved for exactly the display set ``fingerprint``"""
+        with self._lock:
+            rows = self._connect().execute("SELECT name FROM layouts WHERE fingerprint = ? ORDER BY rowid",
+                                           (fingerprint,)).fetchall()
+        return [name for name, in rows]
+
+    def names_for_display_config(self, config: Dict, display_id: Optional[str] = None) -> List[str]:
+        """Layouts with a display set up exactly as ``config`` (only ``display_id``, if given)"""
+        query = "SELECT DISTINCT name FROM layout_displays WHERE config_hash = ?"
+        params: Tuple = (display_config_hash(config),)
+        if display_id is not None:
+            query += " AND display_id = ?"
+            params += (display_id,)
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [name for name, in rows]
+
+    def fingerprint_index(self) -> Dict[str, List[str]]:
+        """Every display-set fingerprint with the layouts saved for it"""
+        with self._lock:
+            rows = self._connect().execute("SELECT fingerprint, name FROM layouts ORDER BY rowid").fetchall()
+        index: Dict[str, List[str]] = {}
+        for fingerprint, name in rows:
+            index.setdefault(fingerprint, []).append(name)
+        return index
+
+    def names_by_recency(self) -> List[str]:
+        """Names, most recently used first; never-used layouts last, in saved order"""
+        with self._lock:
+            rows = self._connect().execute("SELECT name FROM layouts ORDER BY last_used DESC, rowid").fetchall()
+        return [name for name, in rows]
+
+    def stale(self, cutoff: str) -> List[str]:
+        """Layouts last used (or, if never used, created) before the ISO timestamp ``cutoff``"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT name, last_used, data FROM layouts WHERE last_used < ? ORDER BY rowid", (cutoff,)).fetchall()
+        return [name for name, last_used, data in rows
+                if last_used or last_activity(json.loads(data)) < cutoff]
+
+    def used_between(self, since: str = "", until: str = "") -> List[str]:
+        """Layouts last used at or after ``since`` and before ``until`` (ISO timestamps, "" for open),
+        most recently used first; never-used layouts are left out"""
+        query = "SELECT name FROM layouts WHERE last_used != '' AND last_used >= ?"
+        params: Tuple = (since,)
+        if until:
+            query += " AND last_used < ?"
+            params += (until,)
+        with self._lock:
+            rows = self._connect().execute(query + " ORDER BY last_used DESC", params).fetchall()
+        return [name for name, in rows]
+
+    def put(self, name: str, layout: Dict) -> bool:
+        """Save or replace one layout; a replaced layout keeps its position"""
+        return self._write({name: layout})
+
+    def touch(self, name: str, last_used: str) -> bool:
+        """Record that a layout was applied.
+
+        One UPDATE edits ``last_used`` inside the stored JSON, so a layout
+        another process saved meanwhile is never overwritten with an older copy.
+        """
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.execute("UPDATE layouts SET last_used = ?, data = json_set(data, '$.last_used', ?)"
+                                       " WHERE name = ?", (last_used, last_used, name))
+            except sqlite3.Error as e:
+                print(f"Error saving layouts: {e}")
+                return False
+        return True
+
+    def delete(self, name: str) -> bool:
+        return self._write({}, [name])
+
+    def update(self, put: Dict[str, Dict], delete: Iterable[str] = ()) -> bool:
+        """Save and delete many layouts in one transaction"""
+        return self._write(put, delete)
+
+    def put_many(self, records: Iterable[Tuple[str, Dict]]) -> bool:
+        """Save layouts from an iterable of (name, layout) in one transaction.
+
+        Records are written in batches of ``PUT_BATCH`` as they arrive, so
+        only one batch is held in memory. An exception raised by the
+        iterable rolls the transaction back and propagates.
+        """
+        with self._lock:
+            try:
+                connection = self._connect()
+                memo: Dict[int, Tuple[Dict, str]] = {}  # records sharing config objects (imports) hash each once
+                with connection:
+                    batch = list(itertools.islice(records, self.PUT_BATCH))
+                    while batch:
+                        connection.executemany("DELETE FROM layout_displays WHERE name = ?",
+                                               ((name,) for name, _ in batch))
+                        connection.executemany(self._UPSERT, (self._row(name, layout) for name, layout in batch))
+                        connection.executemany(self._INSERT_DISPLAY, (
+                            row for name, layout in batch for row in self._display_rows(name, layout, memo)))
+                        batch = list(itertools.islice(records, self.PUT_BATCH))
+            except sqlite3.Error as e:
+                print(f"Error saving layouts: {e}")
+                return False
+        return True
+
+    def replace(self, layouts: Dict[str, Dict]) -> bool:
+        """Replace every layout in one transaction"""
+        return self._write(layouts, clear=True)
+
+    def _write(self, put: Dict[str, Dict], delete: Iterable[str] = (), clear: bool = False) -> bool:
+        """Apply saves and deletes (after dropping everything, with ``clear``) in one transaction"""
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    if clear:
+                        connection.execute("DELETE FROM layouts")
+                        connection.execute("DELETE FROM layout_displays")
+                    names = [(name,) for name in delete]
+                    connection.executemany("DELETE FROM layouts WHERE name = ?", names)
+                    names += [(name,) for name in put]
+                    if not clear:
+                        connection.executemany("DELETE FROM layout_displays WHERE name = ?", names)
+                    connection.executemany(self._UPSERT, (self._row(name, layout) for name, layout in put.items()))
+                    connection.executemany(self._INSERT_DISPLAY, (
+                        row for name, layout in put.items() for row in self._display_rows(name, layout)))
+            except sqlite3.Error as e:
+                print(f"Error saving layouts: {e}")
+                return False
+        return True
+
+    def refresh(self):
+        """Bump ``generation`` if another connection committed since the last call"""
+        with self._lock:
+            version = self.stamp()
+            if version != self._data_version:
+                self._data_version = version
+                self.generation += 1
+
+    def invalidate(self):
+        pass  # every read goes to the database
+
+    def stamp(self) -> Tuple:
+        """Changes whenever another connection commits"""
+        with self._lock:
+            return self._connect().execute("PRAGMA data_version").fetchone()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+LAYOUT_STORES = {
+    'json': LayoutStore,
+    'sqlite': SQLiteLayoutStore,
+}
+
+
+def create_layout_store(json_path: str, name: Optional[str] = None):
+    """Layout store called ``name``; defaults to $MONITOR_LAYOUT_STORE, else json.
+
+    The SQLite database sits next to the JSON file (``.sqlite3`` instead of
+    ``.json``) and is seeded from it on first use.
+    """
+    name = name or os.environ.get(LAYOUT_STORE_ENV) or 'json'
+    if name not in LAYOUT_STORES:
+        raise ValueError(f"Unknown layout store '{name}' (choose from {', '.join(LAYOUT_STORES)})")
+    if name == 'sqlite':
+        return SQLiteLayoutStore(os.path.splitext(json_path)[0] + ".sqlite3", json_path=json_path)
+    return LayoutStore(json_path)
@@ -0,0 +1,311 @@
+"""
+Layout Transfer
+Streaming import and export of layouts as a ``{name: layout}`` JSON file.
+Imports are read one record at a time, every record is checked against a
+compiled schema, and name conflicts are settled by a policy instead of a
+prompt. Exports are written one record per line as they are read from the
+store. Either side may be gzip, bz2 or xz compressed.
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from core.layout_store import display_config_hash
+
+CONFLICT_POLICIES = ('skip', 'overwrite', 'rename', 'newest')
+
+# name -> (file extension, magic bytes, opener); the opener takes (path, mode, encoding=...)
+COMPRESSIONS: Dict[str, Tuple[str, bytes, Callable[..., TextIO]]] = {
+    'gzip': ('.gz', b'\x1f\x8b', lambda path, mode, **kwargs: gzip.open(path, mode, compresslevel=6, **kwargs)),
+    'bz2': ('.bz2', b'BZh', bz2.open),
+    'xz': ('.xz', b'\xfd7zXZ\x00', lzma.open),
+}
+
+# Problems kept in ImportResult.errors; the rest are only counted
+MAX_ERRORS = 100
+
+# Characters read at a time; a record larger than this makes the read grow
+READ_CHUNK = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_ENCODER = json.JSONEncoder()
+_NUMBER_LOOKAHEAD = 64  # characters that must follow a number before it is trusted
+
+# validator(value, path, errors) appends "path: problem" for every problem found
+Validator = Callable[[Any, str, List[str]], None]
+
+
+@dataclass
+class ImportResult:
+    """What an import did, record by record"""
+    imported: List[str] = field(default_factory=list)  # names as saved
+    renamed: List[Tuple[str, str]] = field(default_factory=list)  # (name in the file, name saved as)
+    skipped: List[str] = field(default_factory=list)  # conflicts that kept the saved layout
+    rejected: List[str] = field(default_factory=list)  # records that failed validation
+    errors: List[str] = field(default_factory=list)  # "path: problem", the first MAX_ERRORS of them
+    error_count: int = 0  # problems found, including those past MAX_ERRORS
+    fatal: str = ""  # why nothing was imported (unreadable file, malformed JSON, failed write)
+
+
+def iter_json_object(f: TextIO, chunk_size: int = READ_CHUNK) -> Iterator[Tuple[str, Any]]:
+    """Yield the (key, value) pairs of the JSON object in ``f`` without reading it whole.
+
+    Only the value being decoded is held in memory, so a file of any size
+    costs about as much as its largest record. Raises ValueError (with the
+    character offset) on malformed JSON.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, dropped, eof = "", 0, 0, False
+
+    def fill(size: int = chunk_size) -> bool:
+        nonlocal buf, pos, dropped, eof
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+            return False
+        dropped += pos
+        buf, pos = buf[pos:] + chunk, 0
+        return True
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof or not fill():
+                return buf[pos:pos + 1]
+
+    def expect(char: str):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError(f"expected '{char}' at offset {dropped + pos}")
+        pos += 1
+
+    def value() -> Any:
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                decoded, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # Incomplete rather than malformed until the file runs out;
+                # read at least as much again so a huge value costs O(n)
+                if eof or not fill(max(chunk_size, len(buf) - pos)):
+                    raise ValueError(f"{e.msg} (offset {dropped + e.pos})") from None
+                continue
+            # A number cut by the chunk boundary ("12|34", "1.|5") decodes early
+            if (not eof and type(decoded) in (int, float) and len(buf) - end < _NUMBER_LOOKAHEAD
+                    and fill()):
+                continue
+            pos = end
+            return decoded
+
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str):
+            raise ValueError(f"expected a string key at offset {dropped + pos}")
+        expect(':')
+        yield key, value()
+        if peek() == ',':
+            pos += 1
+        else:
+            expect('}')
+            return
+
+
+# Schema building blocks; each returns a Validator built once. Values come
+# from json, so exact type() checks suffice (and keep true from passing as 1).
+
+def _of_type(kind: type, label: str) -> Validator:
+    def check(value, path, errors):
+        if type(value) is not kind:
+            errors.append(f"{path}: expected {label}, got {json.dumps(value)[:40]}")
+    return check
+
+
+def _int_pair(minimum: Optional[int] = None) -> Validator:
+    def check(value, path, errors):
+        if type(value) is not list or len(value) != 2 or type(value[0]) is not int or type(value[1]) is not int:
+            errors.append(f"{path}: expected [int, int], got {json.dumps(value)[:40]}")
+        elif minimum is not None and min(value) < minimum:
+            errors.append(f"{path}: values must be at least {minimum}")
+    return check
+
+
+def _positive_int() -> Validator:
+    def check(value, path, errors):
+        if type(value) is not int:
+            errors.append(f"{path}: expected an integer, got {json.dumps(value)[:40]}")
+        elif value <= 0:
+            errors.append(f"{path}: must be positive")
+    return check
+
+
+def _one_of(*choices) -> Validator:
+    def check(value, path, errors):
+        if type(value) is bool or value not in choices:
+            errors.append(f"{path}: expected one of {', '.join(map(str, choices))}, got {json.dumps(value)[:40]}")
+    return check
+
+
+def _timestamp(allow_empty: bool = False) -> Validator:
+    def check(value, path, errors):
+        if type(value) is not str:
+            errors.append(f"{path}: expected an ISO timestamp string")
+        elif value or not allow_empty:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                errors.append(f"{path}: not an ISO timestamp: {value[:40]!r}")
+    return check
+
+
+def _record(required: Dict[str, Validator], optional: Dict[str, Validator],
+            extra_keys: bool = False) -> Validator:
+    fields = {**required, **optional}
+
+    def check(value, path, errors):
+        if type(value) is not dict:
+            errors.append(f"{path}: expected an object")
+            return
+        for key in required:
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, item in value.items():
+            validator = fields.get(key)
+            if validator is not None:
+                validator(item, f"{path}.{key}", errors)
+            elif not extra_keys:
+                errors.append(f"{path}: unknown field '{key}'")
+    return check
+
+
+def _map_of(validator: Validator) -> Validator:
+    def check(value, path, errors):
+        if type(value) is not dict:
+            errors.append(f"{path}: expected an object")
+            return
+        for key, item in value.items():
+            validator(item, f"{path}[{json.dumps(key)}]", errors)
+    return check
+
+
+# Display configs may carry keys this version does not know; layouts may not,
+# since they become LayoutProfile fields
+DISPLAY_CONFIG = _record(required={}, optional={
+    'resolution': _int_pair(minimum=1),
+    'position': _int_pair(),
+    'rotation': _one_of(0, 90, 180, 270),
+    'scaling': _of_type(bool, "true or false"),
+    'hz': _positive_int(),
+    'color_depth': _positive_int(),
+    'is_main': _of_type(bool, "true or false"),
+    'enabled': _of_type(bool, "true or false"),
+}, extra_keys=True)
+
+LAYOUT = _record(required={
+    'displays': _map_of(DISPLAY_CONFIG),
+    'created_at': _timestamp(),
+}, optional={
+    'name': _of_type(str, "a string"),
+    'description': _of_type(str, "a string"),
+    'last_used': _timestamp(allow_empty=True),
+})
+
+
+def iter_layout_records(f: TextIO, result: ImportResult) -> Iterator[Tuple[str, Dict]]:
+    """Valid layouts in an exported file, as (name, layout dict).
+
+    Bad records are skipped, named in ``result.rejected`` and described in
+    ``result.errors`` with their path (the first MAX_ERRORS problems; all are
+    counted in ``result.error_count``). Identical display configs are shared
+    between records, so a large fleet export keeps one copy of each.
+    Malformed JSON raises ValueError.
+    """
+    configs: Dict[str, Dict] = {}
+    for name, layout in iter_json_object(f):
+        path = f"$[{json.dumps(name)}]"
+        problems: List[str] = []
+        if not name:
+            problems.append(f"{path}: empty layout name")
+        LAYOUT(layout, path, problems)
+        if problems:
+            result.rejected.append(name)
+            result.errors.extend(problems[:MAX_ERRORS - len(result.errors)])
+            result.error_count += len(problems)
+            continue
+        displays = {display_id: configs.setdefault(display_config_hash(config), config)
+                    for display_id, config in layout['displays'].items()}
+        yield name, {'name': name, 'description': layout.get('description', ""), 'displays': displays,
+                     'created_at': layout['created_at'], 'last_used': layout.get('last_used', "")}
+
+
+def compression_for(path: str) -> Optional[str]:
+    """The COMPRESSIONS entry named by ``path``'s extension, or None for plain JSON"""
+    for name, (extension, _, _) in COMPRESSIONS.items():
+        if path.endswith(extension):
+            return name
+    return None
+
+
+def open_layout_file(path: str, mode: str = 'r', compression: Optional[str] = None) -> TextIO:
+    """Open an export for reading ('r') or writing ('w') as text.
+
+    Reading recognises compressed files by their magic bytes, whatever they
+    are called. Writing compresses with ``compression`` (default: the one
+    the extension names).
+    """
+    if mode == 'r':
+        with open(path, 'rb') as f:
+            head = f.read(8)
+        compression = next((name for name, (_, magic, _) in COMPRESSIONS.items() if head.startswith(magic)), None)
+    elif compression is None:
+        compression = compression_for(path)
+    if compression is None:
+        return open(path, mode, encoding='utf-8')
+    return COMPRESSIONS[compression][2](path, mode + 't', encoding='utf-8')
+
+
+def write_layout_file(path: str, records: Iterable[Tuple[str, Dict]], compression: Optional[str] = None) -> int:
+    """Write (name, layout) pairs to ``path`` as the ``{name: layout}`` object import reads.
+
+    One record per line, encoded as it arrives, so only the record being
+    written is in memory. The file is written under a temp name and renamed
+    into place, so a failed export leaves no partial file. Returns how many
+    records were written; raises OSError, or whatever ``records`` or
+    encoding a layout raises.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with open_layout_file(tmp_path, 'w', compression or compression_for(path)) as f:
+            f.write("{")
+            for name, layout in records:
+                f.write(("," if count else "") + "\n" + _ENCODER.encode(name) + ": " + _ENCODER.encode(layout))
+                count += 1
+            f.write("\n}\n")
+        os.replace(tmp_path, path)
+    except BaseException:  # also a failing ``records`` or an unencodable layout
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+def unique_name(name: str, taken: Callable[[str], bool]) -> str:
+    """``name (2)``, ``name (3)``, ... whichever is free first"""
+    n = 2
+    while taken(f"{name} ({n})"):
+        n += 1
+    return f"{name} ({n})"
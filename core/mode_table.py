@@ -0,0 +1,200 @@
+"""
+Display Mode Table
+Compact, column-oriented storage for every mode a display advertises.
+"""
+
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# One `mode N:` line; hz may be N/A, scaling and the current marker are optional
+_MODE_LINE_RE = re.compile(
+    r'^mode (\d+): res:(\d+)x(\d+)(?: hz:(\d+|N/A))?(?: color_depth:(\d+))?'
+    r'( scaling:on)?( <-- current mode)?',
+    re.MULTILINE
+)
+_MODE_RES_RE = re.compile(r'^mode \d+: res:(\d+)x(\d+)', re.MULTILINE)
+
+
+class DisplayMode(NamedTuple):
+    """One `mode N:` line from displayplacer list output"""
+    mode_id: int
+    resolution: Tuple[int, int]
+    hz: int  # 0 when displayplacer reports N/A
+    color_depth: int
+    scaling: bool
+    current: bool
+
+
+class DisplayModeTable:
+    """Array-backed mode table with hash indexes for validity and hz queries.
+
+    Modes are stored row-major in a single typed array (six ints per mode), so
+    a display with hundreds of modes costs a few bytes per mode instead of one
+    object each. A table built from mode lines keeps the raw text and only
+    decodes it into rows on the first query, and the validity index is built
+    on the first lookup, so a detection that never inspects modes pays for
+    neither.
+    """
+
+    _STRIDE = 6  # mode_id, width, height, hz, color_depth, flags
+    _SCALING = 1
+    _CURRENT = 2
+
+    __slots__ = ('_source', '_rows', '_valid', '_hz_by_res', '_current_row')
+
+    def __init__(self):
+        self._source = ""  # undecoded mode lines, see from_mode_lines
+        self._rows = array('I')
+        # (w, h, hz, color_depth, scaling) with None as a wildcard in any of
+        # the last three slots, so every partial query is one set lookup
+        self._valid: Optional[set] = None
+        # (w, h) -> {hz: None}; dict keeps first-seen order without duplicates
+        self._hz_by_res: Dict[Tuple[int, int], Dict[int, None]] = {}
+        self._current_row = -1
+
+    @classmethod
+    def from_mode_lines(cls, lines: Iterable[str]) -> "DisplayModeTable":
+        """Build a table from stripped `mode N: ...` lines (decoded lazily)."""
+        table = cls()
+        table._source = "\n".join(lines)
+        return table
+
+    def _decode(self):
+        """Decode pending mode lines into rows in one regex pass."""
+        source, self._source = self._source, ""
+        rows = self._rows
+        hz_by_res = self._hz_by_res
+        for mode_id, w, h, hz, depth, scaling, current in _MODE_LINE_RE.findall(source):
+            w, h = int(w), int(h)
+            hz = int(hz) if hz and hz != "N/A" else 0
+            flags = (self._SCALING if scaling else 0) | (self._CURRENT if current else 0)
+            if current:
+                self._current_row = len(rows) // self._STRIDE
+            rows.extend((int(mode_id), w, h, hz, int(depth) if depth else 8, flags))
+            res_rates = hz_by_res.get((w, h))
+            if res_rates is None:
+                hz_by_res[(w, h)] = {hz: None}
+            else:
+                res_rates[hz] = None
+        self._valid = None
+
+    def to_mode_lines(self) -> str:
+        """Render the table back to `mode N: ...` lines (inverse of from_mode_lines)."""
+        if self._source or not self._rows:
+            return self._source
+        lines = []
+        for mode in self:
+            w, h = mode.resolution
+            line = (f"mode {mode.mode_id}: res:{w}x{h} hz:{mode.hz or 'N/A'} "
+                    f"color_depth:{mode.color_depth}")
+            if mode.scaling:
+                line += " scaling:on"
+            if mode.current:
+                line += " <-- current mode"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def add(self, mode_id: int, width: int, height: int, hz: int = 0,
+            color_depth: int = 8, scaling: bool = False, current: bool = False):
+        """Append one mode to the table"""
+        if self._source:
+            self._decode()
+        if current:
+            self._current_row = len(self)
+        flags = (self._SCALING if scaling else 0) | (self._CURRENT if current else 0)
+        self._rows.extend((mode_id, width, height, hz, color_depth, flags))
+        self._hz_by_res.setdefault((width, height), {})[hz] = None
+        self._valid = None
+
+    def _validity_index(self) -> set:
+        if self._source:
+            self._decode()
+        if self._valid is None:
+            rows, stride = self._rows, self._STRIDE
+            valid = set()
+            add_keys = valid.update
+            for w, h, hz, d, flags in zip(rows[1::stride], rows[2::stride], rows[3::stride],
+                                          rows[4::stride], rows[5::stride]):
+                sc = bool(flags & self._SCALING)
+                add_keys(((w, h, hz, d, sc), (w, h, hz, d, None), (w, h, hz, None, sc),
+                          (w, h, hz, None, None), (w, h, None, d, sc), (w, h, None, d, None),
+                          (w, h, None, None, sc), (w, h, None, None, None)))
+            self._valid = valid
+        return self._valid
+
+    def __len__(self) -> int:
+        if self._source:
+            self._decode()
+        return len(self._rows) // self._STRIDE
+
+    def __bool__(self) -> bool:
+        return bool(self._source or self._rows)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DisplayModeTable):
+            return NotImplemented
+        if self._source:
+            self._decode()
+        if other._source:
+            other._decode()
+        return self._rows == other._rows
+
+    def __repr__(self) -> str:
+        return f"DisplayModeTable({len(self)} modes, {len(self.resolutions())} resolutions)"
+
+    def __iter__(self) -> Iterator[DisplayMode]:
+        for row in range(len(self)):
+            yield self.mode(row)
+
+    def mode(self, row: int) -> DisplayMode:
+        """Return the mode stored at ``row``"""
+        if self._source:
+            self._decode()
+        start = row * self._STRIDE
+        mode_id, w, h, hz, depth, flags = self._rows[start:start + self._STRIDE]
+        return DisplayMode(
+            mode_id=mode_id,
+            resolution=(w, h),
+            hz=hz,
+            color_depth=depth,
+            scaling=bool(flags & self._SCALING),
+            current=bool(flags & self._CURRENT),
+        )
+
+    def current_mode(self) -> Optional[DisplayMode]:
+        """Return the mode marked "<-- current mode", if any"""
+        if self._source:
+            self._decode()
+        if self._current_row < 0:
+            return None
+        return self.mode(self._current_row)
+
+    def is_valid(self, resolution: Tuple[int, int], hz: Optional[int] = None,
+                 color_depth: Optional[int] = None, scaling: Optional[bool] = None) -> bool:
+        """Check whether a mode combination exists; None matches anything."""
+        w, h = resolution
+        if scaling is not None:
+            scaling = bool(scaling)
+        return (w, h, hz, color_depth, scaling) in self._validity_index()
+
+    def resolutions(self) -> List[Tuple[int, int]]:
+        """Distinct resolutions in the order displayplacer lists them"""
+        if self._source:
+            # Cheaper than a full decode: dedup the raw strings, convert once each
+            return [(int(w), int(h)) for w, h in dict.fromkeys(_MODE_RES_RE.findall(self._source))]
+        return list(self._hz_by_res)
+
+    def hz_values(self, resolution: Tuple[int, int], scaling: Optional[bool] = None) -> List[int]:
+        """Refresh rates available at ``resolution``, highest first."""
+        if self._source:
+            self._decode()
+        rates = self._hz_by_res.get(tuple(resolution))
+        if not rates:
+            return []
+        if scaling is None:
+            return sorted(rates, reverse=True)
+        w, h = resolution
+        valid = self._validity_index()
+        return sorted((hz for hz in rates if (w, h, hz, None, bool(scaling)) in valid),
+                      reverse=True)
@@ -0,0 +1,166 @@
+"""
+Hot-plug Rules
+Map a set of connected displays to the saved layout that should be applied for it.
+"""
+
+import contextlib
+import json
+import os
+import sys
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.advanced_display_manager import AdvancedDisplayManager, display_set_fingerprint
+
+
+@dataclass
+class HotplugRule:
+    """Apply ``layout`` whenever exactly ``displays`` are connected"""
+    layout: str
+    displays: List[str] = field(default_factory=list)
+
+    @property
+    def fingerprint(self) -> str:
+        return display_set_fingerprint(self.displays)
+
+
+class RuleEngine:
+    """Precompiled display-set -> layout lookup.
+
+    Every rule is keyed by the fingerprint of its display set, so matching the
+    connected displays is a single dict lookup however many rules exist.
+    Explicit rules (``~/.monitor_rules.json``) win; otherwise a saved layout
+    matches the set of displays it was saved with, as long as no other layout
+    was saved for the same set. ``refresh`` recompiles once the rules file or
+    the saved layouts change, for long-running callers like ``watch``.
+    """
+
+    RULES_FILE = os.path.expanduser("~/.monitor_rules.json")
+
+    def __init__(self, manager: AdvancedDisplayManager):
+        self.manager = manager
+        self.rules: List[HotplugRule] = []
+        self._table: Dict[str, str] = {}
+        self.ambiguous: Dict[str, List[str]] = {}  # fingerprint -> layouts needing a rule
+        self._compiled_stamp: Optional[Tuple] = None
+        self.load_rules()
+
+    def _sources_stamp(self) -> Tuple:
+        """Changes whenever the rules file or the layout store does"""
+        try:
+            st = os.stat(self.RULES_FILE)
+            rules = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            rules = None
+        return rules, self.manager.layout_store.stamp()
+
+    def refresh(self) -> bool:
+        """Reload and recompile if the rules or layouts changed since the last compile"""
+        if self._sources_stamp() == self._compiled_stamp:
+            return False
+        self.load_rules()
+        return True
+
+    def compile(self):
+        """Rebuild the lookup table from the rules and the saved layouts"""
+        # Taken first, so a change made while compiling is seen by the next refresh
+        stamp = self._sources_stamp()
+        implicit = {fingerprint: names for fingerprint, names in self.manager.layouts_by_fingerprint().items()
+                    if fingerprint}
+
+        table = {fingerprint: names[0] for fingerprint, names in implicit.items() if len(names) == 1}
+        for rule in self.rules:
+            table[rule.fingerprint] = rule.layout
+        self.ambiguous = {fingerprint: names for fingerprint, names in implicit.items()
+                          if len(names) > 1 and fingerprint not in table}
+        self._table = table
+        self._compiled_stamp = stamp
+
+    def match(self, display_ids: Iterable[str]) -> Optional[str]:
+        """Name of the layout for exactly these displays, if any"""
+        return self._table.get(display_set_fingerprint(display_ids))
+
+    def table(self) -> Dict[str, str]:
+        """The compiled fingerprint -> layout table"""
+        return dict(self._table)
+
+    def add_rule(self, layout: str, displays: Iterable[str]) -> HotplugRule:
+        """Add (or replace) the rule for a display set and save"""
+        rule = HotplugRule(layout=layout, displays=sorted(displays))
+        self.rules = [r for r in self.rules if r.fingerprint != rule.fingerprint]
+        self.rules.append(rule)
+        self.save_rules()
+        return rule
+
+    def remove_rules(self, layout: str) -> int:
+        """Remove every explicit rule pointing at ``layout``; return how many"""
+        kept = [rule for rule in self.rules if rule.layout != layout]
+        removed = len(self.rules) - len(kept)
+        if removed:
+            self.rules = kept
+            self.save_rules()
+        return removed
+
+    @classmethod
+    def read_rules(cls) -> List[HotplugRule]:
+        """Explicit rules from disk, without compiling anything"""
+        if not os.path.exists(cls.RULES_FILE):
+            return []
+        try:
+            with open(cls.RULES_FILE, 'r') as f:
+                return [HotplugRule(**data) for data in json.load(f)]
+        except Exception as e:
+            print(f"Error loading rules: {e}")
+            return []
+
+    def load_rules(self):
+        """Load explicit rules from disk and compile"""
+        self.rules = self.read_rules()
+        self.compile()
+
+    def save_rules(self):
+        """Save explicit rules to disk and recompile"""
+        try:
+            with open(self.RULES_FILE, 'w') as f:
+                json.dump([asdict(rule) for rule in self.rules], f, indent=2)
+        except Exception as e:
+            print(f"Error saving rules: {e}")
+        self.compile()
+
+
+class HotplugAutoApplier:
+    """Apply the matching layout when the set of connected displays changes.
+
+    Meant to be fed the events of a DisplayWatcher, whose settle period is
+    the debounce: a dock that flaps while connecting yields one event and at
+    most one apply. Events that leave the display set unchanged (mode or
+    origin changes, including the ones an apply itself causes) are ignored.
+    """
+
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+        self.manager = engine.manager
+        self._last_fingerprint = (display_set_fingerprint(self.manager.displays)
+                                  if self.manager.displays else None)
+
+    def handle_event(self, event: Dict) -> Optional[Dict]:
+        """Apply a layout if the display set changed; return an event describing it"""
+        fingerprint = display_set_fingerprint(self.manager.displays)
+        if self._last_fingerprint is None:
+            # First event: reconstruct the set the watcher started from
+            before = set(self.manager.displays) - {display['id'] for display in event.get('added', [])}
+            self._last_fingerprint = display_set_fingerprint(before | set(event.get('removed', [])))
+        if fingerprint == self._last_fingerprint:
+            return None
+        self._last_fingerprint = fingerprint
+
+        # Pick up rules added and layouts saved or deleted since the watch started
+        self.engine.refresh()
+        layout = self.engine.match(self.manager.displays)
+        if layout is None:
+            return {'event': 'no_matching_layout', 'time': event.get('time'),
+                    'displays': sorted(self.manager.displays)}
+        # The manager prints progress; keep stdout for events
+        with contextlib.redirect_stdout(sys.stderr):
+            ok = self.manager.apply_layout(layout)
+        return {'event': 'layout_applied', 'time': event.get('time'), 'layout': layout, 'ok': ok}
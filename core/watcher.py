@@ -0,0 +1,150 @@
+"""
+Display Watcher
+Adaptive polling for monitor hot-plug and mode changes, emitting coalesced diffs.
+"""
+
+import contextlib
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+
+from core.advanced_display_manager import AdvancedDisplayManager, Display
+
+# Display fields reported in "changed" entries
+_WATCHED_FIELDS = ('resolution', 'hz', 'color_depth', 'scaling', 'current_position',
+                   'rotation', 'enabled', 'is_main')
+
+
+def _describe(display: Display) -> Dict:
+    return {
+        'id': display.id,
+        'name': display.name,
+        'resolution': list(display.resolution),
+        'hz': display.hz,
+        'position': list(display.current_position),
+    }
+
+
+def diff_event(before: Dict[str, Display], after: Dict[str, Display]) -> Optional[Dict]:
+    """Net change between two display sets as one event dict, or None if equal"""
+    added = [_describe(after[display_id]) for display_id in after if display_id not in before]
+    removed = [display_id for display_id in before if display_id not in after]
+    changed = []
+    for display_id, display in after.items():
+        old = before.get(display_id)
+        if old is None or old is display or old == display:
+            continue
+        changes = {name: [getattr(old, name), getattr(display, name)]
+                   for name in _WATCHED_FIELDS if getattr(old, name) != getattr(display, name)}
+        if changes:
+            changed.append({'id': display_id, 'name': display.name, 'changes': changes})
+    if not (added or removed or changed):
+        return None
+    return {
+        'event': 'displays_changed',
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+    }
+
+
+class DisplayWatcher:
+    """Poll displayplacer on an adaptive schedule and yield coalesced diffs.
+
+    The interval drops to ``min_interval`` after any change and doubles
+    (up to ``max_interval``) while nothing changes. Changes are held back
+    until the topology has been stable for ``settle`` seconds and then
+    reported as one net diff, so a dock reconnect that flaps through several
+    intermediate states produces a single event. Between full detections a
+    poll first compares the cheap topology fingerprint and skips spawning
+    displayplacer if it is unchanged; a full detection still runs at least
+    every ``max_interval`` seconds.
+    """
+
+    def __init__(self, manager: Optional[AdvancedDisplayManager] = None,
+                 min_interval: float = 1.0, max_interval: float = 30.0,
+                 settle: float = 3.0, backoff: float = 2.0,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.manager = manager or AdvancedDisplayManager(use_detection_cache=False)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.settle = settle
+        self.backoff = backoff
+        self._sleep = sleep
+        self._clock = clock
+        # Counters for measuring how cheap watching is
+        self.polls = 0
+        self.detections = 0
+        self.events_emitted = 0
+        self._resync = False
+
+    def resync(self):
+        """Start the next diff from the displays as they are after the event just yielded.
+
+        Call it after changing the displays in response to an event (an
+        auto-apply), so the change made on purpose is not reported back as a
+        new one.
+        """
+        self._resync = True
+
+    def _detect(self) -> Optional[Dict[str, Display]]:
+        """Run displayplacer; None if detection failed (errors are printed by the manager)"""
+        self.detections += 1
+        # Manager diagnostics go to stderr so stdout carries only events
+        with contextlib.redirect_stdout(sys.stderr):
+            displays = self.manager.detect_displays(use_cache=False)
+        return dict(displays) if displays else None
+
+    def events(self) -> Iterator[Dict]:
+        """Yield change events forever (until the caller stops iterating)"""
+        current = self._detect() or {}
+        fingerprint = self.manager.backend.fingerprint()
+        last_detection = self._clock()
+        burst_baseline: Optional[Dict[str, Display]] = None
+        last_change = 0.0
+        interval = self.min_interval
+
+        while True:
+            self._sleep(interval)
+            self.polls += 1
+            now = self._clock()
+
+            new_fingerprint = self.manager.backend.fingerprint()
+            if (fingerprint and new_fingerprint == fingerprint and burst_baseline is None
+                    and now - last_detection < self.max_interval):
+                interval = min(interval * self.backoff, self.max_interval)
+                continue
+            fingerprint = new_fingerprint
+
+            detected = self._detect()
+            last_detection = now
+            if detected is None:
+                # Keep the last good state; a failed run is not a topology change
+                interval = self.min_interval if burst_baseline is not None else interval
+                continue
+            previous, current = current, detected
+            if self.manager.last_diff:
+                if burst_baseline is None:
+                    burst_baseline = previous
+                last_change = now
+                interval = self.min_interval
+                continue
+
+            if burst_baseline is not None and now - last_change >= self.settle:
+                event = diff_event(burst_baseline, current)
+                burst_baseline = None
+                if event:
+                    self.events_emitted += 1
+                    yield event
+                    if self._resync:
+                        self._resync = False
+                        current = self._detect() or current
+                        fingerprint = self.manager.backend.fingerprint()
+                        last_detection = self._clock()
+            if burst_baseline is None:
+                interval = min(interval * self.backoff, self.max_interval)
+            else:
+                interval = self.min_interval
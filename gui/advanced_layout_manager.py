@@ -6,10 +6,12 @@ Tkinter-based interface for managing monitor layouts with drag-and-drop position
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, font
 from typing import Dict, List, Optional, Tuple
-import json
-from datetime import datetime
+from dataclasses import replace
 
-from core.advanced_display_manager import AdvancedDisplayManager, Display, LayoutProfile
+from core.advanced_display_manager import AdvancedDisplayManager, ApplyReport, Display, DisplayDiff
+from core.async_display_manager import AsyncDisplayManager
+from core.backends import DisplayBackend, create_backend
+from gui.async_bridge import TkAsyncBridge
 from utils.helpers import is_hidpi_recommended
 
 # Canvas coordinate constants — display (0,0) maps to this canvas position.
@@ -17,6 +19,9 @@ from utils.helpers import is_hidpi_recommended
 _CANVAS_ORIGIN_X = 100   # px from left edge
 _CANVAS_MARGIN_Y = 50    # px from bottom edge to display y=0
 
+# Offered when displayplacer did not report a mode table for the display
+_FALLBACK_HZ_VALUES = ["30", "48", "60", "75", "90", "120", "144", "165", "240"]
+
 
 def _display_to_canvas(display_x: int, display_y: int, display_h: int,
                        canvas_h: int, scale: float) -> Tuple[float, float]:
@@ -206,11 +211,9 @@ class DisplayConfigPanel(ttk.Frame):
         hz_frame.pack(fill="x", padx=5, pady=2)
         ttk.Label(hz_frame, text="Refresh:", width=12).pack(side="left")
         self.vars['hz'] = tk.StringVar(value=str(self.display.hz))
-        hz_combo = ttk.Combobox(hz_frame, textvariable=self.vars['hz'],
-                                values=["30", "48", "60", "75", "90", "120", "144", "165", "240"],
-                                width=8)
-        hz_combo.pack(side="left", padx=5)
-        hz_combo.bind("<<ComboboxSelected>>", self._on_change)
+        self._hz_combo = ttk.Combobox(hz_frame, textvariable=self.vars['hz'], width=8)
+        self._hz_combo.pack(side="left", padx=5)
+        self._hz_combo.bind("<<ComboboxSelected>>", self._on_change)
 
         # HiDPI scaling with auto-recommendation
         scaling_frame = ttk.Frame(self)
@@ -218,10 +221,11 @@ class DisplayConfigPanel(ttk.Frame):
         self.vars['scaling'] = tk.BooleanVar(value=self.display.scaling)
         ttk.Checkbutton(scaling_frame, text="HiDPI Scaling",
                         variable=self.vars['scaling'],
-                        command=self._on_change).pack(side="left")
+                        command=self._on_scaling_change).pack(side="left")
         ttk.Label(scaling_frame, textvariable=self._hidpi_hint_var,
                   foreground="gray", font=("Arial", 8)).pack(side="left", padx=4)
         self._update_hidpi_hint()
+        self._update_hz_values()
 
         # Main display toggle
         main_frame = ttk.Frame(self)
@@ -241,6 +245,29 @@ class DisplayConfigPanel(ttk.Frame):
         recommended = is_hidpi_recommended(resolution)
         self._hidpi_hint_var.set("(recommended)" if recommended else "(optional)")
 
+    def _selected_resolution(self) -> Tuple[int, int]:
+        try:
+            w, h = self.vars['resolution'].get().replace("×", "x").split("x")
+            return int(w), int(h)
+        except (ValueError, AttributeError):
+            return self.display.resolution
+
+    def _update_hz_values(self):
+        """Offer only the refresh rates the display supports at the selected mode."""
+        rates = self.display.modes.hz_values(self._selected_resolution(),
+                                             self.vars['scaling'].get())
+        if not rates:
+            self._hz_combo.configure(values=_FALLBACK_HZ_VALUES)
+            return
+        values = [str(hz) for hz in rates if hz]
+        self._hz_combo.configure(values=values)
+        if values and self.vars['hz'].get() not in values:
+            self.vars['hz'].set(values[0])
+
+    def _on_scaling_change(self):
+        self._update_hz_values()
+        self._on_change()
+
     def _on_resolution_change(self, event=None):
         """On resolution change: auto-suggest HiDPI, then notify parent."""
         res_str = self.vars['resolution'].get()
@@ -252,6 +279,7 @@ class DisplayConfigPanel(ttk.Frame):
         except (ValueError, AttributeError):
             pass
         self._update_hidpi_hint()
+        self._update_hz_values()
         self._on_change(event)
 
     def _on_change(self, event=None):
@@ -282,19 +310,26 @@ class DisplayConfigPanel(ttk.Frame):
 class AdvancedMonitorLayoutManager:
     """Main application window."""
 
-    def __init__(self):
+    def __init__(self, backend: Optional[DisplayBackend] = None):
         self.root = tk.Tk()
         self.root.title("Monitor Layout Manager")
         self.root.geometry("1200x800")
         self.root.minsize(900, 600)
 
-        self.display_manager = AdvancedDisplayManager()
+        self.display_manager = AdvancedDisplayManager(backend=backend or create_backend())
+        # displayplacer runs on a background asyncio loop so the window stays live
+        self.async_manager = AsyncDisplayManager(self.display_manager)
+        self.bridge = TkAsyncBridge(self.root)
+        self._detection = None  # in-flight refresh, if any
+        self._applying = None  # in-flight apply, if any
+        self._saving = None  # in-flight detection for a save, if any
 
         self.canvas: Optional[tk.Canvas] = None
         self.draggable_displays: Dict[str, DraggableDisplay] = {}
         self.config_panels: Dict[str, DisplayConfigPanel] = {}
         self.current_layout_name = tk.StringVar()
         self._unsaved_changes = False
+        self._config_separators: Dict[str, ttk.Separator] = {}
         self.scale_label: Optional[ttk.Label] = None
 
         self._setup_ui()
@@ -461,37 +496,107 @@ class AdvancedMonitorLayoutManager:
     # ── Display management ───────────────────────────────────────────────────
 
     def refresh_displays(self):
+        if self._detection is not None and not self._detection.done():
+            return
+        if self._applying is not None and not self._applying.done():
+            return
         self.status_var.set("Detecting displays…")
-        self.root.update()
-        displays = self.display_manager.detect_displays()
+        if not self.config_panels:
+            self._stream_displays()
+            return
+        self._detection = self.bridge.submit(self.async_manager.detect_changes(),
+                                             on_done=self._on_displays_detected,
+                                             on_error=self._on_detection_error)
+
+    def _on_displays_detected(self, detection: Tuple[Dict[str, Display], DisplayDiff]):
+        displays, diff = detection
         if not displays:
-            self.status_var.set("No displays detected")
-            messagebox.showwarning(
-                "No Displays Detected",
-                "No displays were found.\n\n"
-                "Make sure displayplacer is installed:\n"
-                "  brew install jakehilborn/jakehilborn/displayplacer\n\n"
-                "Then click Refresh."
-            )
+            self._warn_no_displays()
+            return
+        shown = set(self.config_panels)
+        if not shown or (shown - set(diff.removed)) | set(diff.added) != set(displays):
+            # First load, or panels out of sync with detection: rebuild all
+            self._update_display_configs(displays)
+            self._update_visual_editor(displays)
+        elif diff:
+            self._apply_display_diff(displays, diff)
+        else:
+            self.status_var.set("No display changes")
             return
-        self._update_display_configs(displays)
-        self._update_visual_editor(displays)
         self.display_count_var.set(f"{len(displays)} display(s)")
         self.status_var.set("Ready")
         self._mark_clean()
 
+    def _on_detection_error(self, error: BaseException):
+        self.status_var.set("Display detection failed")
+        messagebox.showerror("Detection Failed", f"Could not detect displays:\n{error}")
+
+    def _stream_displays(self):
+        """Populate an empty window, drawing each display as soon as it is parsed."""
+        self._update_display_configs({})
+        self._update_visual_editor({})
+
+        async def stream():
+            async for display in self.async_manager.iter_displays():
+                self.bridge.call_in_tk(self._on_display_streamed, display)
+
+        self._detection = self.bridge.submit(stream(), on_done=self._on_stream_finished,
+                                             on_error=self._on_detection_error)
+
+    def _on_display_streamed(self, display: Display):
+        self._add_config_panel(display)
+        self._add_draggable(display)
+        self._restack_separators(self.config_panels)
+        self.display_count_var.set(f"{len(self.config_panels)} display(s)")
+
+    def _on_stream_finished(self, _result=None):
+        if not self.config_panels:
+            self._warn_no_displays()
+            return
+        self.draw_grid()
+        self.status_var.set("Ready")
+        self._mark_clean()
+
+    def _warn_no_displays(self):
+        self.status_var.set("No displays detected")
+        messagebox.showwarning(
+            "No Displays Detected",
+            "No displays were found.\n\n"
+            "Make sure displayplacer is installed:\n"
+            "  brew install jakehilborn/jakehilborn/displayplacer\n\n"
+            "Then click Refresh."
+        )
+
     def _update_display_configs(self, displays: Dict[str, Display]):
         for w in self.config_frame.winfo_children():
             w.destroy()
         self.config_panels.clear()
+        self._config_separators.clear()
 
-        for i, (display_id, display) in enumerate(displays.items()):
-            panel = DisplayConfigPanel(self.config_frame, display,
-                                       callback=self.on_display_config_change)
+        for display_id, display in displays.items():
+            self._add_config_panel(display)
+        self._restack_separators(displays)
+
+    def _add_config_panel(self, display: Display, before=None):
+        # Like the canvas, the panel edits a copy; edits reach the manager only as configs
+        panel = DisplayConfigPanel(self.config_frame, replace(display),
+                                   callback=self.on_display_config_change)
+        if before is not None:
+            panel.pack(fill="x", pady=5, padx=4, before=before)
+        else:
             panel.pack(fill="x", pady=5, padx=4)
-            self.config_panels[display_id] = panel
-            if i < len(displays) - 1:
-                ttk.Separator(self.config_frame, orient="horizontal").pack(fill="x", pady=6)
+        self.config_panels[display.id] = panel
+        self._config_separators[display.id] = ttk.Separator(self.config_frame, orient="horizontal")
+
+    def _restack_separators(self, displays: Dict[str, object]):
+        """Show a separator after every config panel except the last."""
+        ids = [display_id for display_id in displays if display_id in self.config_panels]
+        for i, display_id in enumerate(ids):
+            separator = self._config_separators[display_id]
+            if i < len(ids) - 1:
+                separator.pack(fill="x", pady=6, after=self.config_panels[display_id])
+            else:
+                separator.pack_forget()
 
     def _update_visual_editor(self, displays: Dict[str, Display]):
         self.canvas.delete("display")
@@ -499,23 +604,59 @@ class AdvancedMonitorLayoutManager:
         self.draggable_displays.clear()
 
         for display_id, display in displays.items():
-            d = DraggableDisplay(self.canvas, display, self.scale_var.get())
-            d.add_callback('position_changed', self.on_display_position_changed)
-            self.draggable_displays[display_id] = d
+            self._add_draggable(display)
+
+        self.draw_grid()
 
+    def _add_draggable(self, display: Display):
+        # The canvas edits its own copy; the manager's Display keeps describing the screen
+        d = DraggableDisplay(self.canvas, replace(display), self.scale_var.get())
+        d.add_callback('position_changed', self.on_display_position_changed)
+        self.draggable_displays[display.id] = d
+
+    def _remove_display_widgets(self, display_id: str):
+        draggable = self.draggable_displays.pop(display_id, None)
+        if draggable:
+            self.canvas.delete(draggable.rect_id)
+            self.canvas.delete(draggable.text_id)
+        panel = self.config_panels.pop(display_id, None)
+        if panel:
+            panel.destroy()
+        separator = self._config_separators.pop(display_id, None)
+        if separator:
+            separator.destroy()
+
+    def _apply_display_diff(self, displays: Dict[str, Display], diff):
+        """Rebuild panels and canvas items only for displays that changed."""
+        for display_id in diff.removed:
+            self._remove_display_widgets(display_id)
+        for display_id in diff.changed:
+            old_panel = self.config_panels.get(display_id)
+            draggable = self.draggable_displays.pop(display_id, None)
+            if draggable:
+                self.canvas.delete(draggable.rect_id)
+                self.canvas.delete(draggable.text_id)
+            self._config_separators.pop(display_id).destroy()
+            self._add_config_panel(displays[display_id], before=old_panel)
+            old_panel.destroy()
+            self._add_draggable(displays[display_id])
+        for display_id in diff.added:
+            self._add_config_panel(displays[display_id])
+            self._add_draggable(displays[display_id])
+        self._restack_separators(displays)
         self.draw_grid()
 
     def on_display_config_change(self, display: Display, config: Dict):
-        """Handle config panel changes — update model and redraw."""
-        display.resolution = config['resolution']
-        display.hz = config['hz']
-        display.scaling = config['scaling']
-        display.is_main = config['is_main']
-        display.rotation = config['rotation']
-        display.color_depth = config['color_depth']
+        """Handle config panel changes — redraw the canvas copy of the display.
 
-        if display.id in self.draggable_displays:
-            self.draggable_displays[display.id].update_visual()
+        The manager's Display objects are left as detected: applies are
+        planned against them, so editing them would hide the change.
+        """
+        draggable = self.draggable_displays.get(display.id)
+        if draggable:
+            for key in ('resolution', 'hz', 'scaling', 'is_main', 'rotation', 'color_depth'):
+                setattr(draggable.display, key, config[key])
+            draggable.update_visual()
 
         self.status_var.set("Configuration updated — drag to position, then Save")
         self._mark_dirty()
@@ -600,17 +741,25 @@ class AdvancedMonitorLayoutManager:
         description = simpledialog.askstring(
             "Save Layout", "Description (optional):", initialvalue="") or ""
 
-        # Sync positions from canvas panels into the display manager
-        for display_id, draggable in self.draggable_displays.items():
-            if display_id in self.display_manager.displays:
-                self.display_manager.displays[display_id].current_position = \
-                    draggable.display.current_position
-
-        if self.display_manager.save_layout(name, description):
+        if self._saving is not None and not self._saving.done():
+            return
+        # Save the panel settings and canvas arrangement rather than the detected ones
+        configs = self._arranged_configs()
+        self.status_var.set("Detecting displays…")
+        self._saving = self.bridge.submit(
+            self.async_manager.detect(),
+            on_done=lambda displays: self._on_save_detected(name, description, configs, displays),
+            on_error=self._on_detection_error)
+
+    def _on_save_detected(self, name: str, description: str, configs: Dict[str, Dict],
+                          displays: Dict[str, Display]):
+        # Layouts are only touched on the Tk thread; the worker thread only detected
+        if displays and self.display_manager.save_layout(name, description, configs, displays):
             self.current_layout_name.set(name)
             self._mark_clean()
             self.status_var.set(f"Layout '{name}' saved")
         else:
+            self.status_var.set("Save failed")
             messagebox.showerror("Save Failed",
                                  "Could not save the layout. Make sure displayplacer is installed.")
 
@@ -634,14 +783,24 @@ class AdvancedMonitorLayoutManager:
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=listbox.yview)
         listbox.configure(yscrollcommand=scrollbar.set)
 
-        for layout_name in layouts:
-            listbox.insert(tk.END, layout_name)
-        if layouts:
-            listbox.selection_set(0)
+        # Index lookup on the displays already detected; no displayplacer run on the Tk thread
+        fitting = self.display_manager.layouts_for_displays(list(self.display_manager.displays))
+        only_fitting = tk.BooleanVar(value=bool(fitting))
 
+        def fill():
+            listbox.delete(0, tk.END)
+            for layout_name in (fitting if only_fitting.get() else layouts):
+                listbox.insert(tk.END, layout_name)
+            if listbox.size():
+                listbox.selection_set(0)
+
+        fill()
         listbox.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+        ttk.Checkbutton(dialog, text=f"Only layouts for the connected displays ({len(fitting)})",
+                        variable=only_fitting, command=fill).pack(anchor="w", padx=10)
+
         btn_frame = ttk.Frame(dialog)
         btn_frame.pack(fill="x", padx=10, pady=10)
 
@@ -691,6 +850,7 @@ class AdvancedMonitorLayoutManager:
                 panel.vars['is_main'].set(config['is_main'])
             if 'position' in config:
                 panel.update_position_display(*config['position'])
+            panel._update_hz_values()
 
         self.current_layout_name.set(layout_name)
         self._mark_clean()
@@ -718,34 +878,52 @@ class AdvancedMonitorLayoutManager:
                 self._mark_clean()
             self.status_var.set(f"Layout '{layout_name}' deleted")
 
-    def apply_current_layout(self):
-        """Apply the canvas arrangement to the physical displays immediately."""
-        if not messagebox.askyesno("Apply Arrangement",
-                                   "Apply the current display arrangement now?\n"
-                                   "Your monitors will rearrange."):
-            return
-
+    def _arranged_configs(self) -> Dict[str, Dict]:
+        """Per-display configs as set in the panels, at the positions arranged on the canvas"""
         config: Dict[str, Dict] = {}
         for display_id, panel in self.config_panels.items():
             cfg = panel.get_config()
             if display_id in self.draggable_displays:
                 cfg['position'] = self.draggable_displays[display_id].display.current_position
             config[display_id] = cfg
+        return config
 
-        temp_name = f"_apply_{int(datetime.now().timestamp())}"
-        layout = LayoutProfile(
-            name=temp_name,
-            description="",
-            displays=config,
-            created_at=datetime.now().isoformat()
-        )
-        self.display_manager.layouts[temp_name] = layout
+    def apply_current_layout(self):
+        """Apply the canvas arrangement to the physical displays immediately."""
+        if not messagebox.askyesno("Apply Arrangement",
+                                   "Apply the current display arrangement now?\n"
+                                   "Your monitors will rearrange."):
+            return
 
-        success = self.display_manager.apply_layout(temp_name)
-        del self.display_manager.layouts[temp_name]
+        config = self._arranged_configs()
 
-        if success:
+        if self._applying is not None and not self._applying.done():
+            return
+        # An unedited saved layout is applied by name, which counts as a use of it
+        layout_name = "" if self._unsaved_changes else self.current_layout_name.get()
+        self.status_var.set("Applying arrangement…")
+
+        async def apply():
+            if layout_name:
+                ok = await self.async_manager.apply_layout(layout_name)
+            else:
+                ok = await self.async_manager.apply(config)
+            # Read on the worker thread, before another operation can replace it
+            return ok, self.async_manager.last_apply_report
+
+        self._applying = self.bridge.submit(apply(),
+                                            on_done=lambda result: self._on_apply_finished(*result),
+                                            on_error=self._on_apply_error)
+
+    def _on_apply_finished(self, success: bool, report: ApplyReport):
+        if success and report.noop:
+            self.status_var.set("Displays already match this arrangement")
+        elif success:
             self.status_var.set("Arrangement applied")
+        elif report.rolled_back:
+            messagebox.showerror("Apply Failed",
+                                 "macOS did not accept the arrangement, so the previous\n"
+                                 "arrangement was restored.")
         else:
             messagebox.showerror("Apply Failed",
                                  "Could not apply the arrangement.\n"
@@ -754,46 +932,56 @@ class AdvancedMonitorLayoutManager:
 
     def export_layouts(self):
         from tkinter import filedialog
-        from dataclasses import asdict
 
         filename = filedialog.asksaveasfilename(
             title="Export Layouts",
             defaultextension=".json",
-            filetypes=[("JSON", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON", "*.json"), ("Compressed JSON", "*.json.gz *.json.bz2 *.json.xz"),
+                       ("All files", "*.*")]
         )
         if not filename:
             return
-        try:
-            data = {n: asdict(l) for n, l in self.display_manager.layouts.items()}
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
-            self.status_var.set(f"Exported to {filename}")
-        except Exception as e:
-            messagebox.showerror("Export Failed", str(e))
+        # Index lookup on the displays already detected, as in the load dialog
+        names = self.display_manager.get_layout_names()
+        fitting = self.display_manager.layouts_for_displays(list(self.display_manager.displays))
+        if fitting and len(fitting) < len(names) and messagebox.askyesno(
+                "Export Layouts", f"Export only the {len(fitting)} layout(s) for the connected displays?\n"
+                                  f"(No exports all {len(names)}.)"):
+            names = fitting
+        if self.display_manager.export_layouts(filename, names):
+            self.status_var.set(f"Exported {len(names)} layout(s) to {filename}")
+        else:
+            messagebox.showerror("Export Failed", f"Could not write {filename}")
 
     def import_layouts(self):
         from tkinter import filedialog
 
         filename = filedialog.askopenfilename(
             title="Import Layouts",
-            filetypes=[("JSON", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON", "*.json *.json.gz *.json.bz2 *.json.xz"), ("All files", "*.*")]
         )
         if not filename:
             return
-        try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            count = 0
-            for name, layout_data in data.items():
-                self.display_manager.layouts[name] = LayoutProfile(**layout_data)
-                count += 1
-            self.display_manager.save_layouts()
-            self.status_var.set(f"Imported {count} layout(s)")
-        except Exception as e:
-            messagebox.showerror("Import Failed", str(e))
+        result = self.display_manager.import_layouts(filename, on_conflict='overwrite')
+        if result.fatal:
+            messagebox.showerror("Import Failed", result.fatal)
+            return
+        if result.errors:
+            shown = "\n".join(result.errors[:15])
+            if result.error_count > 15:
+                shown += f"\n... and {result.error_count - 15} more"
+            messagebox.showwarning("Import", f"Some layouts were left out:\n{shown}")
+        self.status_var.set(f"Imported {len(result.imported)} layout(s)")
+
+    def _on_apply_error(self, error: BaseException):
+        self.status_var.set("Apply failed")
+        messagebox.showerror("Apply Failed", f"Could not apply the arrangement:\n{error}")
 
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.bridge.close()
 
 
 if __name__ == "__main__":
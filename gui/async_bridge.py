@@ -0,0 +1,102 @@
+"""
+Tk / asyncio bridge
+Runs coroutines on an asyncio loop in a worker thread and hands results back to Tk.
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+import tkinter as tk
+
+
+class TkAsyncBridge:
+    """Keep the Tk main loop responsive while asyncio work runs.
+
+    The asyncio loop lives in a daemon thread. Tk is not thread-safe, so
+    nothing there touches widgets: results and ``call_in_tk`` callbacks are
+    queued and run from the Tk thread by an ``after`` poll that only runs
+    while work is pending.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, root: tk.Misc):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._pending = 0
+        self._poll_id: Optional[str] = None
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-bridge", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine, on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Future:
+        """Schedule ``coro``; ``on_done(result)`` or ``on_error(exc)`` runs on the Tk thread.
+
+        Cancel the returned future to cancel the coroutine; neither callback
+        runs for a cancelled job.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        self._pending += 1
+        future.add_done_callback(lambda f: self._calls.put((self._finish, (f, on_done, on_error))))
+        self._schedule_poll()
+        return future
+
+    def call_in_tk(self, callback: Callable, *args):
+        """Run ``callback(*args)`` on the Tk thread; for use inside submitted coroutines"""
+        self._calls.put((callback, args))
+
+    def _finish(self, future: Future, on_done, on_error):
+        self._pending -= 1
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+        elif on_done:
+            on_done(future.result())
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                callback, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        if self._pending:
+            self._schedule_poll()
+
+    def close(self, timeout: float = 2.0):
+        """Cancel outstanding work and stop the loop thread"""
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            # Let cancelled tasks kill and reap their displayplacer processes
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
@@ -16,7 +16,7 @@ def run_gui():
     # Dropdown
     selected = tk.StringVar()
     dropdown = ttk.Combobox(window, textvariable=selected)
-    dropdown['values'] = ("home", "work", "arzopa_only")
+    dropdown['values'] = ("auto", "home", "work", "arzopa_only")
     dropdown.current(0)
     dropdown.pack(pady=20)
 
@@ -24,8 +24,10 @@ def run_gui():
     def on_apply():
         mode = selected.get()
         try:
-            apply_layout(mode)
-            messagebox.showinfo("Success", f"Layout '{mode}' applied.")
+            if apply_layout(mode):
+                messagebox.showinfo("Success", f"Layout '{mode}' applied.")
+            else:
+                messagebox.showerror("Error", f"Layout '{mode}' could not be applied.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -26,9 +26,14 @@ APP_SCRIPT = 'app_launcher.py'
 DATA_FILES = [
     ('', ['requirements.txt', 'README.md', 'version.py']),
     ('cli', ['cli/__init__.py', 'cli/__main__.py', 'cli/advanced_cli.py']),
-    ('core', ['core/__init__.py', 'core/advanced_display_manager.py']),
-    ('gui', ['gui/__init__.py', 'gui/advanced_layout_manager.py', 'gui/settings_dialog.py']),
-    ('utils', ['utils/__init__.py', 'utils/helpers.py', 'utils/displayplacer.py']),
+    ('core', ['core/__init__.py', 'core/advanced_display_manager.py',
+              'core/async_display_manager.py', 'core/backends.py', 'core/daemon.py', 'core/detection_cache.py',
+              'core/layout_store.py', 'core/layout_transfer.py', 'core/mode_table.py',
+              'core/rules.py', 'core/watcher.py']),
+    ('gui', ['gui/__init__.py', 'gui/advanced_layout_manager.py', 'gui/async_bridge.py',
+             'gui/settings_dialog.py']),
+    ('utils', ['utils/__init__.py', 'utils/helpers.py', 'utils/displayplacer.py',
+               'utils/subprocess_runner.py', 'utils/timings.py']),
     ('scripts', ['scripts/monitor-layout.sh']),
 ]
 
@@ -0,0 +1,86 @@
+"""Applying layouts: every connected display is verified and restored, and use is recorded"""
+
+import asyncio
+
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.async_display_manager import AsyncDisplayManager
+from core.backends import SimulatedBackend
+
+
+class _DriftingBackend(SimulatedBackend):
+    """Moves the last display on the first apply, as macOS sometimes does"""
+
+    drift = True
+
+    def apply(self, commands, timeout):
+        result = super().apply(commands, timeout)
+        if self.drift:
+            display = list(self.displays.values())[-1]
+            display.origin = (display.origin[0] + 100, display.origin[1])
+            self.drift = False
+        return result
+
+
+def _manager(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    monkeypatch.setattr(AdvancedDisplayManager, 'VERIFY_TIMEOUT', 0.0)
+    return AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+
+
+def test_display_moved_by_the_apply_is_rolled_back(tmp_path, monkeypatch):
+    backend = _DriftingBackend.generate(count=3, modes=20)
+    manager = _manager(tmp_path, monkeypatch, backend)
+    displays = list(manager.detect_displays().values())
+    configs = {display.id: manager._display_config(display) for display in displays}
+    first, last = displays[0], displays[-1]
+    configs[first.id]['rotation'] = 180
+
+    assert not manager.apply_display_configs(configs)
+    report = manager.last_apply_report
+    assert list(report.sent) == [first.id]
+    assert list(report.mismatches) == [last.id]
+    assert report.rolled_back
+    assert backend.displays[first.id].degree == first.rotation
+    assert backend.displays[last.id].origin == last.current_position
+
+
+def test_display_left_out_of_the_configs_is_verified(tmp_path, monkeypatch):
+    backend = _DriftingBackend.generate(count=3, modes=20)
+    manager = _manager(tmp_path, monkeypatch, backend)
+    first, last = list(manager.detect_displays().values())[::2]
+
+    assert not manager.apply_display_configs({first.id: {'rotation': 180}})
+    assert list(manager.last_apply_report.mismatches) == [last.id]
+    assert backend.displays[last.id].origin == last.current_position
+
+
+def test_apply_without_drift_succeeds(tmp_path, monkeypatch):
+    backend = _DriftingBackend.generate(count=3, modes=20)
+    backend.drift = False
+    manager = _manager(tmp_path, monkeypatch, backend)
+    first = next(iter(manager.detect_displays().values()))
+
+    assert manager.apply_display_configs({first.id: {'rotation': 180}})
+    assert not manager.last_apply_report.mismatches
+    assert backend.displays[first.id].degree == 180
+
+
+def test_async_apply_rolls_back_a_moved_display(tmp_path, monkeypatch):
+    backend = _DriftingBackend.generate(count=3, modes=20)
+    manager = _manager(tmp_path, monkeypatch, backend)
+    first, last = list(manager.detect_displays().values())[::2]
+
+    assert not asyncio.run(AsyncDisplayManager(manager).apply({first.id: {'rotation': 180}}))
+    assert list(manager.last_apply_report.mismatches) == [last.id]
+    assert backend.displays[first.id].degree == first.rotation
+    assert backend.displays[last.id].origin == last.current_position
+
+
+def test_async_apply_layout_marks_it_used(tmp_path, monkeypatch):
+    backend = _DriftingBackend.generate(count=2, modes=20)
+    backend.drift = False
+    manager = _manager(tmp_path, monkeypatch, backend)
+    manager.save_layout("Desk")
+
+    assert asyncio.run(AsyncDisplayManager(manager).apply_layout("Desk"))
+    assert manager.layout_store.get("Desk")['last_used']
@@ -0,0 +1,15 @@
+"""Processes sharing one layout store never drop each other's writes"""
+
+import pytest
+
+from benchmarks import concurrency_harness
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.layout_store import LAYOUT_STORE_ENV
+
+
+@pytest.mark.parametrize('store', ['json', 'sqlite'])
+def test_two_processes_saving_at_once_keep_each_others_layouts(store, monkeypatch):
+    # run() points these at its temporary store; put them back afterwards
+    monkeypatch.setenv(LAYOUT_STORE_ENV, store)
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', AdvancedDisplayManager.LAYOUTS_FILE)
+    assert concurrency_harness.run(store, workers=2, saves=24, bulk=5)
@@ -0,0 +1,71 @@
+"""Display daemon requests over a Unix socket"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.backends import SimulatedBackend
+from core.daemon import DaemonClient, DisplayDaemon, RemoteDisplayManager
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    servers = []
+
+    def start(backend):
+        server = DisplayDaemon(str(tmp_path / "d.sock"), backend=backend, request_timeout=0.2)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_round_trip(serve):
+    backend = SimulatedBackend.generate(count=2, modes=20)
+    server = serve(backend)
+    server.manager.save_layout("Desk")
+    remote = RemoteDisplayManager.connect(socket_path=server.socket_path, backend=backend.name)
+
+    assert set(remote.detect_displays()) == set(backend.displays)
+    assert remote.get_layout_names() == ["Desk"]
+    assert remote.layouts_for_displays() == ["Desk"]
+    assert remote.apply_layout("Desk")
+    assert remote.last_apply_report.noop
+    assert DaemonClient(server.socket_path).request('nonsense') == {'ok': False, 'error': "unknown op: 'nonsense'"}
+
+
+def test_silent_client_does_not_block_others(serve):
+    server = serve(SimulatedBackend.generate(count=2, modes=20))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect(server.socket_path)
+        silent.sendall(b'{"op": "pi')  # half a request, then nothing
+        start = time.monotonic()
+        assert DaemonClient(server.socket_path, timeout=5).is_running()
+        assert time.monotonic() - start < 2
+
+
+def test_falls_back_when_the_daemon_stops_answering(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    backend = SimulatedBackend.generate(count=2, modes=20)
+    path = str(tmp_path / "d.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.bind(path)
+        stalled.listen()  # accepts connections, never answers
+        remote = RemoteDisplayManager(
+            DaemonClient(path, timeout=0.2), "simulated",
+            fallback=lambda: AdvancedDisplayManager(use_detection_cache=False, backend=backend))
+
+        assert set(remote.detect_displays()) == set(backend.displays)
+        assert remote.get_layout_names() == []
+    assert "display daemon stopped responding" in capsys.readouterr().err
+
+    with pytest.raises(RuntimeError):
+        RemoteDisplayManager(DaemonClient(path, timeout=0.2), "simulated").detect_displays()
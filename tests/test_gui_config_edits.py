@@ -0,0 +1,51 @@
+"""Settings edited in a GUI config panel must reach the backend"""
+
+from dataclasses import replace
+from types import SimpleNamespace
+
+import gui.advanced_layout_manager as layout_manager
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.backends import SimulatedBackend
+
+GUI = layout_manager.AdvancedMonitorLayoutManager
+
+
+class _Panel:
+    """Stands in for DisplayConfigPanel, which needs a Tk display"""
+
+    def __init__(self, parent, display, callback=None):
+        self.display = display
+        self.callback = callback
+
+    def pack(self, **options):
+        pass
+
+
+def test_panel_edit_is_applied_not_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    monkeypatch.setattr(layout_manager, 'DisplayConfigPanel', _Panel)
+    monkeypatch.setattr(layout_manager, 'ttk', SimpleNamespace(Separator=lambda *args, **options: None))
+    backend = SimulatedBackend.generate(count=2, modes=50)
+    manager = AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+    display = list(manager.detect_displays().values())[1]
+    detected = replace(display)
+    mode = next(mode for mode in display.modes if mode.resolution != display.resolution)
+
+    gui = SimpleNamespace(config_frame=None, config_panels={}, _config_separators={},
+                          draggable_displays={}, status_var=SimpleNamespace(set=lambda text: None),
+                          _mark_dirty=lambda: None)
+    gui.on_display_config_change = lambda *args: GUI.on_display_config_change(gui, *args)
+    GUI._add_config_panel(gui, display)
+    panel = gui.config_panels[display.id]
+    # What the panel reports after the user picks another mode
+    config = {'resolution': mode.resolution, 'position': display.current_position, 'hz': mode.hz,
+              'scaling': mode.scaling, 'is_main': display.is_main, 'rotation': display.rotation,
+              'color_depth': mode.color_depth}
+    panel.callback(panel.display, config)
+
+    assert manager.displays[display.id] == detected
+    assert manager.apply_display_configs({display.id: config})
+    assert backend.applies == 1
+    applied = backend.displays[display.id]
+    assert applied.resolution == mode.resolution
+    assert applied.modes[applied.mode][2] == mode.hz
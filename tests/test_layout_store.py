@@ -0,0 +1,143 @@
+"""Layout store behaviour that callers rely on"""
+
+import json
+import sqlite3
+
+from core.layout_store import LayoutStore, SQLiteLayoutStore, display_config_hash
+
+PANEL = {'resolution': [2560, 1440], 'position': [0, 0], 'rotation': 0, 'scaling': True, 'hz': 60}
+
+
+def _layout(name):
+    return {'name': name, 'description': "", 'displays': {'A': dict(PANEL, resolution=list(PANEL['resolution']))},
+            'created_at': "2026-01-01T00:00:00", 'last_used': ""}
+
+
+def test_changing_one_layout_leaves_layouts_sharing_its_config_alone(tmp_path):
+    path = str(tmp_path / "layouts.json")
+    LayoutStore(path).replace({'Desk': _layout('Desk'), 'Dock': _layout('Dock')})
+
+    # A fresh store decodes the snapshot, where both layouts reference one config
+    store = LayoutStore(path)
+    desk = store.get('Desk')
+    desk['displays']['A']['hz'] = 120
+    desk['displays']['A']['resolution'][0] = 1920
+    store.get_all()['Dock']['displays']['A']['position'][0] = 500
+
+    assert store.get('Dock')['displays']['A'] == PANEL
+    assert store.get('Desk')['displays']['A'] == PANEL
+    assert display_config_hash(store.get('Dock')['displays']['A']) == display_config_hash(PANEL)
+    assert LayoutStore(path).get('Dock')['displays']['A'] == PANEL
+
+
+def test_sqlite_touch_keeps_a_layout_another_process_saved(tmp_path):
+    path = str(tmp_path / "layouts.sqlite3")
+    mine, theirs = SQLiteLayoutStore(path), SQLiteLayoutStore(path)
+    mine.put('Desk', _layout('Desk'))
+    theirs.put('Desk', dict(_layout('Desk'), description="moved the dock"))
+
+    assert mine.touch('Desk', "2026-05-01T09:00:00")
+    assert theirs.get('Desk') == dict(_layout('Desk'), description="moved the dock", last_used="2026-05-01T09:00:00")
+    assert theirs.names_by_recency()[0] == 'Desk'
+    assert mine.touch('Missing', "2026-05-01T09:00:00")
+    assert mine.names() == ['Desk']
+
+
+def test_flat_snapshot_loads_and_is_kept_as_a_backup_when_rewritten(tmp_path):
+    path = tmp_path / "layouts.json"
+    flat = {'Desk': _layout('Desk'), 'Dock': _layout('Dock')}
+    path.write_text(json.dumps(flat, indent=2))
+    store = LayoutStore(str(path))
+    assert store.load() == flat
+
+    assert store.update({'Sofa': _layout('Sofa')})
+    assert path.read_bytes().startswith(b'{"version": 2')
+    assert json.loads((tmp_path / "layouts.json.v1.bak").read_text()) == flat
+    assert LayoutStore(str(path)).load() == dict(flat, Sofa=_layout('Sofa'))
+
+    # Only the flat file is kept; later rewrites leave the backup alone
+    assert store.update({}, delete=['Desk'])
+    assert json.loads((tmp_path / "layouts.json.v1.bak").read_text()) == flat
+
+
+def test_new_store_writes_no_backup(tmp_path):
+    path = tmp_path / "layouts.json"
+    assert LayoutStore(str(path)).replace({'Desk': _layout('Desk')})
+    assert LayoutStore(str(path)).update({'Dock': _layout('Dock')})
+    assert not (tmp_path / "layouts.json.v1.bak").exists()
+
+
+def test_bulk_write_merges_what_another_store_saved_since_it_read(tmp_path):
+    path = str(tmp_path / "layouts.json")
+    mine, theirs = LayoutStore(path), LayoutStore(path)
+    assert mine.put('Desk', _layout('Desk'))
+    assert mine.names() == ['Desk']
+    assert theirs.put('Dock', _layout('Dock'))
+    assert theirs.delete('Desk')
+
+    assert mine.update({'Sofa': _layout('Sofa')})
+    assert LayoutStore(path).names() == ['Dock', 'Sofa']
+    assert mine.names() == ['Dock', 'Sofa']
+
+
+def test_journal_replay_ignores_a_torn_last_record(tmp_path):
+    path = str(tmp_path / "layouts.json")
+    store = LayoutStore(path)
+    assert store.put('Desk', _layout('Desk'))
+    assert store.put('Dock', _layout('Dock'))
+    assert store.touch('Desk', "2026-05-01T09:00:00")
+    with open(store.journal_path, 'ab') as f:
+        f.write(b'{"op":"put","name":"Sofa","layout":{"name":"So')  # crash mid-append
+
+    layouts = LayoutStore(path).load()
+    assert list(layouts) == ['Desk', 'Dock']
+    assert layouts['Desk']['last_used'] == "2026-05-01T09:00:00"
+
+    # The next append seals the torn record instead of being glued to it
+    assert LayoutStore(path).put('Sofa', _layout('Sofa'))
+    assert list(LayoutStore(path).load()) == ['Desk', 'Dock', 'Sofa']
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    path = tmp_path / "layouts.json"
+    journal = tmp_path / "layouts.json.journal"
+    store = LayoutStore(str(path), compact_records=3)
+    for name in ('Desk', 'Dock', 'Sofa'):
+        assert store.put(name, _layout(name))
+    store.wait()
+
+    assert list(json.loads(path.read_text())['layouts']) == ['Desk', 'Dock', 'Sofa']
+    assert journal.stat().st_size == 0
+    assert store.delete('Dock')
+    assert journal.stat().st_size > 0
+    assert list(LayoutStore(str(path)).load()) == ['Desk', 'Sofa']
+
+
+def test_sqlite_store_is_seeded_once_from_the_json_store(tmp_path):
+    json_path = str(tmp_path / "layouts.json")
+    LayoutStore(json_path).replace({'Desk': _layout('Desk')})
+    assert LayoutStore(json_path).put('Dock', _layout('Dock'))  # still only in the journal
+    before = {name: (tmp_path / name).read_bytes() for name in ("layouts.json", "layouts.json.journal")}
+
+    path = str(tmp_path / "layouts.sqlite3")
+    assert SQLiteLayoutStore(path, json_path=json_path).load() == {'Desk': _layout('Desk'), 'Dock': _layout('Dock')}
+    assert {name: (tmp_path / name).read_bytes() for name in before} == before
+
+    assert LayoutStore(json_path).put('Sofa', _layout('Sofa'))
+    assert SQLiteLayoutStore(path, json_path=json_path).names() == ['Desk', 'Dock']
+
+
+def test_sqlite_schema_1_gains_the_display_config_index(tmp_path):
+    path = str(tmp_path / "layouts.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE layouts (name TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,"
+                       " last_used TEXT NOT NULL DEFAULT '', data TEXT NOT NULL)")
+    connection.execute("INSERT INTO layouts VALUES ('Desk', 'A', '', ?)", (json.dumps(_layout('Desk')),))
+    connection.execute("PRAGMA user_version = 1")
+    connection.commit()
+    connection.close()
+
+    store = SQLiteLayoutStore(path)
+    assert store.names_for_display_config(PANEL) == ['Desk']
+    assert store.names_for_display_config(PANEL, display_id='B') == []
+    assert store.get('Desk') == _layout('Desk')
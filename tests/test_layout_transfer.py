@@ -0,0 +1,121 @@
+"""Layout export and import: streaming, validation and conflict policies"""
+
+import io
+import json
+
+import pytest
+
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.layout_transfer import iter_json_object, write_layout_file
+
+CONFIG = {'resolution': [2560, 1440], 'position': [0, 0], 'rotation': 0, 'scaling': True, 'hz': 60}
+
+
+def _layout(name, created_at="2026-01-01T00:00:00", last_used="", description=""):
+    return {'name': name, 'description': description, 'displays': {'A': dict(CONFIG)},
+            'created_at': created_at, 'last_used': last_used}
+
+
+def _write(path, records):
+    """An export file; ``records`` may repeat a name, as hand-merged files do"""
+    path.write_text("{" + ",".join(f"{json.dumps(name)}: {json.dumps(layout)}" for name, layout in records) + "}")
+    return str(path)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    return AdvancedDisplayManager(use_detection_cache=False)
+
+
+def test_failed_export_leaves_no_temp_file(tmp_path):
+    def records():
+        yield 'Desk', _layout('Desk')
+        raise RuntimeError("store went away")
+
+    with pytest.raises(RuntimeError):
+        write_layout_file(str(tmp_path / "out.json"), records())
+    with pytest.raises(TypeError):
+        write_layout_file(str(tmp_path / "out.json"), [('Desk', {'displays': {1, 2}})])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rename_reports_every_rename_of_a_repeated_name(manager, tmp_path):
+    manager.layout_store.put('Desk', _layout('Desk'))
+    path = _write(tmp_path / "in.json", [('Desk', _layout('Desk', description=str(n))) for n in range(3)])
+
+    result = manager.import_layouts(path, on_conflict='rename')
+    assert result.renamed == [('Desk', 'Desk (2)'), ('Desk', 'Desk (3)'), ('Desk', 'Desk (4)')]
+    assert [manager.get_layout(name).description for name in ('Desk (2)', 'Desk (3)', 'Desk (4)')] == ["0", "1", "2"]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64])
+def test_numbers_cut_by_a_chunk_boundary_decode_whole(chunk_size):
+    data = {'a': 123456789, 'b': -1.25e-10, 'c': [10, 0.5], 'd': {'e': 4096}, 'f': 7}
+    text = json.dumps(data)
+    assert dict(iter_json_object(io.StringIO(text), chunk_size)) == data
+    assert dict(iter_json_object(io.StringIO(text + "  \n"), chunk_size)) == data
+
+
+@pytest.mark.parametrize('text', ['{"a": 1, "b": 12', '{"a": 1, "b": {"c": [1, 2', '{"a": 1,', '{"a"', '', '[1]'])
+def test_truncated_or_malformed_input_raises(text):
+    with pytest.raises(ValueError):
+        for _ in iter_json_object(io.StringIO(text), chunk_size=4):
+            pass
+
+
+def _import(manager, tmp_path, policy):
+    manager.layout_store.put('Desk', _layout('Desk', description="saved", last_used="2026-03-01T00:00:00"))
+    path = _write(tmp_path / "in.json", [
+        ('Desk', _layout('Desk', description="older", last_used="2026-02-01T00:00:00")),
+        ('Dock', _layout('Dock', description="first")),
+        ('Dock', _layout('Dock', description="second", created_at="2026-01-02T00:00:00")),
+        ('Desk', _layout('Desk', description="newer", last_used="2026-04-01T00:00:00")),
+    ])
+    return manager.import_layouts(path, on_conflict=policy)
+
+
+def _descriptions(manager):
+    return {name: manager.get_layout(name).description for name in manager.layouts}
+
+
+def test_skip_keeps_what_is_saved_and_the_first_of_a_repeated_name(manager, tmp_path):
+    result = _import(manager, tmp_path, 'skip')
+    assert result.skipped == ['Desk', 'Dock', 'Desk']
+    assert _descriptions(manager) == {'Desk': "saved", 'Dock': "first"}
+
+
+def test_overwrite_keeps_the_last_record_of_each_name(manager, tmp_path):
+    result = _import(manager, tmp_path, 'overwrite')
+    assert result.skipped == [] and result.renamed == []
+    assert _descriptions(manager) == {'Desk': "newer", 'Dock': "second"}
+
+
+def test_rename_saves_every_record(manager, tmp_path):
+    result = _import(manager, tmp_path, 'rename')
+    assert result.renamed == [('Desk', 'Desk (2)'), ('Dock', 'Dock (2)'), ('Desk', 'Desk (3)')]
+    assert _descriptions(manager) == {'Desk': "saved", 'Desk (2)': "older", 'Dock': "first",
+                                      'Dock (2)': "second", 'Desk (3)': "newer"}
+
+
+def test_newest_keeps_whichever_was_used_or_saved_last(manager, tmp_path):
+    result = _import(manager, tmp_path, 'newest')
+    assert result.skipped == ['Desk']
+    assert _descriptions(manager) == {'Desk': "newer", 'Dock': "second"}
+
+
+def test_dry_run_and_malformed_files_save_nothing(manager, tmp_path):
+    result = manager.import_layouts(_write(tmp_path / "in.json", [('Dock', _layout('Dock'))]), dry_run=True)
+    assert result.imported == ['Dock']
+    path = tmp_path / "bad.json"
+    path.write_text('{"Desk": ' + json.dumps(_layout('Desk')) + ', "Dock": {')
+    assert manager.import_layouts(str(path)).fatal
+    assert list(manager.layouts) == []
+
+
+def test_invalid_records_are_left_out_with_their_paths(manager, tmp_path):
+    bad = dict(_layout('Bad'), displays={'A': dict(CONFIG, hz="60")})
+    result = manager.import_layouts(_write(tmp_path / "in.json", [('Bad', bad), ('Desk', _layout('Desk'))]))
+    assert result.rejected == ['Bad']
+    assert result.errors == ['$["Bad"].displays["A"].hz: expected an integer, got "60"']
+    assert list(manager.layouts) == ['Desk']
@@ -0,0 +1,41 @@
+"""Hot-plug rules picked up by a running auto-applier"""
+
+from core.advanced_display_manager import AdvancedDisplayManager
+from core.backends import SimulatedBackend
+from core.rules import HotplugAutoApplier, RuleEngine
+
+
+def test_auto_applier_sees_rules_and_layouts_added_after_it_started(tmp_path, monkeypatch):
+    monkeypatch.setattr(AdvancedDisplayManager, 'LAYOUTS_FILE', str(tmp_path / "layouts.json"))
+    monkeypatch.setattr(RuleEngine, 'RULES_FILE', str(tmp_path / "rules.json"))
+    backend = SimulatedBackend.generate(count=3, modes=20)
+    manager = AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+    displays = manager.detect_displays()
+    manager.save_layout("All")
+    dock = backend.displays[list(displays)[-1]]
+    backend.disconnect(dock.id)
+    manager.detect_displays()
+    applier = HotplugAutoApplier(RuleEngine(manager))
+
+    # Another process (the CLI) saves a layout for all three and makes it the rule
+    other = AdvancedDisplayManager(use_detection_cache=False, backend=backend)
+    backend.connect(dock)
+    other.detect_displays()
+    other.save_layout("Dock")
+    RuleEngine(other).add_rule("Dock", displays)
+
+    manager.detect_displays()
+    result = applier.handle_event({'event': 'displays_changed', 'added': [{'id': dock.id}], 'removed': []})
+    assert result['layout'] == "Dock"
+    assert result['ok']
+
+    # ... then deletes the rule and the layout again
+    RuleEngine(other).remove_rules("Dock")
+    other.delete_layout("Dock")
+    backend.disconnect(dock.id)
+    manager.detect_displays()
+    applier.handle_event({'event': 'displays_changed', 'added': [], 'removed': [dock.id]})
+    backend.connect(dock)
+    manager.detect_displays()
+    result = applier.handle_event({'event': 'displays_changed', 'added': [{'id': dock.id}], 'removed': []})
+    assert result['layout'] == "All"
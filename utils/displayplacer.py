@@ -4,7 +4,9 @@ Works with Homebrew (Apple Silicon & Intel), uv, pyenv, and manual installs.
 """
 
 import shutil
-import subprocess
+
+from utils.subprocess_runner import PROBE_TIMEOUT, run_command
+from utils.timings import timed
 
 _FALLBACK_PATHS = [
     "/opt/homebrew/bin/displayplacer",  # Apple Silicon Homebrew
@@ -24,25 +26,22 @@ def find_displayplacer() -> str | None:
     if _discovery_done:
         return _cached_path
 
+    with timed("discovery"):
+        _cached_path = _discover()
+    _discovery_done = True
+    return _cached_path
+
+
+def _discover() -> str | None:
     # Prefer PATH lookup — works with uv, pyenv, nix, and non-standard installs
     found = shutil.which("displayplacer")
     if found:
-        _cached_path = found
-        _discovery_done = True
-        return _cached_path
+        return found
 
     # Fall back to known Homebrew paths
     for path in _FALLBACK_PATHS:
-        try:
-            result = subprocess.run([path, "--version"], capture_output=True, timeout=5)
-            if result.returncode == 0:
-                _cached_path = path
-                _discovery_done = True
-                return _cached_path
-        except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
-            continue
-
-    _discovery_done = True
+        if run_command([path, "--version"], PROBE_TIMEOUT).ok:
+            return path
     return None
 
 
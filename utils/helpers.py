@@ -10,6 +10,7 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
 from utils.displayplacer import find_displayplacer
+from utils.subprocess_runner import LIST_TIMEOUT, PROBE_TIMEOUT, run_command
 
 
 def validate_displayplacer_installation(path: str = None) -> bool:
@@ -18,11 +19,7 @@ def validate_displayplacer_installation(path: str = None) -> bool:
         path = find_displayplacer()
     if path is None:
         return False
-    try:
-        result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
-        return result.returncode == 0
-    except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
-        return False
+    return run_command([path, "--version"], PROBE_TIMEOUT).ok
 
 
 def get_displayplacer_help(path: str = None) -> str:
@@ -31,11 +28,10 @@ def get_displayplacer_help(path: str = None) -> str:
         path = find_displayplacer()
     if path is None:
         return "displayplacer not found"
-    try:
-        result = subprocess.run([path, "--help"], capture_output=True, text=True, timeout=5)
-        return result.stdout if result.returncode == 0 else "Help not available"
-    except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
+    result = run_command([path, "--help"], PROBE_TIMEOUT)
+    if result.error:
         return "displayplacer not found"
+    return result.stdout if result.ok else "Help not available"
 
 def parse_resolution_string(res_string: str) -> Tuple[int, int]:
     """Parse resolution string like '1920x1080' into tuple"""
@@ -159,10 +155,10 @@ def backup_current_layout(backup_dir: str = None) -> str:
     try:
         if dp_path is None:
             return ""
-        result = subprocess.run([dp_path, "list"],
-                               capture_output=True, text=True)
-        
-        if result.returncode == 0:
+        result = run_command([dp_path, "list"], LIST_TIMEOUT, retries=1)
+        if not result.ok:
+            print(f"Error creating backup: {result.describe()}")
+        else:
             backup_data = {
                 "timestamp": datetime.now().isoformat(),
                 "displayplacer_output": result.stdout,
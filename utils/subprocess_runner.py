@@ -0,0 +1,158 @@
+"""
+Shared subprocess runner for displayplacer calls.
+Every call gets a hard timeout; stuck children (and anything they spawned) are
+killed and reaped, and failures come back as a RunResult instead of an exception.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from utils.timings import observe
+
+# Per-operation timeouts in seconds
+LIST_TIMEOUT = 15.0
+APPLY_TIMEOUT = 30.0
+PROBE_TIMEOUT = 5.0  # --version / --help
+
+
+@dataclass
+class RunResult:
+    """Outcome of run_command"""
+    argv: List[str]
+    returncode: Optional[int] = None  # None if the command never completed
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0  # seconds, all attempts
+    attempts: int = 0
+    timed_out: bool = False
+    error: str = ""  # set when the command could not be started
+    durations: List[float] = field(default_factory=list)  # per attempt
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.error
+
+    def describe(self) -> str:
+        """One-line explanation of a failure"""
+        name = os.path.basename(self.argv[0]) if self.argv else "command"
+        tries = f" after {self.attempts} attempts" if self.attempts > 1 else ""
+        if self.error:
+            return f"could not run {name}: {self.error}"
+        if self.timed_out:
+            return f"{name} did not finish within its timeout{tries} and was killed"
+        if self.returncode != 0:
+            detail = self.stderr.strip()
+            return f"{name} exited with status {self.returncode}{tries}" + (f": {detail}" if detail else "")
+        return f"{name} succeeded"
+
+
+def spawn(argv: Sequence[str], **kwargs) -> subprocess.Popen:
+    """Popen in its own process group, so kill() can take down its children too"""
+    return subprocess.Popen(list(argv), start_new_session=True, **kwargs)
+
+
+def kill(proc: subprocess.Popen):
+    """Kill ``proc``'s process group (or just ``proc``) if it is still running"""
+    if proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+class Watchdog:
+    """Kill a process that outlives ``timeout``; for streamed reads.
+
+    Use as a context manager around the read loop; ``fired`` tells whether
+    the process was killed.
+    """
+
+    def __init__(self, proc: subprocess.Popen, timeout: float):
+        self.proc = proc
+        self.fired = False
+        self._timer = threading.Timer(timeout, self._fire)
+        self._timer.daemon = True
+
+    def _fire(self):
+        self.fired = True
+        kill(self.proc)
+
+    def __enter__(self) -> "Watchdog":
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._timer.cancel()
+
+
+def _reap(proc: subprocess.Popen):
+    """Collect a killed process and close its pipes"""
+    try:
+        proc.communicate(timeout=1.0)
+    except subprocess.TimeoutExpired:
+        # Something outside the process group still holds the pipes open
+        for pipe in (proc.stdout, proc.stderr):
+            if pipe:
+                pipe.close()
+        proc.wait()
+
+
+def run_command(argv: Sequence[str], timeout: float, retries: int = 0,
+                retry_delay: float = 0.5, retry_on_timeout: bool = True,
+                timing: Optional[str] = None) -> RunResult:
+    """Run ``argv`` to completion, capturing text output.
+
+    A run that exceeds ``timeout`` is killed together with its process group
+    and reaped. Failed runs are repeated up to ``retries`` more times (timed
+    out runs only if ``retry_on_timeout``). Never raises for subprocess
+    failures; inspect the returned RunResult.
+
+    With ``timing``, each attempt records ``<timing>.spawn`` (starting the
+    process) and ``<timing>.run`` (waiting for it and reading its output)
+    in utils.timings.
+    """
+    result = RunResult(argv=list(argv))
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(retry_delay)
+        result.attempts = attempt + 1
+        result.timed_out = False
+        attempt_start = time.perf_counter()
+        try:
+            proc = spawn(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            result.error = str(e)
+            break
+        spawned = time.perf_counter()
+        if timing:
+            observe(f"{timing}.spawn", spawned - attempt_start)
+        try:
+            result.stdout, result.stderr = proc.communicate(timeout=timeout)
+            result.returncode = proc.returncode
+        except subprocess.TimeoutExpired:
+            kill(proc)
+            _reap(proc)
+            result.returncode = None
+            result.timed_out = True
+        except BaseException:
+            kill(proc)
+            proc.wait()
+            raise
+        finished = time.perf_counter()
+        if timing:
+            observe(f"{timing}.run", finished - spawned)
+        result.durations.append(finished - attempt_start)
+        if result.ok or (result.timed_out and not retry_on_timeout):
+            break
+    result.duration = time.perf_counter() - start
+    return result
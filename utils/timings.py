@@ -0,0 +1,120 @@
+"""
+In-process latency histograms for the detect and apply hot paths.
+
+Instrumented code calls ``timed(name)`` or ``observe(name, seconds)``; the
+CLI prints the registry with ``--timings`` or dumps it with ``--timings-json``.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with exact count, total, min and max"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0  # seconds
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets: List[int] = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Estimated ``q`` quantile (0-1) in seconds: the upper bound of its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                bound = BUCKETS_MS[index] / 1000 if index < len(BUCKETS_MS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        ms = 1000
+        buckets = {f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.buckets) if count}
+        if self.buckets[-1]:
+            buckets['inf'] = self.buckets[-1]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * ms, 3),
+            'mean_ms': round(self.total / self.count * ms, 3) if self.count else 0.0,
+            'min_ms': round(self.min * ms, 3) if self.count else 0.0,
+            'max_ms': round(self.max * ms, 3),
+            'p50_ms': round(self.percentile(0.5) * ms, 3),
+            'p95_ms': round(self.percentile(0.95) * ms, 3),
+            'buckets': buckets,  # non-empty buckets, keyed by upper bound in ms
+        }
+
+
+class TimingRegistry:
+    """Named histograms; safe to use from the GUI's asyncio thread and Tk thread"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Record how long the ``with`` block takes, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def to_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: self.histograms[name].to_dict() for name in sorted(self.histograms)}
+
+    def format_table(self) -> str:
+        """Human-readable summary, one row per phase"""
+        rows = self.to_dict()
+        if not rows:
+            return "No timings recorded."
+        width = max(len("phase"), *(len(name) for name in rows))
+        lines = [f"{'phase':<{width}}  {'count':>5}  {'total':>9}  {'mean':>9}  "
+                 f"{'p50':>9}  {'p95':>9}  {'max':>9}"]
+        for name, row in rows.items():
+            lines.append(f"{name:<{width}}  {row['count']:>5}  " + "  ".join(
+                f"{row[key]:>6.1f} ms" for key in ('total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms')))
+        return "\n".join(lines)
+
+
+REGISTRY = TimingRegistry()
+
+
+def observe(name: str, seconds: float):
+    """Record one ``name`` sample in the process-wide registry"""
+    REGISTRY.observe(name, seconds)
+
+
+def timed(name: str):
+    """Context manager timing a block into the process-wide registry"""
+    return REGISTRY.timed(name)